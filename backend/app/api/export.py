@@ -7,12 +7,13 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.search_session import SearchSession
 from app.models.lead import Lead
-from app.services import export_service
+from app.services import export_service, lead_enrichment, lead_generation
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,7 @@ VALID_EXPORT_TYPES = {"contacts", "companies", "contacts_companies", "outreach",
 
 
 @router.get("/{session_id}")
-def export_leads(
+async def export_leads(
     session_id: str,
     export_type: str = Query("full", description="Export type"),
     custom_fields: Optional[str] = Query(None, description="Comma-separated field keys for custom export"),
@@ -65,6 +66,15 @@ def export_leads(
             detail="No selected leads found for this session",
         )
 
+    # Lazily enriched leads get their contact details before they're written out
+    await lead_enrichment.enrich_leads(db, leads)
+    # Leads without an email get a template draft, or with on-demand generation their LLM email
+    if settings.GENERATION_TEMPLATE_DRAFTS:
+        if lead_generation.draft_leads(leads, session.sender_context or ""):
+            db.commit()
+    elif settings.GENERATION_ON_DEMAND:
+        await lead_generation.generate_leads(db, session, leads)
+
     # Parse custom fields
     custom_fields_list = (
         [f.strip() for f in custom_fields.split(",") if f.strip()]
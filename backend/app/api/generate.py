@@ -1,16 +1,20 @@
 import logging
+from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, SessionLocal
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.search_session import SearchSession
 from app.models.lead import Lead
-from app.services import llm_service
+from app.models.generation_job import GenerationJob
+from app.services import batch_service, generation_cache, llm_service, metering, metrics
+from app.services import pipeline_log as log
 from app.services.llm_service import DEFAULT_EMAIL_SYSTEM_PROMPT, LEAD_INFO_TEMPLATE, build_lead_info
 
 logger = logging.getLogger(__name__)
@@ -20,9 +24,20 @@ router = APIRouter(prefix="/api/generate", tags=["generate"])
 
 # ── Schemas ───────────────────────────────────────────────────────────────
 
+VALID_GENERATION_MODES = {"auto", "interactive", "batch"}
+
+
 class GenerateRequest(BaseModel):
     sender_context: str = ""
     system_prompt: Optional[str] = None
+    # "interactive" calls the LLM per lead now; "batch" submits an offline
+    # Batch API job; "auto" picks batch for sessions above the configured size.
+    # Batch answers 202 with a job to poll, so clients have to opt in to it.
+    mode: str = "interactive"
+    # Regenerate every lead even when its inputs are unchanged
+    force: bool = False
+    # Stream tokens into the live preview; defaults to OPENAI_STREAM_EMAILS
+    stream: Optional[bool] = None
 
 
 class LeadPromptPreview(BaseModel):
@@ -39,6 +54,22 @@ class PromptPreviewResponse(BaseModel):
     leads: list[LeadPromptPreview]
 
 
+class GenerationJobResponse(BaseModel):
+    id: str
+    session_id: str
+    status: str
+    model: Optional[str] = None
+    batch_id: Optional[str] = None
+    total_requests: int = 0
+    success_count: int = 0
+    error_count: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True, "protected_namespaces": ()}
+
+
 # ── Helpers ───────────────────────────────────────────────────────────────
 
 def _get_session_or_404(session_id: str, user_id: str, db: Session) -> SearchSession:
@@ -58,19 +89,15 @@ def _get_session_or_404(session_id: str, user_id: str, db: Session) -> SearchSes
     return session
 
 
-def _lead_to_dict(lead: Lead) -> dict:
-    return {
-        "first_name": lead.first_name,
-        "last_name": lead.last_name,
-        "job_title": lead.job_title,
-        "company_name": lead.company_name,
-        "company_industry": lead.company_industry,
-        "city": lead.city,
-        "state": lead.state,
-        "country": lead.country,
-        "linkedin_url": lead.linkedin_url,
-        "scraped_context": lead.scraped_context,
-    }
+async def _run_batch_job_background(job_id: str) -> None:
+    """Wrapper that creates its own DB session for the background task."""
+    db = SessionLocal()
+    metrics.GENERATION_JOBS_ACTIVE.inc()
+    try:
+        await batch_service.process_generation_job(job_id, db)
+    finally:
+        metrics.GENERATION_JOBS_ACTIVE.dec()
+        db.close()
 
 
 # ── Endpoints ─────────────────────────────────────────────────────────────
@@ -92,7 +119,7 @@ def get_prompt_preview(
 
     lead_previews = []
     for lead in selected_leads:
-        ld = _lead_to_dict(lead)
+        ld = llm_service.lead_prompt_data(lead)
         name = f"{lead.first_name or ''} {lead.last_name or ''}".strip() or "Unknown"
         lead_previews.append(
             LeadPromptPreview(
@@ -114,11 +141,24 @@ def get_prompt_preview(
 @router.post("/{session_id}")
 async def generate_emails_for_session(
     session_id: str,
+    response: Response,
+    background_tasks: BackgroundTasks,
     body: GenerateRequest = GenerateRequest(),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Trigger email generation for all selected leads in a session."""
+    """Trigger email generation for all selected leads in a session.
+
+    By default leads are generated interactively, one LLM call per lead.
+    ``mode="batch"`` (or ``"auto"`` for large sessions) submits an offline
+    Batch API job that writes results back into the leads when it completes.
+    """
+    if body.mode not in VALID_GENERATION_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid mode. Must be one of: {', '.join(sorted(VALID_GENERATION_MODES))}",
+        )
+
     session = _get_session_or_404(session_id, current_user.id, db)
 
     leads = (
@@ -133,24 +173,84 @@ async def generate_emails_for_session(
             detail="No selected leads found for this session",
         )
 
-    success_count = 0
+    model = settings.get_model()
+    sender_context = body.sender_context or ""
+    misses, cache_stats = generation_cache.partition_leads(
+        db,
+        leads,
+        model=model,
+        sender_context=sender_context,
+        original_query=session.raw_query,
+        custom_system_prompt=body.system_prompt,
+        force=body.force,
+    )
+    db.commit()
+
+    cache_summary = {
+        "cache_hits": cache_stats["hits"],
+        "cache_misses": cache_stats["misses"],
+        "tokens_saved": cache_stats["tokens_saved"],
+    }
+
+    use_batch = misses and (
+        body.mode == "batch"
+        or (body.mode == "auto" and len(misses) >= settings.BATCH_GENERATION_MIN_LEADS)
+    )
+    if use_batch:
+        job = GenerationJob(
+            session_id=session_id,
+            user_id=current_user.id,
+            model=model,
+            sender_context=sender_context,
+            system_prompt=body.system_prompt,
+            force=body.force,
+            total_requests=len(misses),
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        background_tasks.add_task(_run_batch_job_background, job.id)
+
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {
+            "session_id": session_id,
+            "mode": "batch",
+            "job_id": job.id,
+            "total_leads": len(leads),
+            **cache_summary,
+            "message": f"Submitted batch generation job for {len(misses)} selected leads.",
+        }
+
+    stream = settings.OPENAI_STREAM_EMAILS if body.stream is None else body.stream
+    success_count = cache_stats["hits"]
     error_count = 0
 
-    for lead in leads:
+    for lead, key in misses:
+        name = f"{lead.first_name or ''} {lead.last_name or ''}".strip() or lead.company_name or "lead"
         try:
-            lead_data = _lead_to_dict(lead)
-            email_result = await llm_service.generate_email(
-                lead_data=lead_data,
-                sender_context=body.sender_context or "",
-                original_query=session.raw_query,
-                custom_system_prompt=body.system_prompt,
-            )
+            lead_data = llm_service.lead_prompt_data(lead)
+            with metering.scope(
+                session_id=session_id, user_id=current_user.id, stage="generate", lead_id=lead.id
+            ):
+                email_result = await llm_service.generate_email(
+                    lead_data=lead_data,
+                    sender_context=sender_context,
+                    original_query=session.raw_query,
+                    custom_system_prompt=body.system_prompt,
+                    stream=stream,
+                    on_partial=log.make_preview_callback(session_id, lead.id, name) if stream else None,
+                )
 
             if "error" not in email_result:
-                lead.personalized_email = email_result.get("body", "")
-                lead.email_subject = email_result.get("subject", "")
-                lead.suggested_approach = email_result.get("suggested_approach", "")
+                generation_cache.apply_result(lead, key, email_result)
+                generation_cache.store(db, key, model, email_result)
                 success_count += 1
+                if stream:
+                    log.set_preview(
+                        session_id, lead.id, name,
+                        subject=lead.email_subject, body=lead.personalized_email, done=True,
+                    )
             else:
                 logger.warning(f"Email generation error for lead {lead.id}: {email_result['error']}")
                 error_count += 1
@@ -160,11 +260,38 @@ async def generate_emails_for_session(
             continue
 
     db.commit()
+    log.clear_previews(session_id)
+    metering.flush(db, session_id)
 
     return {
         "session_id": session_id,
+        "mode": "interactive",
         "total_leads": len(leads),
         "success_count": success_count,
         "error_count": error_count,
+        **cache_summary,
         "message": f"Generated emails for {success_count}/{len(leads)} selected leads.",
     }
+
+
+@router.get("/{session_id}/jobs/{job_id}", response_model=GenerationJobResponse)
+def get_generation_job(
+    session_id: str,
+    job_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Return the status of a batch generation job."""
+    _get_session_or_404(session_id, current_user.id, db)
+
+    job = (
+        db.query(GenerationJob)
+        .filter(GenerationJob.id == job_id, GenerationJob.session_id == session_id)
+        .first()
+    )
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Generation job not found",
+        )
+    return GenerationJobResponse.model_validate(job)
@@ -1,14 +1,16 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.search_session import SearchSession
 from app.models.lead import Lead
-from app.schemas.lead import LeadResponse, LeadUpdate, EmailUpdate
+from app.schemas.lead import LeadResponse, LeadUpdate, EmailUpdate, EnrichRequest
+from app.services import lead_enrichment, lead_generation
 
 router = APIRouter(prefix="/api/leads", tags=["leads"])
 
@@ -16,10 +18,18 @@ router = APIRouter(prefix="/api/leads", tags=["leads"])
 @router.get("/{session_id}", response_model=List[LeadResponse])
 def get_leads(
     session_id: str,
+    background_tasks: BackgroundTasks,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; all leads when omitted"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Get all leads for a specific session."""
+    """Get a session's leads, newest first, optionally one page at a time.
+
+    With on-demand generation, emails for this page and the leads after it
+    are generated in the background. Without a limit only the first
+    ``GENERATION_PREFETCH_AHEAD`` listed are, not the whole session.
+    """
     # Verify session belongs to current user
     session = (
         db.query(SearchSession)
@@ -35,12 +45,89 @@ def get_leads(
             detail="Session not found",
         )
 
+    query = lead_generation.page_query(db, session_id).offset(offset)
+    leads = (query.limit(limit) if limit is not None else query).all()
+    if settings.GENERATION_ON_DEMAND and leads:
+        ahead = settings.GENERATION_PREFETCH_AHEAD
+        background_tasks.add_task(
+            lead_generation.generate_ahead, db.get_bind(), session_id, offset,
+            len(leads) + ahead if limit is not None else ahead,
+        )
+    return [LeadResponse.model_validate(lead) for lead in leads]
+
+
+@router.post("/{session_id}/enrich", response_model=List[LeadResponse])
+async def enrich_leads(
+    session_id: str,
+    payload: EnrichRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Fetch full contact details for leads being viewed (lazy enrichment)."""
+    session = (
+        db.query(SearchSession)
+        .filter(
+            SearchSession.id == session_id,
+            SearchSession.user_id == current_user.id,
+        )
+        .first()
+    )
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
+        )
+
+    leads = (
+        db.query(Lead)
+        .filter(Lead.session_id == session_id, Lead.id.in_(payload.lead_ids))
+        .all()
+    )
+    await lead_enrichment.enrich_leads(db, leads)
+    return [LeadResponse.model_validate(lead) for lead in leads]
+
+
+@router.post("/{session_id}/open", response_model=List[LeadResponse])
+async def open_leads(
+    session_id: str,
+    payload: EnrichRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Get leads ready to be read: contact details fetched and emails written.
+
+    With template drafts, leads get a draft now and their LLM emails in the
+    background; with on-demand generation alone, the LLM emails are awaited.
+    """
+    session = (
+        db.query(SearchSession)
+        .filter(
+            SearchSession.id == session_id,
+            SearchSession.user_id == current_user.id,
+        )
+        .first()
+    )
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
+        )
+
     leads = (
         db.query(Lead)
-        .filter(Lead.session_id == session_id)
-        .order_by(Lead.created_at.desc())
+        .filter(Lead.session_id == session_id, Lead.id.in_(payload.lead_ids))
         .all()
     )
+    await lead_enrichment.enrich_leads(db, leads)
+    if settings.GENERATION_TEMPLATE_DRAFTS:
+        if lead_generation.draft_leads(leads, session.sender_context or ""):
+            db.commit()
+        refine = [lead.id for lead in leads if lead_generation.needs_llm(lead)]
+        if refine:
+            background_tasks.add_task(lead_generation.generate_ids, db.get_bind(), session_id, refine)
+    elif settings.GENERATION_ON_DEMAND:
+        await lead_generation.generate_leads(db, session, leads)
     return [LeadResponse.model_validate(lead) for lead in leads]
 
 
@@ -48,10 +135,11 @@ def get_leads(
 def update_lead(
     lead_id: str,
     payload: LeadUpdate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    """Toggle is_selected on a lead."""
+    """Toggle is_selected on a lead; selecting a pending lead queues its enrichment."""
     lead = db.query(Lead).filter(Lead.id == lead_id).first()
     if not lead:
         raise HTTPException(
@@ -76,6 +164,8 @@ def update_lead(
 
     if payload.is_selected is not None:
         lead.is_selected = payload.is_selected
+        if payload.is_selected and lead.enrichment_status == lead_enrichment.PENDING:
+            background_tasks.add_task(lead_enrichment.enrich_selected, db.get_bind(), [lead.id])
 
     db.commit()
     db.refresh(lead)
@@ -118,6 +208,8 @@ def update_lead_email(
         lead.email_subject = payload.email_subject
     if payload.suggested_approach is not None:
         lead.suggested_approach = payload.suggested_approach
+    if payload.personalized_email is not None or payload.email_subject is not None:
+        lead.email_tier = lead_generation.TIER_EDITED
 
     db.commit()
     db.refresh(lead)
@@ -1,4 +1,7 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
@@ -6,9 +9,17 @@ from app.core.database import get_db, SessionLocal
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.search_session import SearchSession
-from app.schemas.pipeline import PipelineRunRequest, PipelineStatusResponse, LogEntry
+from app.schemas.pipeline import (
+    PipelineRunRequest,
+    PipelineStatusResponse,
+    LogEntry,
+    EmailPreview,
+    ParseCacheStats,
+    ParseCacheInvalidateResponse,
+    TraceResponse,
+)
 from app.schemas.search import SessionResponse
-from app.services import pipeline_service
+from app.services import parse_cache, pipeline_service, tracing
 from app.services import pipeline_log
 
 router = APIRouter(prefix="/api/pipeline", tags=["pipeline"])
@@ -110,6 +121,64 @@ def list_sessions(
     return [SessionResponse.model_validate(s) for s in sessions]
 
 
+@router.get("/parse-cache/stats", response_model=ParseCacheStats)
+def get_parse_cache_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Query-parse latency and cache hit rate across the user's sessions."""
+    base = db.query(SearchSession).filter(
+        SearchSession.user_id == current_user.id,
+        SearchSession.parse_cache_hit.isnot(None),
+    )
+    sessions = base.count()
+    hits = base.filter(SearchSession.parse_cache_hit == True).count()
+
+    def _avg(*criteria) -> Optional[float]:
+        value = (
+            db.query(func.avg(SearchSession.parse_latency_ms))
+            .filter(
+                SearchSession.user_id == current_user.id,
+                SearchSession.parse_cache_hit.isnot(None),
+                *criteria,
+            )
+            .scalar()
+        )
+        return round(value, 1) if value is not None else None
+
+    return ParseCacheStats(
+        sessions=sessions,
+        cache_hits=hits,
+        hit_rate=round(hits / sessions, 3) if sessions else 0.0,
+        avg_parse_latency_ms=_avg(),
+        avg_hit_latency_ms=_avg(SearchSession.parse_cache_hit == True),
+        avg_miss_latency_ms=_avg(SearchSession.parse_cache_hit == False),
+        cached_entries=parse_cache.count_entries(db),
+    )
+
+
+@router.delete("/parse-cache", response_model=ParseCacheInvalidateResponse)
+def invalidate_parse_cache(
+    query: str = Query(..., description="Invalidate this query's parses (all models)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Invalidate the cached parses of one of the current user's queries.
+
+    The cache is shared between users, so only a query the user has run
+    themselves can be invalidated, and never the whole cache.
+    """
+    normalized = parse_cache.normalize_query(query)
+    own_queries = db.query(SearchSession.raw_query).filter(SearchSession.user_id == current_user.id)
+    if not any(parse_cache.normalize_query(raw) == normalized for (raw,) in own_queries):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No search of yours matches this query",
+        )
+    removed = parse_cache.invalidate(db, query)
+    return ParseCacheInvalidateResponse(invalidated=removed)
+
+
 @router.get("/{session_id}/status", response_model=PipelineStatusResponse)
 def get_pipeline_status(
     session_id: str,
@@ -153,4 +222,53 @@ def get_pipeline_status(
         current_step=progress.get("step", ""),
         progress_pct=progress.get("pct", 0),
         logs=log_entries,
+        previews=[EmailPreview(**p) for p in pipeline_log.get_previews(session_id)],
+    )
+
+
+@router.get("/{session_id}/preview", response_model=list[EmailPreview])
+def get_email_previews(
+    session_id: str,
+    include_done: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Live partial subject/body text for emails that are still being streamed."""
+    session = (
+        db.query(SearchSession)
+        .filter(
+            SearchSession.id == session_id,
+            SearchSession.user_id == current_user.id,
+        )
+        .first()
     )
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
+        )
+    return [EmailPreview(**p) for p in pipeline_log.get_previews(session_id, include_done=include_done)]
+
+
+@router.get("/{session_id}/trace", response_model=TraceResponse)
+def get_pipeline_trace(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Span waterfall, per-stage and per-service timings and the critical path for a run."""
+    session = (
+        db.query(SearchSession)
+        .filter(
+            SearchSession.id == session_id,
+            SearchSession.user_id == current_user.id,
+        )
+        .first()
+    )
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
+        )
+    summary = tracing.summarize(tracing.load_spans(db, session_id))
+    return TraceResponse(session_id=session_id, **summary)
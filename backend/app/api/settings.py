@@ -2,11 +2,22 @@ import logging
 
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
-from app.schemas.settings import ApiKeyUpdate, ApiKeyTestResponse, SettingsResponse, ModelInfo, ModelUpdate
+from app.schemas.settings import (
+    ApiKeyUpdate,
+    ApiKeyTestResponse,
+    DomainFilterResponse,
+    DomainFilterUpdate,
+    SettingsResponse,
+    ModelInfo,
+    ModelUpdate,
+)
+from app.services import domain_filter
 
 logger = logging.getLogger(__name__)
 
@@ -243,3 +254,32 @@ def update_model(
         )
     settings.set_model(payload.model)
     return {"model": payload.model, "status": "updated"}
+
+
+def _domain_filter_response(rules: dict[str, list[str]]) -> DomainFilterResponse:
+    return DomainFilterResponse(
+        enabled=settings.DOMAIN_FILTER_ENABLED,
+        default_excluded=sorted(domain_filter.DEFAULT_EXCLUDED),
+        excluded=rules["exclude"],
+        allowed=rules["allow"],
+    )
+
+
+@router.get("/domain-filter", response_model=DomainFilterResponse)
+def get_domain_filter(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Return the default excluded domains and the user's own overrides."""
+    return _domain_filter_response(domain_filter.get_rules(db, current_user.id))
+
+
+@router.put("/domain-filter", response_model=DomainFilterResponse)
+def update_domain_filter(
+    payload: DomainFilterUpdate,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Replace the user's excluded and allowed domains."""
+    rules = domain_filter.set_rules(db, current_user.id, payload.excluded, payload.allowed)
+    return _domain_filter_response(rules)
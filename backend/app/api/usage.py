@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.models.user import User
+from app.models.search_session import SearchSession
+from app.models.usage_record import UsageRecord
+from app.schemas.usage import (
+    UsageTotals,
+    UsageBreakdown,
+    SessionUsageReport,
+    DailyUsageRow,
+    UsageReport,
+)
+
+router = APIRouter(prefix="/api/usage", tags=["usage"])
+
+_AGGREGATES = (
+    func.coalesce(func.sum(UsageRecord.call_count), 0).label("calls"),
+    func.coalesce(
+        func.sum(case((UsageRecord.success == False, UsageRecord.call_count), else_=0)), 0
+    ).label("errors"),
+    func.coalesce(func.sum(UsageRecord.prompt_tokens), 0).label("prompt_tokens"),
+    func.coalesce(func.sum(UsageRecord.completion_tokens), 0).label("completion_tokens"),
+    func.coalesce(func.sum(UsageRecord.total_tokens), 0).label("total_tokens"),
+    func.coalesce(func.sum(UsageRecord.cost_usd), 0.0).label("cost_usd"),
+    func.coalesce(func.sum(UsageRecord.latency_ms), 0.0).label("latency_ms"),
+)
+
+
+def _totals(row) -> dict:
+    calls = int(row.calls or 0)
+    latency = float(row.latency_ms or 0.0)
+    return {
+        "calls": calls,
+        "errors": int(row.errors or 0),
+        "prompt_tokens": int(row.prompt_tokens or 0),
+        "completion_tokens": int(row.completion_tokens or 0),
+        "total_tokens": int(row.total_tokens or 0),
+        "cost_usd": round(float(row.cost_usd or 0.0), 6),
+        "latency_ms": round(latency, 1),
+        "avg_latency_ms": round(latency / calls, 1) if calls else 0.0,
+    }
+
+
+def _breakdown(db: Session, group_col, *criteria) -> list[UsageBreakdown]:
+    rows = (
+        db.query(group_col.label("key"), *_AGGREGATES)
+        .filter(*criteria)
+        .group_by(group_col)
+        .order_by(func.sum(UsageRecord.cost_usd).desc(), func.sum(UsageRecord.latency_ms).desc())
+        .all()
+    )
+    return [UsageBreakdown(key=str(row.key), **_totals(row)) for row in rows if row.key is not None]
+
+
+@router.get("/sessions/{session_id}", response_model=SessionUsageReport)
+def get_session_usage(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Token, cost, latency and call counts for one session, by stage/vendor/model/lead."""
+    session = (
+        db.query(SearchSession)
+        .filter(
+            SearchSession.id == session_id,
+            SearchSession.user_id == current_user.id,
+        )
+        .first()
+    )
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session not found",
+        )
+
+    criteria = (UsageRecord.session_id == session_id,)
+    totals = db.query(*_AGGREGATES).filter(*criteria).one()
+
+    return SessionUsageReport(
+        session_id=session_id,
+        totals=UsageTotals(**_totals(totals)),
+        by_stage=_breakdown(db, UsageRecord.stage, *criteria),
+        by_vendor=_breakdown(
+            db, UsageRecord.vendor + ":" + UsageRecord.operation, *criteria
+        ),
+        by_model=_breakdown(db, UsageRecord.model, *criteria),
+        by_lead=_breakdown(db, UsageRecord.lead_id, *criteria),
+    )
+
+
+@router.get("/report", response_model=UsageReport)
+def get_usage_report(
+    days: int = Query(30, ge=1, le=365, description="Number of days to include"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Per-day usage and cost for the current user, grouped by vendor and model."""
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+    criteria = (UsageRecord.user_id == current_user.id, UsageRecord.created_at >= since)
+    day = func.date(UsageRecord.created_at)
+
+    rows = (
+        db.query(
+            day.label("day"),
+            UsageRecord.vendor,
+            UsageRecord.model,
+            *_AGGREGATES,
+        )
+        .filter(*criteria)
+        .group_by(day, UsageRecord.vendor, UsageRecord.model)
+        .order_by(day.desc(), UsageRecord.vendor, UsageRecord.model)
+        .all()
+    )
+    totals = db.query(*_AGGREGATES).filter(*criteria).one()
+
+    return UsageReport(
+        days=days,
+        totals=UsageTotals(**_totals(totals)),
+        daily=[
+            DailyUsageRow(date=str(row.day), vendor=row.vendor, model=row.model, **_totals(row))
+            for row in rows
+        ],
+    )
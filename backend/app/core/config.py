@@ -36,8 +36,97 @@ class Settings(BaseSettings):
     APOLLO_API_KEY: str = ""
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o-mini"
+    OPENAI_BASE_URL: str = "https://api.openai.com/v1"
     CORS_ORIGINS: str = "http://localhost:5173"
 
+    # Bulk email generation via the OpenAI Batch API
+    BATCH_GENERATION_MIN_LEADS: int = 100
+    BATCH_POLL_INTERVAL_SECONDS: float = 30.0
+    BATCH_MAX_WAIT_SECONDS: float = 86400.0
+
+    # Stream email tokens into the live preview while generating
+    OPENAI_STREAM_EMAILS: bool = True
+    # On-demand generation: complete runs after enrichment and write each
+    # email when its lead is opened or exported, keeping this many leads past
+    # the last page listed generated in the background
+    GENERATION_ON_DEMAND: bool = False
+    GENERATION_PREFETCH_AHEAD: int = 20
+    GENERATION_CONCURRENCY: int = 4
+    # Give every lead an instant template draft, replaced by the LLM email in
+    # the background
+    GENERATION_TEMPLATE_DRAFTS: bool = False
+
+    # Memoized query parsing
+    PARSE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # Website scraping concurrency (shared by all pipelines in the process)
+    SCRAPER_MAX_CONCURRENCY: int = 32
+    SCRAPER_MIN_CONCURRENCY: int = 2
+    SCRAPER_INITIAL_CONCURRENCY: int = 8
+    SCRAPER_PER_HOST_CONCURRENCY: int = 2
+    SCRAPER_PER_HOST_DELAY_SECONDS: float = 0.25
+    SCRAPER_LATENCY_TARGET_SECONDS: float = 3.0
+    # Stop reading a page after this many (decoded) bytes
+    SCRAPER_MAX_BYTES: int = 1_000_000
+    # "site" crawls a few high-value pages (team, about, contact) per company;
+    # "single" only fetches the search result URL
+    SCRAPER_CRAWL_MODE: str = "site"
+    SCRAPER_CRAWL_MAX_PAGES: int = 4
+    SCRAPER_CRAWL_TIME_BUDGET_SECONDS: float = 8.0
+    SCRAPER_CONTEXT_MAX_CHARS: int = 1000
+    # Serper: send queries submitted within the window (a pipeline's list, plus
+    # other pipelines searching at once) as one array request
+    SERPER_BATCH_MODE: bool = True
+    SERPER_BATCH_WINDOW_MS: float = 25.0
+    SERPER_BATCH_MAX_QUERIES: int = 100
+    # Page through search results until this many distinct company domains
+    # are found (at most SERPER_MAX_PAGES pages per query)
+    SERPER_TARGET_DOMAINS: int = 15
+    SERPER_MAX_PAGES: int = 3
+    SERPER_RESULTS_PER_PAGE: int = 10
+    # Contacts harvested from company websites: skip Apollo for a company whose
+    # site lists at least this many named addresses (0 = always ask Apollo),
+    # and fall back to a role address (sales@, info@) when no one else is found
+    HARVEST_MIN_CONTACTS: int = 2
+    HARVEST_ROLE_LEADS: bool = True
+    # Drop directory, aggregator and media domains (bundled list plus these
+    # comma-separated extras, plus per-user rules) before scraping/enrichment
+    DOMAIN_FILTER_ENABLED: bool = True
+    DOMAIN_FILTER_EXTRA: str = ""
+    # Full Public Suffix List file for registrable-domain extraction; a
+    # bundled subset is used when empty
+    PUBLIC_SUFFIX_LIST_PATH: str = ""
+    # Apollo people search: stop once this many contacts are found per run
+    APOLLO_TARGET_LEADS: int = 50
+    APOLLO_MAX_PEOPLE_PER_DOMAIN: int = 10
+    APOLLO_PAGE_SIZE: int = 25
+    # people/bulk_match: people per request (Apollo allows 10) and requests in flight
+    APOLLO_BULK_MATCH_SIZE: int = 10
+    APOLLO_BULK_CONCURRENCY: int = 3
+    # Lazy enrichment: keep search stubs and match people only once a lead is
+    # selected, opened or exported; the first APOLLO_PREFETCH_LEADS selected
+    # leads of a run are matched as soon as it completes, and selections made
+    # within the window share bulk_match requests
+    APOLLO_LAZY_ENRICHMENT: bool = False
+    APOLLO_PREFETCH_LEADS: int = 10
+    APOLLO_LAZY_BATCH_WINDOW_MS: float = 200.0
+
+    # Reuse a company's scraped website context for this long before refetching
+    COMPANY_CONTEXT_TTL_SECONDS: int = 7 * 24 * 3600
+    # Reuse a person's Apollo enrichment across sessions for this long
+    CONTACT_ENRICHMENT_TTL_SECONDS: int = 30 * 24 * 3600
+    # Honour robots.txt (rules and Crawl-delay) before fetching pages
+    SCRAPER_RESPECT_ROBOTS: bool = True
+    ROBOTS_CACHE_TTL_SECONDS: int = 24 * 3600
+    ROBOTS_ERROR_TTL_SECONDS: int = 600
+
+    # DNS cache for scraped hosts: answer lifetime and how long failures are remembered
+    DNS_CACHE_TTL_SECONDS: int = 300
+    DNS_NEGATIVE_TTL_SECONDS: int = 60
+
+    # Optional OTLP/HTTP collector for pipeline traces, e.g. http://localhost:4318
+    OTEL_EXPORTER_OTLP_ENDPOINT: str = ""
+
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
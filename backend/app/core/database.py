@@ -1,4 +1,7 @@
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, inspect, literal, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
 from typing import Generator
 
@@ -14,6 +17,44 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(bind: Engine) -> list[str]:
+    """Add model columns missing from existing tables; returns "table.column" names.
+
+    ``create_all`` creates new tables but never alters existing ones, so a
+    database created by an older version lacks columns added to its tables
+    since. They are added as plain nullable columns (with their scalar
+    default for existing rows) plus their indexes; constraints such as
+    foreign keys are not added to existing tables.
+    """
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            missing = [c for c in table.columns if c.name not in present]
+            for column in missing:
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(bind.dialect)}"
+                default = column.default
+                if default is not None and default.is_scalar:
+                    value = literal(default.arg, column.type).compile(
+                        dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+                    )
+                    ddl += f" DEFAULT {value}"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+            for index in table.indexes:
+                if any(c in missing for c in index.columns):
+                    index.create(conn, checkfirst=True)
+    if added:
+        logger.info(f"Added missing columns: {', '.join(added)}")
+    return added
+
 
 def get_db() -> Generator[Session, None, None]:
     """FastAPI dependency that provides a database session."""
@@ -1,16 +1,22 @@
+import asyncio
 import logging
+import time
+from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import engine, Base, add_missing_columns
 from app.api.auth import router as auth_router
 from app.api.pipeline import router as pipeline_router
 from app.api.leads import router as leads_router
 from app.api.generate import router as generate_router
 from app.api.export import router as export_router
 from app.api.settings import router as settings_router
+from app.api.usage import router as usage_router
+from app.services import metrics, tracing
 
 # ── Logging ──────────────────────────────────────────────────────────────────
 logging.basicConfig(
@@ -40,6 +46,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ── Metrics ──────────────────────────────────────────────────────────────────
+metrics.install_db_instrumentation()
+tracing.add_finish_hook(metrics.observe_span)
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template so IDs in the path don't explode cardinality
+        route = request.scope.get("route")
+        metrics.HTTP_LATENCY.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status_code,
+        )
+
+
 # ── Routers ──────────────────────────────────────────────────────────────────
 app.include_router(auth_router)
 app.include_router(pipeline_router)
@@ -47,6 +77,7 @@ app.include_router(leads_router)
 app.include_router(generate_router)
 app.include_router(export_router)
 app.include_router(settings_router)
+app.include_router(usage_router)
 
 
 # ── Startup ──────────────────────────────────────────────────────────────────
@@ -54,10 +85,32 @@ app.include_router(settings_router)
 def on_startup():
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
     logger.info("Siyada Lead Generation API is ready.")
 
 
+_loop_monitor: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def start_event_loop_monitor():
+    global _loop_monitor
+    _loop_monitor = asyncio.create_task(metrics.monitor_event_loop())
+
+
+@app.on_event("shutdown")
+async def stop_event_loop_monitor():
+    if _loop_monitor is not None:
+        _loop_monitor.cancel()
+
+
 # ── Health check ─────────────────────────────────────────────────────────────
 @app.get("/api/health")
 def health_check():
     return {"status": "ok", "service": "siyada-lead-gen"}
+
+
+# ── Metrics (Prometheus text format) ─────────────────────────────────────────
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
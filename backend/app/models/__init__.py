@@ -1,6 +1,27 @@
 from app.models.user import User
 from app.models.search_session import SearchSession
 from app.models.search_result import SearchResult
+from app.models.company import Company
+from app.models.contact import Contact
+from app.models.domain_rule import DomainRule
 from app.models.lead import Lead
+from app.models.generation_job import GenerationJob
+from app.models.generation_cache import GenerationCacheEntry
+from app.models.query_parse_cache import QueryParseCacheEntry
+from app.models.usage_record import UsageRecord
+from app.models.trace_span import TraceSpan
 
-__all__ = ["User", "SearchSession", "SearchResult", "Lead"]
+__all__ = [
+    "User",
+    "SearchSession",
+    "SearchResult",
+    "Company",
+    "Contact",
+    "DomainRule",
+    "Lead",
+    "GenerationJob",
+    "GenerationCacheEntry",
+    "QueryParseCacheEntry",
+    "UsageRecord",
+    "TraceSpan",
+]
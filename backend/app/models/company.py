@@ -0,0 +1,35 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+
+class Company(Base):
+    """One row per company website, shared by every lead and session."""
+
+    __tablename__ = "companies"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    domain = Column(String, nullable=False, unique=True, index=True)  # registrable domain (acme.com, acme.co.uk); see url_canon
+    name = Column(String, nullable=True)
+    industry = Column(String, nullable=True)
+    size = Column(String, nullable=True)
+    linkedin_url = Column(String, nullable=True)
+    scraped_context = Column(Text, nullable=True)
+    # Emails and LinkedIn links found on the website (contact_harvest result), JSON text
+    scraped_contacts = Column(Text, nullable=True)
+
+    # Freshness: when the website was last scraped / org data last refreshed
+    scraped_at = Column(DateTime, nullable=True)
+    enriched_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    leads = relationship("Lead", back_populates="company")
@@ -0,0 +1,39 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+
+class Contact(Base):
+    """One row per person, shared by every lead and session.
+
+    Looked up by Apollo person ID, normalized email or normalized LinkedIn
+    URL, each of which is indexed.
+    """
+
+    __tablename__ = "contacts"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    apollo_id = Column(String, nullable=True, unique=True, index=True)
+    email_key = Column(String, nullable=True, index=True)  # lowercased email
+    linkedin_key = Column(String, nullable=True, index=True)  # "linkedin.com/in/<slug>"
+
+    first_name = Column(String, nullable=True)
+    last_name = Column(String, nullable=True)
+    email = Column(String, nullable=True)
+    company_domain = Column(String, nullable=True)
+
+    # Last full Apollo enrichment (apollo_service result dict), JSON text
+    enrichment = Column(Text, nullable=True)
+    enriched_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    leads = relationship("Lead", back_populates="contact")
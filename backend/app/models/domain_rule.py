@@ -0,0 +1,23 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint
+from app.core.database import Base
+
+
+class DomainRule(Base):
+    """A user's override of the default directory/aggregator domain filter.
+
+    ``action`` is ``"exclude"`` (never scrape or enrich this domain) or
+    ``"allow"`` (treat it as a company even though the default list excludes
+    it). A rule covers the domain and its subdomains.
+    """
+
+    __tablename__ = "domain_rules"
+    __table_args__ = (UniqueConstraint("user_id", "domain"),)
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    domain = Column(String, nullable=False)
+    action = Column(String, nullable=False)  # exclude, allow
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
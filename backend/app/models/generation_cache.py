@@ -0,0 +1,24 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, DateTime, Text
+from app.core.database import Base
+
+
+class GenerationCacheEntry(Base):
+    __tablename__ = "generation_cache"
+
+    # sha256 over (model, system prompt, sender context, original query, lead info)
+    key = Column(String, primary_key=True)
+    model = Column(String, nullable=True)
+
+    email_subject = Column(String, nullable=True)
+    personalized_email = Column(Text, nullable=True)
+    suggested_approach = Column(Text, nullable=True)
+
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    total_tokens = Column(Integer, default=0)
+    hit_count = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    last_hit_at = Column(DateTime, nullable=True)
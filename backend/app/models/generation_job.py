@@ -0,0 +1,44 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey, Text
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    session_id = Column(String, ForeignKey("search_sessions.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(
+        String,
+        default="pending",
+        nullable=False,
+    )  # pending, submitted, in_progress, completed, failed
+    model = Column(String, nullable=True)
+    sender_context = Column(Text, nullable=True)
+    system_prompt = Column(Text, nullable=True)
+    force = Column(Boolean, default=False)
+
+    # Provider-side identifiers
+    batch_id = Column(String, nullable=True)
+    input_file_id = Column(String, nullable=True)
+    output_file_id = Column(String, nullable=True)
+    error_file_id = Column(String, nullable=True)
+
+    total_requests = Column(Integer, default=0)
+    success_count = Column(Integer, default=0)
+    error_count = Column(Integer, default=0)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(
+        DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+    completed_at = Column(DateTime, nullable=True)
+
+    session = relationship("SearchSession")
@@ -6,12 +6,29 @@ from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 
+def _company_fallback(column: str, company_attr: str) -> property:
+    """The lead's own value if set, else the linked company's shared one."""
+
+    def get(self):
+        value = getattr(self, column)
+        if not value and self.company is not None:
+            return getattr(self.company, company_attr)
+        return value
+
+    def set(self, value):
+        setattr(self, column, value)
+
+    return property(get, set)
+
+
 class Lead(Base):
     __tablename__ = "leads"
 
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     session_id = Column(String, ForeignKey("search_sessions.id"), nullable=False, index=True)
     search_result_id = Column(String, ForeignKey("search_results.id"), nullable=True)
+    company_id = Column(String, ForeignKey("companies.id"), nullable=True, index=True)
+    contact_id = Column(String, ForeignKey("contacts.id"), nullable=True, index=True)
 
     # Contact info
     first_name = Column(String, nullable=True)
@@ -31,18 +48,25 @@ class Lead(Base):
     # Company info
     company_name = Column(String, nullable=True)
     company_domain = Column(String, nullable=True)
-    company_industry = Column(String, nullable=True)
-    company_size = Column(String, nullable=True)
-    company_linkedin_url = Column(String, nullable=True)
+    # Per-lead overrides; when empty, the values shared on ``company`` apply
+    _company_industry = Column("company_industry", String, nullable=True)
+    _company_size = Column("company_size", String, nullable=True)
+    _company_linkedin_url = Column("company_linkedin_url", String, nullable=True)
 
     # Enrichment
-    scraped_context = Column(Text, nullable=True)
+    _scraped_context = Column("scraped_context", Text, nullable=True)
     personalized_email = Column(Text, nullable=True)
     email_subject = Column(String, nullable=True)
     suggested_approach = Column(Text, nullable=True)
+    generation_key = Column(String, nullable=True)  # cache key of the inputs that produced the email
+    email_tier = Column(String, nullable=True)  # who wrote the email: "template", "llm" or "edited"
+    # "pending" while only Apollo's search stub is stored (lazy enrichment),
+    # then "enriched" or "unmatched"; empty for leads enriched during the run
+    enrichment_status = Column(String, nullable=True)
 
     # Status
     is_selected = Column(Boolean, default=True)
+    is_duplicate = Column(Boolean, default=False)  # already emailed by this user in an earlier session
 
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(
@@ -53,3 +77,10 @@ class Lead(Base):
 
     session = relationship("SearchSession", back_populates="leads")
     search_result = relationship("SearchResult")
+    company = relationship("Company", back_populates="leads", lazy="selectin")
+    contact = relationship("Contact", back_populates="leads")
+
+    company_industry = _company_fallback("_company_industry", "industry")
+    company_size = _company_fallback("_company_size", "size")
+    company_linkedin_url = _company_fallback("_company_linkedin_url", "linkedin_url")
+    scraped_context = _company_fallback("_scraped_context", "scraped_context")
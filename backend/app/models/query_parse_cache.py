@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Integer, DateTime, Text
+from app.core.database import Base
+
+
+class QueryParseCacheEntry(Base):
+    __tablename__ = "query_parse_cache"
+
+    # sha256 over (normalized query, model)
+    key = Column(String, primary_key=True)
+    normalized_query = Column(Text, nullable=False, index=True)
+    model = Column(String, nullable=False)
+    parsed_query = Column(Text, nullable=False)  # JSON text
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime, nullable=False, index=True)
+    last_hit_at = Column(DateTime, nullable=True)
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, Boolean, Float, Integer, DateTime, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -13,12 +13,15 @@ class SearchSession(Base):
     user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     raw_query = Column(Text, nullable=False)
     parsed_query = Column(Text, nullable=True)  # JSON text
+    sender_context = Column(Text, nullable=True)  # for emails generated after the run
     status = Column(
         String,
         default="pending",
         nullable=False,
     )  # pending, searching, enriching, generating, completed, failed
     result_count = Column(Integer, default=0)
+    parse_latency_ms = Column(Float, nullable=True)
+    parse_cache_hit = Column(Boolean, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(
         DateTime,
@@ -29,3 +32,5 @@ class SearchSession(Base):
     user = relationship("User", backref="sessions")
     results = relationship("SearchResult", back_populates="session", cascade="all, delete-orphan")
     leads = relationship("Lead", back_populates="session", cascade="all, delete-orphan")
+    usage_records = relationship("UsageRecord", back_populates="session", cascade="all, delete-orphan")
+    trace_spans = relationship("TraceSpan", back_populates="session", cascade="all, delete-orphan")
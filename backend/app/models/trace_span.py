@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Float, Integer, Text, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+
+class TraceSpan(Base):
+    __tablename__ = "trace_spans"
+
+    id = Column(String, primary_key=True)  # 16-hex span ID
+    session_id = Column(String, ForeignKey("search_sessions.id"), nullable=False, index=True)
+    parent_id = Column(String, nullable=True)
+    name = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # internal, stage, client
+
+    service = Column(String, nullable=True)  # openai, serper, apollo, scraper
+    host = Column(String, nullable=True)
+    status_code = Column(Integer, nullable=True)
+    bytes = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    attributes = Column(Text, nullable=True)  # JSON
+
+    start_ts = Column(Float, nullable=False)  # Unix epoch seconds
+    duration_ms = Column(Float, default=0.0)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+
+    session = relationship("SearchSession", back_populates="trace_spans")
@@ -0,0 +1,32 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, String, Boolean, Float, Integer, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+
+class UsageRecord(Base):
+    __tablename__ = "usage_records"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    session_id = Column(String, ForeignKey("search_sessions.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=True, index=True)
+    lead_id = Column(String, nullable=True, index=True)
+    stage = Column(String, nullable=True)  # query, search, scrape, enrich, generate
+
+    vendor = Column(String, nullable=False)  # openai, serper, apollo, scraper
+    operation = Column(String, nullable=False)  # e.g. chat.completions, people_match
+    model = Column(String, nullable=True)
+
+    call_count = Column(Integer, default=1)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    total_tokens = Column(Integer, default=0)
+    cost_usd = Column(Float, default=0.0)
+    latency_ms = Column(Float, default=0.0)
+    success = Column(Boolean, default=True)
+
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+
+    session = relationship("SearchSession", back_populates="usage_records")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, model_validator
 
 
@@ -27,7 +27,10 @@ class LeadResponse(BaseModel):
     personalized_email: Optional[str] = ""
     email_subject: Optional[str] = ""
     suggested_approach: Optional[str] = ""
+    email_tier: Optional[str] = ""
     is_selected: bool = True
+    is_duplicate: Optional[bool] = False
+    enrichment_status: Optional[str] = ""
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -37,7 +40,7 @@ class LeadResponse(BaseModel):
     def none_to_empty(self):
         """Convert None string fields to empty strings."""
         for field_name, field_info in self.model_fields.items():
-            if field_name in ("updated_at", "created_at", "is_selected"):
+            if field_name in ("updated_at", "created_at", "is_selected", "is_duplicate"):
                 continue
             val = getattr(self, field_name)
             if val is None:
@@ -49,6 +52,10 @@ class LeadUpdate(BaseModel):
     is_selected: Optional[bool] = None
 
 
+class EnrichRequest(BaseModel):
+    lead_ids: List[str]
+
+
 class EmailUpdate(BaseModel):
     personalized_email: Optional[str] = None
     email_subject: Optional[str] = None
@@ -15,6 +15,15 @@ class LogEntry(BaseModel):
     timestamp: str
 
 
+class EmailPreview(BaseModel):
+    lead_id: str
+    lead_name: str
+    subject: str = ""
+    body: str = ""
+    done: bool = False
+    updated_at: str
+
+
 class PipelineStatusResponse(BaseModel):
     session_id: str
     status: str
@@ -23,3 +32,63 @@ class PipelineStatusResponse(BaseModel):
     current_step: str = ""
     progress_pct: float = 0
     logs: list[LogEntry] = []
+    previews: list[EmailPreview] = []
+
+
+class ParseCacheStats(BaseModel):
+    sessions: int
+    cache_hits: int
+    hit_rate: float
+    avg_parse_latency_ms: Optional[float] = None
+    avg_hit_latency_ms: Optional[float] = None
+    avg_miss_latency_ms: Optional[float] = None
+    cached_entries: int
+
+
+class ParseCacheInvalidateResponse(BaseModel):
+    invalidated: int
+
+
+class TraceSpanEntry(BaseModel):
+    span_id: str
+    parent_id: Optional[str] = None
+    name: str
+    kind: str
+    service: Optional[str] = None
+    host: Optional[str] = None
+    status_code: Optional[int] = None
+    bytes: Optional[int] = None
+    error: Optional[str] = None
+    offset_ms: float
+    duration_ms: float
+    depth: int = 0
+
+
+class TraceStage(BaseModel):
+    name: str
+    duration_ms: float
+    pct: float
+
+
+class TraceServiceSummary(BaseModel):
+    service: str
+    calls: int
+    errors: int
+    total_ms: float
+    max_ms: float
+    bytes: int
+
+
+class CriticalPathEntry(BaseModel):
+    span_id: str
+    name: str
+    duration_ms: float
+
+
+class TraceResponse(BaseModel):
+    session_id: str
+    total_ms: float
+    waterfall: list[TraceSpanEntry] = []
+    stages: list[TraceStage] = []
+    services: list[TraceServiceSummary] = []
+    critical_path: list[CriticalPathEntry] = []
@@ -33,6 +33,8 @@ class SessionResponse(BaseModel):
     parsed_query: Optional[str] = None
     status: str
     result_count: int
+    parse_latency_ms: Optional[float] = None
+    parse_cache_hit: Optional[bool] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -31,6 +31,18 @@ class ModelUpdate(BaseModel):
     model: str
 
 
+class DomainFilterUpdate(BaseModel):
+    excluded: List[str] = []
+    allowed: List[str] = []
+
+
+class DomainFilterResponse(BaseModel):
+    enabled: bool
+    default_excluded: List[str]
+    excluded: List[str]  # the user's own additions
+    allowed: List[str]  # defaults the user has opted back in
+
+
 class SettingsResponse(BaseModel):
     serper: ApiKeyStatus
     apollo: ApiKeyStatus
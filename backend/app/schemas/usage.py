@@ -0,0 +1,38 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class UsageTotals(BaseModel):
+    calls: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    cost_usd: float = 0.0
+    latency_ms: float = 0.0  # summed over calls
+    avg_latency_ms: float = 0.0
+
+
+class UsageBreakdown(UsageTotals):
+    key: str
+
+
+class SessionUsageReport(BaseModel):
+    session_id: str
+    totals: UsageTotals
+    by_stage: list[UsageBreakdown] = []
+    by_vendor: list[UsageBreakdown] = []
+    by_model: list[UsageBreakdown] = []
+    by_lead: list[UsageBreakdown] = []
+
+
+class DailyUsageRow(UsageTotals):
+    date: str
+    vendor: str
+    model: Optional[str] = None
+
+
+class UsageReport(BaseModel):
+    days: int
+    totals: UsageTotals
+    daily: list[DailyUsageRow] = []
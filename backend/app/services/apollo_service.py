@@ -1,15 +1,22 @@
+import asyncio
 import logging
-from typing import Optional
+from typing import AsyncIterator, Callable, Optional
 
 import httpx
 
 from app.core.config import settings
+from app.services import metering, tracing, url_canon
 
 logger = logging.getLogger(__name__)
 
 # Updated endpoints per Apollo docs (2025)
 APOLLO_SEARCH_URL = "https://api.apollo.io/api/v1/mixed_people/api_search"
-APOLLO_ENRICH_URL = "https://api.apollo.io/api/v1/people/match"
+APOLLO_BULK_ENRICH_URL = "https://api.apollo.io/api/v1/people/bulk_match"
+APOLLO_BULK_MAX_DETAILS = 10
+APOLLO_MAX_PER_PAGE = 100
+
+# Maps Apollo person IDs to previously enriched results (see contact_index)
+ReuseLookup = Callable[[list[str]], dict[str, dict]]
 
 
 def _headers(api_key: str) -> dict:
@@ -25,21 +32,103 @@ async def search_people(
     title_keywords: Optional[list[str]] = None,
     seniority: Optional[list[str]] = None,
     api_key_override: Optional[str] = None,
+    reuse_lookup: Optional[ReuseLookup] = None,
+    max_people: int = 10,
 ) -> list[dict]:
     """Search for people at a company, then enrich each to get full contact data.
 
     Step 1: POST /api/v1/mixed_people/api_search  → obfuscated results + IDs
-    Step 2: POST /api/v1/people/match (per person)  → full email, phone, name
+    Step 2: POST /api/v1/people/bulk_match (10 per call)  → full email, phone, name
+
+    ``reuse_lookup`` maps Apollo person IDs to previously enriched results;
+    people it returns skip step 2 and come back marked ``_reused``.
+    """
+    return [
+        person
+        async for person in iter_people(
+            domain,
+            title_keywords=title_keywords,
+            seniority=seniority,
+            api_key_override=api_key_override,
+            reuse_lookup=reuse_lookup,
+            max_people=max_people,
+        )
+    ]
+
+
+async def iter_people(
+    domain: str,
+    title_keywords: Optional[list[str]] = None,
+    seniority: Optional[list[str]] = None,
+    api_key_override: Optional[str] = None,
+    reuse_lookup: Optional[ReuseLookup] = None,
+    max_people: int = 10,
+    page_size: Optional[int] = None,
+    match: bool = True,
+) -> AsyncIterator[dict]:
+    """Yield enriched people at a company, fetching search pages on demand.
+
+    A page is only searched (and its people enriched) once the caller has
+    consumed the previous one, so breaking out of the loop stops all further
+    Apollo requests. At most ``max_people`` are yielded. On an API error a
+    single ``{"error": ...}`` dict is yielded and iteration ends.
+
+    With ``match=False`` people are not enriched: search stubs come back
+    marked ``_pending`` (see ``lead_enrichment``), reused people in full.
     """
     api_key = api_key_override or settings.get_api_key("apollo")
     if not api_key:
-        return [{"error": "Apollo API key is not configured. Please add it in Settings."}]
+        yield {"error": "Apollo API key is not configured. Please add it in Settings."}
+        return
+    # Search the company, not the subdomain (blog.acme.com -> acme.com)
+    domain = url_canon.registrable_domain(domain) or domain
+
+    page_size = min(page_size or settings.APOLLO_PAGE_SIZE, max_people, APOLLO_MAX_PER_PAGE)
+    remaining = max_people
+    page = 1
+    try:
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            while remaining > 0:
+                people_raw, total_pages = await _search_page(
+                    client, api_key, domain, title_keywords, seniority, page, page_size
+                )
+                if not people_raw:
+                    if page == 1:
+                        logger.info(f"Apollo search returned 0 people for {domain}")
+                    return
+                logger.info(f"Apollo search page {page} returned {len(people_raw)} people for {domain}")
+
+                people_raw = people_raw[:remaining]
+                for person in await _enrich(client, api_key, people_raw, domain, reuse_lookup, match):
+                    remaining -= 1
+                    yield person
+
+                if len(people_raw) < page_size or page >= total_pages:
+                    return
+                page += 1
 
-    # ── Step 1: Search ────────────────────────────────────────────────
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Apollo search error: {e.response.status_code} - {e.response.text[:300]}")
+        yield {"error": f"Apollo API error: {e.response.status_code} - {e.response.text[:200]}"}
+    except Exception as e:
+        logger.error(f"Unexpected error in Apollo search: {e}")
+        yield {"error": str(e)}
+
+
+async def _search_page(
+    client: httpx.AsyncClient,
+    api_key: str,
+    domain: str,
+    title_keywords: Optional[list[str]],
+    seniority: Optional[list[str]],
+    page: int,
+    per_page: int,
+) -> tuple[list[dict], int]:
+    """One page of search stubs and the total page count Apollo reports."""
     payload: dict = {
         "q_organization_domains_list": [domain],
-        "page": 1,
-        "per_page": 10,
+        "page": page,
+        "per_page": per_page,
     }
 
     if title_keywords:
@@ -47,84 +136,186 @@ async def search_people(
     if seniority:
         payload["person_seniorities"] = seniority
 
+    with metering.track("apollo", "people_search"), \
+            tracing.client_span("apollo", APOLLO_SEARCH_URL, domain=domain, page=page) as span:
+        resp = await client.post(
+            APOLLO_SEARCH_URL,
+            json=payload,
+            headers=_headers(api_key),
+        )
+        tracing.record_response(span, resp)
+        resp.raise_for_status()
+        search_data = resp.json()
+
+    pagination = search_data.get("pagination") or {}
+    total_pages = pagination.get("total_pages") or page
+    return search_data.get("people", []), total_pages
+
+
+async def _enrich(
+    client: httpx.AsyncClient,
+    api_key: str,
+    people_raw: list[dict],
+    domain: str,
+    reuse_lookup: Optional[ReuseLookup],
+    match: bool = True,
+) -> list[dict]:
+    """Full contact data for a page of search stubs, in search order.
+
+    Anyone ``people/bulk_match`` fails to match falls back to the partial
+    search stub; with ``match=False`` nobody is matched.
+    """
+    people_raw = [p for p in people_raw if p.get("id")]
+    reused: dict[str, dict] = {}
+    if reuse_lookup is not None:
+        try:
+            reused = reuse_lookup([p["id"] for p in people_raw])
+        except Exception as e:
+            logger.warning(f"Contact reuse lookup failed for {domain}: {e}")
+        if reused:
+            logger.info(f"Reusing enrichment for {len(reused)}/{len(people_raw)} people at {domain}")
+
+    to_match = [p for p in people_raw if p["id"] not in reused] if match else []
+    matched, _ = await _match_all(client, api_key, to_match, domain)
+
+    results = []
+    for person_stub in people_raw:
+        person_id = person_stub["id"]
+        if person_id in reused:
+            results.append({**reused[person_id], "apollo_id": person_id, "_reused": True})
+        elif person_id in matched:
+            results.append(_person_to_result(matched[person_id], person_id, domain))
+        elif not match:
+            results.append({**_stub_to_result(person_stub, domain), "_pending": True})
+        else:
+            # Fall back to stub data from search
+            results.append(_stub_to_result(person_stub, domain))
+    return results
+
+
+async def _match_all(
+    client: httpx.AsyncClient,
+    api_key: str,
+    people_raw: list[dict],
+    domain: str,
+) -> tuple[dict[str, dict], set[str]]:
+    """``({person_id: person}, unanswered_ids)`` through ``people/bulk_match``.
+
+    People are matched in chunks of ``APOLLO_BULK_MATCH_SIZE``, with at most
+    ``APOLLO_BULK_CONCURRENCY`` chunks in flight. IDs in chunks whose request
+    failed are returned as unanswered, not as unmatched.
+    """
+    size = max(1, min(settings.APOLLO_BULK_MATCH_SIZE, APOLLO_BULK_MAX_DETAILS))
+    chunks = [people_raw[i:i + size] for i in range(0, len(people_raw), size)]
+    semaphore = asyncio.Semaphore(max(settings.APOLLO_BULK_CONCURRENCY, 1))
+
+    async def run_chunk(chunk: list[dict]) -> Optional[dict[str, dict]]:
+        async with semaphore:
+            return await _bulk_match(client, api_key, chunk, domain)
+
+    matched: dict[str, dict] = {}
+    unanswered: set[str] = set()
+    for chunk, found in zip(chunks, await asyncio.gather(*(run_chunk(c) for c in chunks))):
+        if found is None:
+            unanswered.update(p["id"] for p in chunk)
+        else:
+            matched.update(found)
+    return matched, unanswered
+
+
+async def match_people(
+    person_ids: list[str], api_key_override: Optional[str] = None
+) -> tuple[dict[str, dict], set[str]]:
+    """Full contact data for Apollo person IDs from earlier searches.
+
+    Returns ``({person_id: result}, unanswered_ids)``; IDs may span
+    companies. An ID missing from both was answered but not matched. IDs are
+    unanswered when their bulk request failed or no Apollo key is configured,
+    and are worth trying again later.
+    """
+    api_key = api_key_override or settings.get_api_key("apollo")
+    ids = list(dict.fromkeys(i for i in person_ids if i))
+    if not api_key or not ids:
+        return {}, set(ids)
+    async with httpx.AsyncClient(timeout=30.0) as client:
+        matched, unanswered = await _match_all(client, api_key, [{"id": i} for i in ids], "several companies")
+    results = {person_id: _person_to_result(person, person_id, "") for person_id, person in matched.items()}
+    return results, unanswered
+
+
+async def _bulk_match(
+    client: httpx.AsyncClient,
+    api_key: str,
+    chunk: list[dict],
+    domain: str,
+) -> Optional[dict[str, dict]]:
+    """``{person_id: person}`` for the people in ``chunk`` Apollo could match.
+
+    ``None`` if the request failed.
+    """
+    ids = [p["id"] for p in chunk]
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        with metering.track("apollo", "people_bulk_match"), \
+                tracing.client_span("apollo", APOLLO_BULK_ENRICH_URL, people=len(ids)) as span:
             resp = await client.post(
-                APOLLO_SEARCH_URL,
-                json=payload,
+                APOLLO_BULK_ENRICH_URL,
+                json={"details": [{"id": person_id} for person_id in ids]},
                 headers=_headers(api_key),
             )
+            tracing.record_response(span, resp)
             resp.raise_for_status()
-            search_data = resp.json()
-
-        people_raw = search_data.get("people", [])
-        if not people_raw:
-            logger.info(f"Apollo search returned 0 people for {domain}")
-            return []
-
-        logger.info(f"Apollo search returned {len(people_raw)} people for {domain}")
-
-        # ── Step 2: Enrich each person by ID ──────────────────────────
-        results = []
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            for person_stub in people_raw:
-                person_id = person_stub.get("id")
-                if not person_id:
-                    continue
-                try:
-                    enrich_resp = await client.post(
-                        APOLLO_ENRICH_URL,
-                        json={"id": person_id},
-                        headers=_headers(api_key),
-                    )
-                    enrich_resp.raise_for_status()
-                    enriched = enrich_resp.json().get("person") or {}
-
-                    org = enriched.get("organization") or {}
-                    results.append({
-                        "first_name": enriched.get("first_name", ""),
-                        "last_name": enriched.get("last_name", ""),
-                        "email": enriched.get("email", ""),
-                        "email_status": enriched.get("email_status", ""),
-                        "phone": _get_phone(enriched),
-                        "title": enriched.get("title", ""),
-                        "headline": enriched.get("headline", ""),
-                        "linkedin_url": enriched.get("linkedin_url", ""),
-                        "city": enriched.get("city", ""),
-                        "state": enriched.get("state", ""),
-                        "country": enriched.get("country", ""),
-                        "organization_name": org.get("name", ""),
-                        "organization_domain": org.get("primary_domain", domain),
-                        "organization_industry": org.get("industry", ""),
-                        "organization_size": _get_company_size(org),
-                        "organization_linkedin_url": org.get("linkedin_url", ""),
-                    })
-                except httpx.HTTPStatusError as e:
-                    # Log but continue with other people
-                    logger.warning(
-                        f"Apollo enrich failed for {person_id}: "
-                        f"{e.response.status_code} - {e.response.text[:200]}"
-                    )
-                    # Fall back to stub data from search
-                    results.append(_stub_to_result(person_stub, domain))
-                except Exception as e:
-                    logger.warning(f"Apollo enrich error for {person_id}: {e}")
-                    results.append(_stub_to_result(person_stub, domain))
-
-        return results
-
+        matches = resp.json().get("matches") or []
     except httpx.HTTPStatusError as e:
-        logger.error(f"Apollo search error: {e.response.status_code} - {e.response.text[:300]}")
-        return [{"error": f"Apollo API error: {e.response.status_code} - {e.response.text[:200]}"}]
+        logger.warning(
+            f"Apollo bulk enrich failed for {len(ids)} people at {domain}: "
+            f"{e.response.status_code} - {e.response.text[:200]}"
+        )
+        return None
     except Exception as e:
-        logger.error(f"Unexpected error in Apollo search: {e}")
-        return [{"error": str(e)}]
+        logger.warning(f"Apollo bulk enrich error for {len(ids)} people at {domain}: {e}")
+        return None
+
+    found: dict[str, dict] = {}
+    for position, person in enumerate(matches):
+        if not person:
+            continue  # unmatched entries come back as null
+        person_id = person.get("id") or (ids[position] if position < len(ids) else None)
+        if person_id in ids:
+            found[person_id] = person
+    if len(found) < len(ids):
+        logger.info(f"Apollo bulk match found {len(found)}/{len(ids)} people at {domain}")
+    return found
+
+
+def _person_to_result(enriched: dict, person_id: str, domain: str) -> dict:
+    """Convert an enriched Apollo person to a result dict."""
+    org = enriched.get("organization") or {}
+    return {
+        "apollo_id": person_id,
+        "first_name": enriched.get("first_name", ""),
+        "last_name": enriched.get("last_name", ""),
+        "email": enriched.get("email", ""),
+        "email_status": enriched.get("email_status", ""),
+        "phone": _get_phone(enriched),
+        "title": enriched.get("title", ""),
+        "headline": enriched.get("headline", ""),
+        "linkedin_url": enriched.get("linkedin_url", ""),
+        "city": enriched.get("city", ""),
+        "state": enriched.get("state", ""),
+        "country": enriched.get("country", ""),
+        "organization_name": org.get("name", ""),
+        "organization_domain": org.get("primary_domain", domain),
+        "organization_industry": org.get("industry", ""),
+        "organization_size": _get_company_size(org),
+        "organization_linkedin_url": org.get("linkedin_url", ""),
+    }
 
 
 def _stub_to_result(stub: dict, domain: str) -> dict:
     """Convert an obfuscated search stub to a result dict (partial data)."""
     org = stub.get("organization") or {}
     return {
+        "apollo_id": stub.get("id", ""),
         "first_name": stub.get("first_name", ""),
         "last_name": "",  # search only returns last_name_obfuscated
         "email": "",
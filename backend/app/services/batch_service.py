@@ -0,0 +1,325 @@
+"""Offline bulk email generation through the OpenAI Batch API.
+
+Per-lead chat requests are written to a JSONL file, uploaded and submitted
+as one batch job. The job is polled until it reaches a terminal state, then
+the output file is streamed back line by line into ``Lead`` rows.
+
+All endpoints are resolved against ``settings.OPENAI_BASE_URL`` so a local
+stand-in implementing ``/files`` and ``/batches`` can be used for testing.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional
+
+import httpx
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.generation_job import GenerationJob
+from app.models.lead import Lead
+from app.models.search_session import SearchSession
+from app.services import generation_cache, llm_service, metering
+from app.services import pipeline_log as log
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+COMPLETION_WINDOW = "24h"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Commit streamed results in chunks so large batches don't hold one huge transaction
+COMMIT_EVERY = 200
+
+
+def build_request_line(
+    custom_id: str,
+    messages: list[dict],
+    model: str,
+    temperature: float = 0.7,
+) -> dict:
+    """Build one JSONL request line for a chat completion batch."""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+        },
+    }
+
+
+def write_batch_file(lines: list[dict]) -> str:
+    """Write request lines to a temporary JSONL file and return its path."""
+    fd, path = tempfile.mkstemp(prefix="siyada_batch_", suffix=".jsonl")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(json.dumps(line))
+            f.write("\n")
+    return path
+
+
+def _client(api_key: str, transport: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=settings.OPENAI_BASE_URL.rstrip("/"),
+        headers={"Authorization": f"Bearer {api_key}"},
+        timeout=60.0,
+        transport=transport,
+    )
+
+
+async def upload_batch_file(client: httpx.AsyncClient, path: str) -> str:
+    """Upload a JSONL request file and return its file ID."""
+    with open(path, "rb") as f:
+        response = await client.post(
+            "/files",
+            data={"purpose": "batch"},
+            files={"file": (os.path.basename(path), f.read(), "application/jsonl")},
+        )
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def create_batch(client: httpx.AsyncClient, input_file_id: str) -> dict:
+    """Submit a batch job for an uploaded request file."""
+    response = await client.post(
+        "/batches",
+        json={
+            "input_file_id": input_file_id,
+            "endpoint": BATCH_ENDPOINT,
+            "completion_window": COMPLETION_WINDOW,
+        },
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def get_batch(client: httpx.AsyncClient, batch_id: str) -> dict:
+    response = await client.get(f"/batches/{batch_id}")
+    response.raise_for_status()
+    return response.json()
+
+
+async def cancel_batch(client: httpx.AsyncClient, batch_id: str) -> None:
+    """Best-effort cancellation of a batch that we stopped waiting for."""
+    try:
+        response = await client.post(f"/batches/{batch_id}/cancel")
+        response.raise_for_status()
+    except Exception as e:
+        logger.warning(f"Failed to cancel batch {batch_id}: {e}")
+
+
+async def wait_for_batch(
+    client: httpx.AsyncClient,
+    batch_id: str,
+    poll_interval: float,
+    max_wait: float,
+) -> dict:
+    """Poll a batch until it reaches a terminal status.
+
+    Raises TimeoutError if it is still running after ``max_wait`` seconds.
+    """
+    deadline = time.monotonic() + max_wait
+    while True:
+        batch = await get_batch(client, batch_id)
+        if batch.get("status") in TERMINAL_STATUSES:
+            return batch
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Batch {batch_id} did not finish within {max_wait:.0f}s")
+        await asyncio.sleep(poll_interval)
+
+
+async def iter_output(client: httpx.AsyncClient, file_id: str) -> AsyncIterator[dict]:
+    """Stream a batch output file, yielding one parsed result line at a time."""
+    async with client.stream("GET", f"/files/{file_id}/content") as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping malformed batch output line: {line[:120]}")
+
+
+def _parse_result_line(item: dict) -> dict:
+    """Turn one batch output line into an email dict (or an ``error`` dict)."""
+    if item.get("error"):
+        return {"error": str(item["error"])}
+    response = item.get("response") or {}
+    if response.get("status_code") != 200:
+        return {"error": f"OpenAI API error: {response.get('status_code')}"}
+    body = response.get("body") or {}
+    try:
+        email = llm_service.parse_email_completion(body)
+    except (json.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+        return {"error": f"Failed to parse AI response: {str(e)}"}
+    email["usage"] = body.get("usage") or {}
+    return email
+
+
+def _fail_job(db: Session, job: GenerationJob, message: str) -> None:
+    job.status = "failed"
+    job.error = message
+    job.completed_at = datetime.now(timezone.utc)
+    db.commit()
+    log.add_log(job.session_id, "generate", f"Batch generation failed: {message[:120]}", emoji="❌")
+
+
+async def process_generation_job(
+    job_id: str,
+    db: Session,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    poll_interval: Optional[float] = None,
+) -> None:
+    """Run a batch generation job end to end and write results into leads."""
+    job = db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+    if not job:
+        logger.error(f"Generation job {job_id} not found")
+        return
+
+    session = db.query(SearchSession).filter(SearchSession.id == job.session_id).first()
+    leads = (
+        db.query(Lead)
+        .filter(Lead.session_id == job.session_id, Lead.is_selected == True)
+        .all()
+    )
+    if not session or not leads:
+        _fail_job(db, job, "No selected leads found for this session")
+        return
+
+    api_key = settings.get_api_key("openai")
+    if not api_key:
+        _fail_job(db, job, "OpenAI API key is not configured. Please add it in Settings.")
+        return
+
+    model = job.model or settings.get_model()
+    misses, _ = generation_cache.partition_leads(
+        db,
+        leads,
+        model=model,
+        sender_context=job.sender_context or "",
+        original_query=session.raw_query,
+        custom_system_prompt=job.system_prompt,
+        force=bool(job.force),
+    )
+    job.total_requests = len(misses)
+    if not misses:
+        job.status = "completed"
+        job.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        return
+
+    lines = [
+        build_request_line(
+            lead.id,
+            llm_service.build_email_messages(
+                llm_service.lead_prompt_data(lead),
+                job.sender_context or "",
+                session.raw_query,
+                job.system_prompt,
+            ),
+            model,
+        )
+        for lead, _ in misses
+    ]
+    miss_map = {lead.id: (lead, key) for lead, key in misses}
+    db.commit()
+
+    path = write_batch_file(lines)
+    try:
+        async with _client(api_key, transport) as client:
+            job.input_file_id = await upload_batch_file(client, path)
+            batch = await create_batch(client, job.input_file_id)
+            job.batch_id = batch["id"]
+            job.status = "submitted"
+            db.commit()
+            log.add_log(
+                job.session_id, "generate",
+                f"Submitted batch generation job for {len(lines)} leads",
+                emoji="📦",
+            )
+
+            try:
+                batch = await wait_for_batch(
+                    client,
+                    job.batch_id,
+                    poll_interval=(
+                        settings.BATCH_POLL_INTERVAL_SECONDS
+                        if poll_interval is None else poll_interval
+                    ),
+                    max_wait=settings.BATCH_MAX_WAIT_SECONDS,
+                )
+            except TimeoutError as e:
+                await cancel_batch(client, job.batch_id)
+                _fail_job(db, job, str(e))
+                return
+
+            job.output_file_id = batch.get("output_file_id")
+            job.error_file_id = batch.get("error_file_id")
+            if batch.get("status") != "completed" or not job.output_file_id:
+                _fail_job(db, job, f"Batch ended with status '{batch.get('status')}'")
+                return
+
+            job.status = "in_progress"
+            db.commit()
+
+            processed = 0
+            async for item in iter_output(client, job.output_file_id):
+                match = miss_map.get(item.get("custom_id"))
+                if match is None:
+                    continue
+                lead, key = match
+                email_result = _parse_result_line(item)
+                usage = email_result.get("usage") or {}
+                with metering.scope(
+                    session_id=job.session_id, user_id=job.user_id, stage="generate", lead_id=lead.id
+                ):
+                    metering.record(
+                        "openai",
+                        "batch.chat.completions",
+                        latency_ms=0.0,
+                        model=model,
+                        prompt_tokens=usage.get("prompt_tokens", 0) or 0,
+                        completion_tokens=usage.get("completion_tokens", 0) or 0,
+                        success="error" not in email_result,
+                    )
+                if "error" not in email_result:
+                    generation_cache.apply_result(lead, key, email_result)
+                    generation_cache.store(db, key, model, email_result)
+                    job.success_count += 1
+                else:
+                    logger.warning(f"Batch generation error for lead {lead.id}: {email_result['error']}")
+                processed += 1
+                if processed % COMMIT_EVERY == 0:
+                    db.commit()
+
+        job.error_count = job.total_requests - job.success_count
+        job.status = "completed"
+        job.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        log.add_log(
+            job.session_id, "generate",
+            f"Batch generation complete — {job.success_count}/{job.total_requests} emails written",
+            emoji="✅",
+        )
+    except httpx.HTTPStatusError as e:
+        logger.error(f"Batch API error: {e.response.status_code} - {e.response.text[:300]}")
+        _fail_job(db, job, f"OpenAI API error: {e.response.status_code}")
+    except Exception as e:
+        logger.error(f"Batch generation job {job_id} failed: {e}", exc_info=True)
+        _fail_job(db, job, str(e))
+    finally:
+        metering.flush(db, job.session_id)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
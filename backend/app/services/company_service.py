@@ -0,0 +1,104 @@
+"""Shared company records keyed by website domain.
+
+A company's scraped website context and organization data (industry, size,
+LinkedIn) are stored once on ``Company`` and referenced by every lead from
+that company, across sessions. Context scraped within
+``COMPANY_CONTEXT_TTL_SECONDS`` is reused by later pipeline runs instead of
+fetching the site again.
+"""
+
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.company import Company
+from app.services import url_canon
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_domain(value: str) -> str:
+    """Registrable domain (``acme.com`` for ``https://blog.acme.com/x``) of a URL or host."""
+    return url_canon.registrable_domain(value)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes for values stored as UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def is_fresh(company: Company, now: Optional[datetime] = None) -> bool:
+    """Whether the company's scraped context is recent enough to reuse."""
+    scraped_at = _as_utc(company.scraped_at)
+    if scraped_at is None or company.scraped_context is None:
+        return False
+    now = now or datetime.now(timezone.utc)
+    return now - scraped_at < timedelta(seconds=settings.COMPANY_CONTEXT_TTL_SECONDS)
+
+
+def get_or_create_many(db: Session, domains: Iterable[str]) -> dict[str, Company]:
+    """``{domain: Company}`` for the given domains, creating missing rows.
+
+    One indexed ``IN`` query for the existing rows; new rows are flushed so
+    leads can reference their ids straight away.
+    """
+    wanted = {normalize_domain(d) for d in domains}
+    wanted.discard("")
+    if not wanted:
+        return {}
+    for _ in range(2):
+        companies = {
+            c.domain: c for c in db.query(Company).filter(Company.domain.in_(wanted)).all()
+        }
+        for domain in wanted - companies.keys():
+            companies[domain] = Company(domain=domain)
+            db.add(companies[domain])
+        try:
+            db.flush()
+            break
+        except IntegrityError:
+            # Another pipeline inserted one of these domains first; re-read
+            db.rollback()
+    return companies
+
+
+def record_scrape(company: Company, context: str, contacts: Optional[dict] = None) -> None:
+    company.scraped_context = context
+    company.scraped_contacts = json.dumps(contacts) if contacts is not None else None
+    company.scraped_at = datetime.now(timezone.utc)
+    if contacts and contacts.get("company_linkedin_url") and not company.linkedin_url:
+        company.linkedin_url = contacts["company_linkedin_url"]
+
+
+def scraped_contacts(company: Company) -> Optional[dict]:
+    """Contact data harvested from the company's website at the last scrape."""
+    if not company.scraped_contacts:
+        return None
+    try:
+        return json.loads(company.scraped_contacts)
+    except json.JSONDecodeError:
+        return None
+
+
+def record_enrichment(company: Company, person: dict) -> None:
+    """Fill organization fields from an Apollo person's organization data."""
+    updates = {
+        "name": person.get("organization_name"),
+        "industry": person.get("organization_industry"),
+        "size": person.get("organization_size"),
+        "linkedin_url": person.get("organization_linkedin_url"),
+    }
+    changed = False
+    for attr, value in updates.items():
+        if value and getattr(company, attr) != value:
+            setattr(company, attr, value)
+            changed = True
+    if changed or company.enriched_at is None:
+        company.enriched_at = datetime.now(timezone.utc)
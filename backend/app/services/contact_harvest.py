@@ -0,0 +1,164 @@
+"""Lead candidates from a company's own website.
+
+The scraper already extracts email addresses and social links from every
+page it fetches. ``harvest`` turns them into contact data at no cost:
+
+- named addresses (``jane.doe@acme.com``), with the name taken from the
+  address and confirmed against the page text where possible;
+- role addresses (``sales@``, ``info@``), kept as a fallback contact;
+- the company's LinkedIn page and any personal LinkedIn profiles.
+
+Only addresses at the company's own registrable domain are kept. The
+pipeline skips Apollo for a company whose site listed at least
+``HARVEST_MIN_CONTACTS`` named addresses, asks Apollo for fewer people when
+it listed some, and fills in missing emails on Apollo results from matching
+named addresses.
+"""
+
+import re
+from typing import Optional
+
+from app.services import url_canon
+
+ROLE_LOCALPARTS = frozenset({
+    "info", "contact", "contacts", "hello", "hi", "sales", "support", "help", "team", "office",
+    "admin", "enquiries", "enquiry", "inquiries", "inquiry", "hr", "careers", "jobs", "recruiting",
+    "press", "media", "pr", "marketing", "partners", "partnerships", "bd", "business", "billing",
+    "accounts", "finance", "legal", "privacy", "security", "webmaster", "general", "mail", "ask",
+})
+# Role addresses worth writing to, best first; others are only used as a last resort
+ROLE_PREFERENCE = ("sales", "partnerships", "partners", "bd", "business", "hello", "contact", "info")
+IGNORED_LOCALPARTS = frozenset({"noreply", "no-reply", "donotreply", "do-not-reply", "mailer-daemon", "postmaster"})
+
+_SEPARATORS = re.compile(r"[._-]+")
+_NAME_PART = re.compile(r"^[a-z]{2,}$")
+_COMPANY_LINKEDIN = re.compile(r"linkedin\.com/company/([^/?#]+)", re.IGNORECASE)
+_PERSON_LINKEDIN = re.compile(r"linkedin\.com/in/([^/?#]+)", re.IGNORECASE)
+
+
+def _page_text(scraped: dict) -> str:
+    texts = [scraped.get("text_content", "")]
+    texts.extend(page.get("text_content", "") for page in scraped.get("pages", []))
+    return " ".join(t for t in texts if t)
+
+
+def _full_name_after(first: str, text: str) -> Optional[str]:
+    """Surname following ``first`` in the page text ("Jane Doe, CTO" -> "Doe")."""
+    match = re.search(rf"\b{re.escape(first)}\s+([A-Z][a-zA-Z'-]+)", text, re.IGNORECASE)
+    return match.group(1) if match and match.group(1)[0].isupper() else None
+
+
+def _name_from_email(local: str, text: str) -> Optional[tuple[str, str]]:
+    """``(first, last)`` from a named address; ``None`` if it doesn't look like a name."""
+    parts = [p for p in _SEPARATORS.split(local.split("+", 1)[0]) if p]
+    if len(parts) == 2 and all(_NAME_PART.match(p) for p in parts):
+        return parts[0].title(), parts[1].title()
+    if len(parts) == 1 and _NAME_PART.match(parts[0]):
+        # A bare "jane@" only counts when the page names a Jane
+        if re.search(rf"\b{re.escape(parts[0])}\b", text, re.IGNORECASE):
+            return parts[0].title(), _full_name_after(parts[0], text) or ""
+    return None
+
+
+def _linkedin_slug_matches(slug: str, first: str, last: str) -> bool:
+    slug = slug.lower()
+    return first.lower() in slug and (not last or last.lower() in slug)
+
+
+def harvest(scraped: dict, domain: str) -> dict:
+    """Contact data from a scrape or crawl result of ``domain``'s website."""
+    text = _page_text(scraped)
+    named, roles = [], []
+    for email in scraped.get("emails", []):
+        email = email.strip().lower()
+        local, _, host = email.partition("@")
+        if not local or url_canon.registrable_domain(host) != domain or local in IGNORED_LOCALPARTS:
+            continue
+        if local.split("+", 1)[0] in ROLE_LOCALPARTS:
+            roles.append(email)
+            continue
+        name = _name_from_email(local, text)
+        if name:
+            named.append({"email": email, "first_name": name[0], "last_name": name[1], "linkedin_url": ""})
+
+    company_linkedin, profiles = "", []
+    for link in scraped.get("social_links", []):
+        if not company_linkedin and _COMPANY_LINKEDIN.search(link):
+            company_linkedin = link
+        elif _PERSON_LINKEDIN.search(link):
+            profiles.append(link)
+    for person in named:
+        for link in profiles:
+            if _linkedin_slug_matches(_PERSON_LINKEDIN.search(link).group(1), person["first_name"], person["last_name"]):
+                person["linkedin_url"] = link
+                break
+
+    roles.sort(key=lambda e: (
+        ROLE_PREFERENCE.index(e.split("@")[0]) if e.split("@")[0] in ROLE_PREFERENCE else len(ROLE_PREFERENCE), e
+    ))
+    return {"named": named, "role_emails": roles, "company_linkedin_url": company_linkedin}
+
+
+def to_person(contact: dict, domain: str, company_name: str = "", company_linkedin_url: str = "") -> dict:
+    """A harvested named or role address shaped like an ``apollo_service`` result."""
+    return {
+        "apollo_id": "",
+        "first_name": contact.get("first_name", ""),
+        "last_name": contact.get("last_name", ""),
+        "email": contact["email"],
+        "email_status": "scraped",
+        "phone": "",
+        "title": contact.get("title", ""),
+        "headline": "",
+        "linkedin_url": contact.get("linkedin_url", ""),
+        "city": "",
+        "state": "",
+        "country": "",
+        "organization_name": company_name,
+        "organization_domain": domain,
+        "organization_industry": "",
+        "organization_size": "",
+        "organization_linkedin_url": company_linkedin_url,
+        "_source": "website",
+    }
+
+
+def role_contact(email: str) -> dict:
+    return {"email": email, "title": f"{email.split('@')[0].title()} (shared inbox)"}
+
+
+def _same_person(contact: dict, person: dict) -> bool:
+    """Same address, or same first name (and last name when both have one)."""
+    email = (person.get("email") or "").strip().lower()
+    if email and email == contact["email"]:
+        return True
+    first = (person.get("first_name") or "").lower()
+    last = (person.get("last_name") or "").lower()
+    if not first or contact["first_name"].lower() != first:
+        return False
+    return not (last and contact["last_name"]) or contact["last_name"].lower() == last
+
+
+def drop_known(named: list[dict], people: list[dict]) -> list[dict]:
+    """The harvested contacts that aren't one of ``people`` (Apollo results)."""
+    return [c for c in named if not any(_same_person(c, p) for p in people)]
+
+
+def fill_email(person: dict, named: list[dict]) -> bool:
+    """Give an Apollo result without an email the matching harvested address.
+
+    Matches on first name, and last name too when both sides have one. The
+    used contact is removed from ``named``.
+    """
+    if person.get("email"):
+        return False
+    for i, contact in enumerate(named):
+        if not _same_person(contact, person):
+            continue
+        person["email"] = contact["email"]
+        person["email_status"] = "scraped"
+        person["last_name"] = person.get("last_name") or contact["last_name"]
+        person["linkedin_url"] = person.get("linkedin_url") or contact["linkedin_url"]
+        del named[i]
+        return True
+    return False
@@ -0,0 +1,152 @@
+"""Global contact index for cross-session dedup and enrichment reuse.
+
+Every enriched person is recorded once in ``Contact``, keyed by Apollo person
+ID, normalized email and normalized LinkedIn URL (each an indexed column).
+Before ``apollo_service.search_people`` spends a match credit on a person,
+``reusable`` returns the stored enrichment if it is younger than
+``CONTACT_ENRICHMENT_TTL_SECONDS``. Leads point at their contact, and a lead
+is flagged as a duplicate when the same user already has an email written
+for that contact in an earlier session (template drafts don't count).
+
+The index is updated incrementally as leads are created (``upsert``). Every
+lookup is an equality or ``IN`` query on one of the indexed keys.
+"""
+
+import json
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.contact import Contact
+from app.models.lead import Lead
+from app.models.search_session import SearchSession
+from app.services import email_templates
+
+logger = logging.getLogger(__name__)
+
+_LINKEDIN_RE = re.compile(r"linkedin\.com/in/([^/?#]+)", re.IGNORECASE)
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email if "@" in email else None
+
+
+def normalize_linkedin(url: Optional[str]) -> Optional[str]:
+    """``linkedin.com/in/<slug>`` regardless of scheme, subdomain or trailing parts."""
+    match = _LINKEDIN_RE.search(url or "")
+    return f"linkedin.com/in/{match.group(1).lower()}" if match else None
+
+
+def _is_enriched(person: dict) -> bool:
+    # Search stubs (match failed) carry no email and an "unavailable" status;
+    # "scraped" emails came from the company website, not an Apollo match
+    return person.get("email_status") not in ("unavailable", "scraped")
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def reusable(db: Session, apollo_ids: Iterable[str]) -> dict[str, dict]:
+    """``{apollo_id: enrichment}`` for contacts enriched within the TTL."""
+    ids = [i for i in set(apollo_ids) if i]
+    if not ids:
+        return {}
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.CONTACT_ENRICHMENT_TTL_SECONDS)
+    found = {}
+    for contact in db.query(Contact).filter(Contact.apollo_id.in_(ids)).all():
+        enriched_at = _as_utc(contact.enriched_at)
+        if contact.enrichment and enriched_at is not None and enriched_at > cutoff:
+            try:
+                found[contact.apollo_id] = json.loads(contact.enrichment)
+            except json.JSONDecodeError:
+                continue
+    return found
+
+
+def find(
+    db: Session,
+    apollo_id: Optional[str] = None,
+    email: Optional[str] = None,
+    linkedin_url: Optional[str] = None,
+) -> Optional[Contact]:
+    """The contact matching any of the keys, tried in order of reliability."""
+    for column, value in (
+        (Contact.apollo_id, apollo_id),
+        (Contact.email_key, normalize_email(email)),
+        (Contact.linkedin_key, normalize_linkedin(linkedin_url)),
+    ):
+        if value:
+            contact = db.query(Contact).filter(column == value).first()
+            if contact is not None:
+                return contact
+    return None
+
+
+def upsert(db: Session, person: dict) -> Optional[Contact]:
+    """Record an Apollo result in the index and return its contact.
+
+    Returns ``None`` for people with no usable key. Missing keys are filled in
+    on an existing contact, and a full enrichment replaces the stored one.
+    """
+    apollo_id = person.get("apollo_id") or None
+    email_key = normalize_email(person.get("email"))
+    linkedin_key = normalize_linkedin(person.get("linkedin_url"))
+    if not (apollo_id or email_key or linkedin_key):
+        return None
+
+    contact = find(db, apollo_id, person.get("email"), person.get("linkedin_url"))
+    if contact is not None and apollo_id and contact.apollo_id and contact.apollo_id != apollo_id:
+        # Apollo says it's someone else; shared emails/profiles don't merge people
+        contact = None
+    if contact is None:
+        contact = Contact()
+        db.add(contact)
+
+    contact.apollo_id = contact.apollo_id or apollo_id
+    contact.email_key = email_key or contact.email_key
+    contact.linkedin_key = linkedin_key or contact.linkedin_key
+    contact.first_name = person.get("first_name") or contact.first_name
+    contact.last_name = person.get("last_name") or contact.last_name
+    contact.email = person.get("email") or contact.email
+    contact.company_domain = person.get("organization_domain") or contact.company_domain
+    if _is_enriched(person) and not person.get("_reused"):
+        contact.enrichment = json.dumps({k: v for k, v in person.items() if not k.startswith("_")})
+        contact.enriched_at = datetime.now(timezone.utc)
+    # Flush so the next person in this run finds it by any of its keys
+    db.flush()
+    return contact
+
+
+def contacted_by_user(db: Session, user_id: str, contact_ids: Iterable[str], exclude_session_id: str) -> set[str]:
+    """Contacts this user already has a written email for in another session.
+
+    Template drafts are given to every lead automatically, so only emails
+    written by the LLM or the user count.
+    """
+    ids = [i for i in set(contact_ids) if i]
+    if not ids or not user_id:
+        return set()
+    rows = (
+        db.query(Lead.contact_id)
+        .join(SearchSession, SearchSession.id == Lead.session_id)
+        .filter(
+            Lead.contact_id.in_(ids),
+            Lead.session_id != exclude_session_id,
+            Lead.personalized_email.isnot(None),
+            Lead.personalized_email != "",
+            or_(Lead.email_tier.is_(None), Lead.email_tier != email_templates.TIER_TEMPLATE),
+            SearchSession.user_id == user_id,
+        )
+        .distinct()
+        .all()
+    )
+    return {row[0] for row in rows}
@@ -0,0 +1,189 @@
+"""Bounded multi-page crawl of a company website.
+
+Search results often point at a blog post or a product page. ``crawl_site``
+fetches that page, then a prioritized frontier of the pages that describe
+the company — team/leadership, about, contact — chosen from the first page's
+links (plus the homepage). Follow-up pages are fetched in parallel through
+the shared scrape scheduler under a per-site page and time budget, and the
+crawl stops as soon as either budget is used up.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+from app.core.config import settings
+from app.services import scraper_service, tracing, url_canon
+
+logger = logging.getLogger(__name__)
+
+# (page kind, pattern over URL path and anchor text, priority)
+PAGE_PRIORITIES: list[tuple[str, re.Pattern, int]] = [
+    ("team", re.compile(r"\b(team|leadership|management|founders?|people|executives?|board)\b"), 6),
+    ("about", re.compile(r"\b(about|company|who we are|our story|mission)\b"), 5),
+    ("contact", re.compile(r"\b(contact|get in touch|offices?|locations?)\b"), 4),
+]
+HOMEPAGE_PRIORITY = 3
+
+SKIP_RE = re.compile(
+    r"\.(pdf|jpe?g|png|gif|svg|webp|zip|mp4|css|js|xml|json)$"
+    r"|/(login|log-in|signin|sign-in|signup|register|cart|checkout|privacy|terms|cookies?|wp-admin|feed)(/|$)",
+    re.IGNORECASE,
+)
+
+
+def classify(url: str, anchor_text: str = "") -> tuple[Optional[str], int]:
+    """Return ``(kind, priority)`` for a candidate link, or ``(None, 0)``."""
+    path = urlparse(url).path.lower()
+    if SKIP_RE.search(path):
+        return None, 0
+    haystack = f"{re.sub(r'[-_/.]+', ' ', path)} {anchor_text.lower()}"
+    for kind, pattern, priority in PAGE_PRIORITIES:
+        if pattern.search(haystack):
+            return kind, priority
+    return None, 0
+
+
+def plan_frontier(seed_url: str, links: list[dict], max_pages: int) -> list[tuple[str, str]]:
+    """Pick up to ``max_pages - 1`` follow-up pages as ``(url, kind)``.
+
+    One page per kind is taken first (highest priority kind first), then any
+    remaining slots go to the next best candidates.
+    """
+    budget = max_pages - 1
+    if budget <= 0:
+        return []
+
+    seed = urlparse(seed_url)
+    seed_key = seed.path.rstrip("/")
+    scored: dict[str, tuple[int, str]] = {}
+    if seed_key:
+        scored[f"{seed.scheme}://{seed.netloc}/"] = (HOMEPAGE_PRIORITY, "home")
+    for link in links:
+        url = link["url"]
+        if urlparse(url).path.rstrip("/") == seed_key or url in scored:
+            continue
+        kind, priority = classify(url, link.get("text", ""))
+        if kind:
+            scored[url] = (priority, kind)
+
+    # Shorter paths first within a priority: /about beats /about/press/2019
+    ranked = sorted(scored.items(), key=lambda item: (-item[1][0], len(urlparse(item[0]).path)))
+    frontier, kinds = [], set()
+    for url, (_, kind) in ranked:
+        if kind not in kinds:
+            frontier.append((url, kind))
+            kinds.add(kind)
+    for url, (_, kind) in ranked:
+        if (url, kind) not in frontier:
+            frontier.append((url, kind))
+    return frontier[:budget]
+
+
+def merge_pages(seed_url: str, pages: list[dict]) -> dict:
+    """Combine crawled pages into one scrape-shaped result with a ``pages`` list."""
+    ok = [p for p in pages if not p.get("error")]
+    first = ok[0] if ok else (pages[0] if pages else {})
+    emails, social_links = [], []
+    for page in ok:
+        emails.extend(e for e in page.get("emails", []) if e not in emails)
+        social_links.extend(s for s in page.get("social_links", []) if s not in social_links)
+    return {
+        "url": seed_url,
+        "title": first.get("title", ""),
+        "meta_description": first.get("meta_description", ""),
+        "text_content": first.get("text_content", ""),
+        "emails": emails[:20],
+        "social_links": social_links[:20],
+        "pages": [
+            {
+                "url": p.get("url", ""),
+                "kind": p.get("kind", ""),
+                "title": p.get("title", ""),
+                "text_content": p.get("text_content", ""),
+            }
+            for p in ok
+        ],
+        "error": None if ok else first.get("error") or "No pages could be fetched",
+    }
+
+
+async def crawl_site(
+    url: str,
+    max_pages: Optional[int] = None,
+    time_budget: Optional[float] = None,
+) -> dict:
+    """Crawl up to ``max_pages`` high-value pages of the site behind ``url``."""
+    max_pages = max_pages or settings.SCRAPER_CRAWL_MAX_PAGES
+    time_budget = settings.SCRAPER_CRAWL_TIME_BUDGET_SECONDS if time_budget is None else time_budget
+    deadline = time.monotonic() + time_budget
+    host = urlparse(url).hostname or ""
+
+    with tracing.span("crawl", host=host) as span:
+        try:
+            first = await asyncio.wait_for(scraper_service.scrape(url), timeout=time_budget)
+        except asyncio.TimeoutError:
+            first = {"url": url, "error": "Crawl time budget exhausted"}
+        pages = [{**first, "kind": "landing"}]
+
+        frontier = plan_frontier(url, first.get("links", []), max_pages)
+        remaining = deadline - time.monotonic()
+        if frontier and remaining > 0:
+            tasks = {asyncio.create_task(scraper_service.scrape(u)): kind for u, kind in frontier}
+            done, pending = await asyncio.wait(tasks, timeout=remaining)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                logger.info(f"Crawl of {host} hit its {time_budget:.0f}s budget; dropped {len(pending)} pages")
+            for task in done:
+                if not task.cancelled() and task.exception() is None:
+                    pages.append({**task.result(), "kind": tasks[task]})
+
+        result = merge_pages(url, pages)
+        if span is not None:
+            span["attributes"]["pages"] = len(result["pages"])
+        return result
+
+
+def site_key(url: str) -> str:
+    """Registrable domain of ``url``, used to crawl each company once."""
+    return url_canon.registrable_domain(url)
+
+
+async def crawl_many(urls: list[str]) -> list[dict]:
+    """Crawl each distinct site once, seeded with its first URL in ``urls``."""
+    seeds: dict[str, str] = {}
+    for url in urls:
+        host = site_key(url)
+        if host and host not in seeds:
+            seeds[host] = url
+    results = await asyncio.gather(*(crawl_site(u) for u in seeds.values()), return_exceptions=True)
+    return [
+        {"url": url, "error": str(r)} if isinstance(r, Exception) else r
+        for url, r in zip(seeds.values(), results)
+    ]
+
+
+def build_context(scraped: dict, max_chars: Optional[int] = None) -> str:
+    """Flatten a scrape or crawl result into the lead's ``scraped_context``.
+
+    The first page keeps the single-page format (title | meta | text); each
+    further crawled page is appended as a labelled section until
+    ``max_chars`` is reached.
+    """
+    max_chars = max_chars or settings.SCRAPER_CONTEXT_MAX_CHARS
+    parts = [scraped.get("title", ""), scraped.get("meta_description", ""), scraped.get("text_content", "")[:500]]
+    context = " | ".join(p for p in parts if p)
+    for page in scraped.get("pages", [])[1:]:
+        text = page.get("text_content", "")
+        if not text:
+            continue
+        section = f"{page['kind'].title()}: {text[:300]}"
+        if len(context) + len(section) + 3 > max_chars:
+            break
+        context = f"{context} | {section}" if context else section
+    return context
@@ -0,0 +1,296 @@
+"""Process-wide DNS cache for outbound website fetches.
+
+Scraped URLs cluster on a few hosts (a crawl fetches several pages per
+company site), yet every fetch opened a new client and resolved the host
+again. ``transport()`` returns an httpx transport whose connections resolve
+through a shared cache:
+
+- answers are kept for the record TTL when ``aiodns`` is installed, or for
+  ``DNS_CACHE_TTL_SECONDS`` when falling back to the system resolver
+  (``getaddrinfo`` doesn't expose TTLs);
+- failed lookups are cached for ``DNS_NEGATIVE_TTL_SECONDS`` so dead
+  domains fail fast;
+- concurrent lookups of one host share a single query.
+
+TLS still verifies against (and sends SNI for) the original hostname, since
+httpcore passes the hostname to ``start_tls`` separately from the address.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional
+
+import httpcore
+import httpx
+
+from app.core.config import settings
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import aiodns
+except ImportError:  # optional: fall back to getaddrinfo with a fixed TTL
+    aiodns = None
+
+# Clamp record TTLs so a 0s TTL doesn't defeat the cache and a day-long one
+# doesn't pin a stale address
+MIN_TTL_SECONDS = 30.0
+MAX_TTL_SECONDS = 3600.0
+MAX_ENTRIES = 10_000
+
+Lookup = Callable[[str, int], Awaitable[tuple[list[str], float]]]
+
+
+@dataclass
+class _Entry:
+    addresses: list[str]
+    expires: float
+    error: Optional[str] = None
+
+
+class DnsCache:
+    def __init__(
+        self,
+        default_ttl: float,
+        negative_ttl: float,
+        lookup: Optional[Lookup] = None,
+        max_entries: int = MAX_ENTRIES,
+    ):
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._lookup = lookup or self._system_lookup
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._resolver = None
+
+    async def resolve(self, host: str, port: int = 443) -> list[str]:
+        """Addresses for ``host``; raises ``socket.gaierror`` for (cached) failures."""
+        host = host.lower()
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None and entry.expires > time.monotonic():
+                self._entries.move_to_end(host)
+            else:
+                entry = None
+        if entry is not None:
+            metrics.record_cache("dns", hits=1)
+            if entry.error:
+                raise socket.gaierror(socket.EAI_NONAME, entry.error)
+            return entry.addresses
+
+        pending = self._inflight.get(host)
+        if pending is not None and not pending.get_loop().is_closed():
+            metrics.record_cache("dns", hits=1)
+            return await asyncio.shield(pending)
+
+        metrics.record_cache("dns", misses=1)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[host] = future
+        try:
+            try:
+                addresses, ttl = await self._lookup(host, port)
+                if not addresses:
+                    raise socket.gaierror(socket.EAI_NONAME, f"No addresses for {host}")
+            except socket.gaierror as e:
+                self._store(host, _Entry([], time.monotonic() + self.negative_ttl, str(e) or host))
+                raise
+            self._store(host, _Entry(addresses, time.monotonic() + min(max(ttl, MIN_TTL_SECONDS), MAX_TTL_SECONDS)))
+            future.set_result(addresses)
+            return addresses
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Waiters re-raise it; don't warn about an unretrieved exception
+                future.exception()
+            raise
+        finally:
+            if self._inflight.get(host) is future:
+                del self._inflight[host]
+
+    def _store(self, host: str, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[host] = entry
+            self._entries.move_to_end(host)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def _system_lookup(self, host: str, port: int) -> tuple[list[str], float]:
+        if aiodns is not None:
+            try:
+                if self._resolver is None:
+                    self._resolver = aiodns.DNSResolver()
+                records = await self._resolver.query(host, "A")
+                if records:
+                    return [r.host for r in records], min(r.ttl for r in records)
+            except aiodns.error.DNSError as e:
+                raise socket.gaierror(socket.EAI_NONAME, f"{host}: {e}") from e
+            except Exception as e:
+                logger.debug(f"aiodns lookup of {host} failed, using getaddrinfo: {e}")
+
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        return addresses, self.default_ttl
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """httpcore network backend that connects to cached addresses."""
+
+    def __init__(self, cache: DnsCache, backend: Optional[httpcore.AsyncNetworkBackend] = None):
+        self._cache = cache
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        if _is_ip(host) or host == "localhost":
+            addresses = [host]
+        else:
+            try:
+                addresses = await self._cache.resolve(host, port)
+            except socket.gaierror as e:
+                raise httpcore.ConnectError(str(e)) from e
+
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(
+                    address, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        raise last_error
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+# httpcore errors as the httpx errors callers catch; subclasses first
+_HTTPX_ERRORS = {
+    httpcore.ConnectTimeout: httpx.ConnectTimeout,
+    httpcore.ReadTimeout: httpx.ReadTimeout,
+    httpcore.WriteTimeout: httpx.WriteTimeout,
+    httpcore.PoolTimeout: httpx.PoolTimeout,
+    httpcore.TimeoutException: httpx.TimeoutException,
+    httpcore.ConnectError: httpx.ConnectError,
+    httpcore.ReadError: httpx.ReadError,
+    httpcore.WriteError: httpx.WriteError,
+    httpcore.NetworkError: httpx.NetworkError,
+    httpcore.ProxyError: httpx.ProxyError,
+    httpcore.UnsupportedProtocol: httpx.UnsupportedProtocol,
+    httpcore.RemoteProtocolError: httpx.RemoteProtocolError,
+    httpcore.LocalProtocolError: httpx.LocalProtocolError,
+    httpcore.ProtocolError: httpx.ProtocolError,
+}
+
+
+@contextmanager
+def _httpx_errors(request: httpx.Request):
+    try:
+        yield
+    except Exception as e:
+        mapped = next((m for cls, m in _HTTPX_ERRORS.items() if isinstance(e, cls)), None)
+        if mapped is None:
+            raise
+        raise mapped(str(e), request=request) from e
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    def __init__(self, stream, request: httpx.Request):
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self):
+        with _httpx_errors(self._request):
+            async for chunk in self._stream:
+                yield chunk
+
+    async def aclose(self) -> None:
+        if hasattr(self._stream, "aclose"):
+            await self._stream.aclose()
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """httpx transport over an httpcore pool whose connections resolve through ``cache``.
+
+    Built on httpcore's public ``network_backend`` argument rather than on
+    ``httpx.AsyncHTTPTransport``, which doesn't take one.
+    """
+
+    def __init__(self, cache: DnsCache, verify: bool = True):
+        # Pool limits match httpx's defaults
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(verify=verify),
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=5.0,
+            network_backend=CachingNetworkBackend(cache),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors(request):
+            response = await self._pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(response.stream, request),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self._pool.aclose()
+
+
+cache = DnsCache(
+    default_ttl=settings.DNS_CACHE_TTL_SECONDS,
+    negative_ttl=settings.DNS_NEGATIVE_TTL_SECONDS,
+)
+
+
+def transport(verify: bool = True) -> httpx.AsyncBaseTransport:
+    """A transport for one ``httpx.AsyncClient`` that uses the shared cache."""
+    return CachingTransport(cache, verify=verify)
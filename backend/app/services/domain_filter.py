@@ -0,0 +1,95 @@
+"""Filter out directory, aggregator and media domains before enrichment.
+
+Search results for "CTOs at SaaS companies in Dubai" are full of LinkedIn,
+Wikipedia, Crunchbase, review sites and news articles. None of them is a
+prospect company, yet each would cost a site crawl and an Apollo search and
+take a slot in the domain budget. The pipeline drops them right after the
+search.
+
+A domain is excluded if it or any parent domain is on the list: the bundled
+``data/excluded_domains.txt``, plus ``DOMAIN_FILTER_EXTRA``, plus the user's
+own ``DomainRule`` exclusions. A user's ``allow`` rule wins over the
+defaults. Lookup is one set probe per label of the hostname.
+"""
+
+from pathlib import Path
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.domain_rule import DomainRule
+from app.services import url_canon
+
+DEFAULT_LIST = Path(__file__).resolve().parent / "data" / "excluded_domains.txt"
+
+ACTIONS = ("exclude", "allow")
+
+
+def normalize(value: str) -> str:
+    """Lowercase host without ``www.`` from a URL or a bare domain."""
+    return url_canon.hostname(value).removeprefix("www.")
+
+
+def load_domains(lines: Iterable[str]) -> frozenset[str]:
+    domains = set()
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if line:
+            domains.add(normalize(line))
+    domains.discard("")
+    return frozenset(domains)
+
+
+DEFAULT_EXCLUDED = load_domains(DEFAULT_LIST.read_text(encoding="utf-8").splitlines())
+
+
+class DomainFilter:
+    def __init__(self, excluded: Iterable[str], allowed: Iterable[str] = ()):
+        self.excluded = frozenset(excluded)
+        self.allowed = frozenset(allowed)
+
+    def is_excluded(self, value: str) -> bool:
+        """Whether a URL's or domain's host falls under an excluded domain.
+
+        The most specific rule wins, so allowing ``jobs.example.com`` keeps it
+        even when ``example.com`` is excluded, and vice versa.
+        """
+        labels = normalize(value).split(".")
+        for i in range(len(labels)):
+            suffix = ".".join(labels[i:])
+            if suffix in self.allowed:
+                return False
+            if suffix in self.excluded:
+                return True
+        return False
+
+
+def _extra() -> set[str]:
+    return {normalize(d) for d in settings.DOMAIN_FILTER_EXTRA.split(",") if d.strip()}
+
+
+def get_rules(db: Session, user_id: str) -> dict[str, list[str]]:
+    """The user's overrides as ``{"exclude": [...], "allow": [...]}``."""
+    rules = {action: [] for action in ACTIONS}
+    for rule in db.query(DomainRule).filter(DomainRule.user_id == user_id).order_by(DomainRule.domain).all():
+        rules.setdefault(rule.action, []).append(rule.domain)
+    return rules
+
+
+def set_rules(db: Session, user_id: str, excluded: Iterable[str], allowed: Iterable[str]) -> dict[str, list[str]]:
+    """Replace the user's overrides. A domain in both lists is allowed."""
+    allowed = {normalize(d) for d in allowed} - {""}
+    excluded = {normalize(d) for d in excluded} - {""} - allowed
+    db.query(DomainRule).filter(DomainRule.user_id == user_id).delete()
+    for action, domains in (("exclude", excluded), ("allow", allowed)):
+        for domain in sorted(domains):
+            db.add(DomainRule(user_id=user_id, domain=domain, action=action))
+    db.commit()
+    return get_rules(db, user_id)
+
+
+def for_user(db: Session, user_id: Optional[str]) -> DomainFilter:
+    """The defaults plus ``DOMAIN_FILTER_EXTRA`` plus the user's own rules."""
+    rules = get_rules(db, user_id) if user_id else {"exclude": [], "allow": []}
+    return DomainFilter(DEFAULT_EXCLUDED | _extra() | set(rules["exclude"]), rules["allow"])
@@ -0,0 +1,86 @@
+"""Deterministic template drafts for outreach emails.
+
+An LLM email takes seconds per lead; a draft rendered from the lead's own
+fields and its company's scraped website context takes microseconds. With
+``GENERATION_TEMPLATE_DRAFTS`` every lead gets a draft as soon as it exists,
+so it can be reviewed and exported right away, and ``lead_generation``
+replaces drafts with LLM emails in the background. ``Lead.email_tier``
+records which produced the current text.
+
+Drafts only use what is known about the lead; missing fields are left out
+rather than guessed.
+"""
+
+import re
+from typing import Optional
+
+TIER_TEMPLATE = "template"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+MAX_HOOK_CHARS = 160
+# Shorter "sentences" are usually headings or navigation
+MIN_HOOK_WORDS = 5
+
+
+def _first_sentence(text: Optional[str], limit: int = MAX_HOOK_CHARS) -> str:
+    text = " ".join((text or "").split())
+    if not text:
+        return ""
+    sentence = _SENTENCE_END.split(text, 1)[0]
+    if len(sentence) > limit:
+        sentence = sentence[:limit].rsplit(" ", 1)[0] + "…"
+    return sentence
+
+
+def website_hook(scraped_context: Optional[str]) -> str:
+    """A line from the company's website: its description, if it reads as prose.
+
+    Empty when there is no such line; a draft is better without a hook than
+    with a page title or a run of navigation links.
+    """
+    parts = [p.strip() for p in (scraped_context or "").split(" | ") if p.strip()]
+    # build_context joins "title | meta description | text", leaving out a
+    # missing description, so the second part may be raw page text instead
+    if len(parts) < 2:
+        return ""
+    sentence = _SENTENCE_END.split(" ".join(parts[1].split()), 1)[0]
+    if not sentence.endswith((".", "!", "?")) or len(sentence.split()) < MIN_HOOK_WORDS:
+        return ""
+    return _first_sentence(sentence)
+
+
+def render_draft(lead_data: dict, sender_context: str = "") -> dict:
+    """A subject, body and suggested approach from ``llm_service.lead_prompt_data``."""
+    first = (lead_data.get("first_name") or "").strip()
+    title = (lead_data.get("job_title") or "").strip()
+    company = (lead_data.get("company_name") or "").strip()
+    industry = (lead_data.get("company_industry") or "").strip()
+    hook = website_hook(lead_data.get("scraped_context"))
+    pitch = _first_sentence(sender_context, limit=300)
+
+    opener = f"I came across {company}" if company else "I came across your work"
+    if industry:
+        opener += f" while looking at {industry.lower()} companies"
+    if title:
+        opener += f", and your role as {title} stood out"
+    lines = [f"Hi {first}," if first else "Hi,", "", opener + "."]
+    if hook:
+        lines += ["", f"From your website: {hook}"]
+    lines += [
+        "",
+        pitch or "I think there may be a fit between what we do and what you are building.",
+        "",
+        f"Would a short call to see whether this is relevant for {company or 'your team'} make sense?",
+        "",
+        "Best regards",
+    ]
+
+    subject = f"A quick idea for {company}" if company else "A quick idea"
+    approach = "Template draft: open with the company's own description"
+    if title:
+        approach += f" and speak to the {title} role"
+    return {
+        "subject": f"{first}, {subject[0].lower()}{subject[1:]}" if first else subject,
+        "body": "\n".join(lines),
+        "suggested_approach": approach + ".",
+    }
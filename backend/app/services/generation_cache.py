@@ -0,0 +1,129 @@
+"""Content-addressed cache for generated outreach emails.
+
+An email is keyed by a hash of everything that goes into the prompt: model,
+system prompt, sender context, original query and the rendered lead info.
+Re-running generation with unchanged inputs reuses the stored result instead
+of calling the LLM again.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.generation_cache import GenerationCacheEntry
+from app.models.lead import Lead
+from app.services import llm_service, metrics
+
+# Lead.email_tier of emails written by the LLM (or copied from its cache)
+TIER_LLM = "llm"
+
+
+def compute_key(
+    model: str,
+    system_prompt: str,
+    sender_context: str,
+    original_query: str,
+    lead_info: str,
+) -> str:
+    """Hash the generation inputs into a stable cache key."""
+    payload = json.dumps(
+        [model, system_prompt, sender_context or "", original_query or "", lead_info],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def key_for_lead(
+    lead: Lead,
+    model: str,
+    sender_context: str,
+    original_query: str,
+    custom_system_prompt: Optional[str] = None,
+) -> str:
+    return compute_key(
+        model,
+        custom_system_prompt or llm_service.DEFAULT_EMAIL_SYSTEM_PROMPT,
+        sender_context,
+        original_query,
+        llm_service.build_lead_info(llm_service.lead_prompt_data(lead)),
+    )
+
+
+def store(db: Session, key: str, model: str, email_result: dict) -> GenerationCacheEntry:
+    """Insert or replace the cached result for a key (caller commits)."""
+    usage = email_result.get("usage") or {}
+    entry = db.get(GenerationCacheEntry, key)
+    if entry is None:
+        entry = GenerationCacheEntry(key=key, hit_count=0)
+        db.add(entry)
+        # get() only sees flushed rows; a second miss on this key must update, not re-insert
+        db.flush()
+    entry.model = model
+    entry.email_subject = email_result.get("subject", "")
+    entry.personalized_email = email_result.get("body", "")
+    entry.suggested_approach = email_result.get("suggested_approach", "")
+    entry.prompt_tokens = usage.get("prompt_tokens", 0) or 0
+    entry.completion_tokens = usage.get("completion_tokens", 0) or 0
+    entry.total_tokens = usage.get("total_tokens", 0) or 0
+    return entry
+
+
+def apply_result(lead: Lead, key: str, email_result: dict) -> None:
+    """Write a freshly generated email onto a lead and remember its key."""
+    lead.personalized_email = email_result.get("body", "")
+    lead.email_subject = email_result.get("subject", "")
+    lead.suggested_approach = email_result.get("suggested_approach", "")
+    lead.generation_key = key
+    lead.email_tier = TIER_LLM
+
+
+def partition_leads(
+    db: Session,
+    leads: list[Lead],
+    model: str,
+    sender_context: str,
+    original_query: str,
+    custom_system_prompt: Optional[str] = None,
+    force: bool = False,
+) -> tuple[list[tuple[Lead, str]], dict]:
+    """Split leads into cache hits (applied in place) and misses to generate.
+
+    A lead whose current email was produced from the same key is left
+    untouched, so manual edits survive a repeat run. A lead with a matching
+    cache entry gets the cached email copied over. Everything else is
+    returned as a ``(lead, key)`` miss. ``force`` treats every lead as a miss.
+
+    Returns ``(misses, stats)`` where stats has hits, misses and tokens_saved.
+    """
+    misses: list[tuple[Lead, str]] = []
+    stats = {"hits": 0, "misses": 0, "tokens_saved": 0}
+    now = datetime.now(timezone.utc)
+
+    for lead in leads:
+        key = key_for_lead(lead, model, sender_context, original_query, custom_system_prompt)
+        entry = None if force else db.get(GenerationCacheEntry, key)
+
+        if not force and lead.generation_key == key and lead.personalized_email:
+            stats["hits"] += 1
+        elif entry is not None:
+            lead.personalized_email = entry.personalized_email
+            lead.email_subject = entry.email_subject
+            lead.suggested_approach = entry.suggested_approach
+            lead.generation_key = key
+            lead.email_tier = TIER_LLM
+            stats["hits"] += 1
+        else:
+            misses.append((lead, key))
+            stats["misses"] += 1
+            continue
+
+        if entry is not None:
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_hit_at = now
+            stats["tokens_saved"] += entry.total_tokens or 0
+
+    metrics.record_cache("generation", hits=stats["hits"], misses=stats["misses"])
+    return misses, stats
@@ -0,0 +1,164 @@
+"""Lazy Apollo enrichment of leads.
+
+Matching a person through ``people/bulk_match`` costs an Apollo credit, and
+users deselect many leads before they export. With
+``APOLLO_LAZY_ENRICHMENT`` the pipeline stores Apollo's search stubs (first
+name, title, company) and marks those leads ``pending``; a run then finishes
+at search speed. Full contact data is fetched only for leads that are used:
+
+- selecting a lead queues it; selections made within
+  ``APOLLO_LAZY_BATCH_WINDOW_MS`` are matched together in the background;
+- opening leads (``POST /api/leads/{session_id}/enrich``) and exporting a
+  session enrich the leads involved before responding;
+- right after a run completes, its first ``APOLLO_PREFETCH_LEADS`` selected
+  leads are matched, since they are the ones most likely to be exported.
+
+People are matched in the usual bulk_match chunks, across companies.
+Recent enrichment in the contact index is reused instead of matched again,
+and a lead being matched by one request is waited for, not matched twice.
+"""
+
+import asyncio
+import logging
+from typing import Iterable
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.lead import Lead
+from app.services import apollo_service, company_service, contact_index
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+ENRICHED = "enriched"
+UNMATCHED = "unmatched"
+
+# Lead columns filled from an apollo_service result
+LEAD_FIELDS = {
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "email": "email",
+    "email_status": "email_status",
+    "phone": "phone",
+    "job_title": "title",
+    "headline": "headline",
+    "linkedin_url": "linkedin_url",
+    "city": "city",
+    "state": "state",
+    "country": "country",
+}
+
+# Lead ID -> completion of the enrichment currently matching it
+_inflight: dict[str, asyncio.Future] = {}
+# Lead IDs selected but not yet matched, per database
+_queued: dict[Engine, dict[str, None]] = {}
+
+
+def _apply(db: Session, lead: Lead, person: dict) -> None:
+    for column, key in LEAD_FIELDS.items():
+        if person.get(key):
+            setattr(lead, column, person[key])
+    contact = contact_index.upsert(db, person)
+    if contact is not None:
+        lead.contact_id = contact.id
+    if lead.company is not None:
+        company_service.record_enrichment(lead.company, person)
+    else:
+        lead.company_industry = person.get("organization_industry") or lead.company_industry
+        lead.company_size = person.get("organization_size") or lead.company_size
+        lead.company_linkedin_url = person.get("organization_linkedin_url") or lead.company_linkedin_url
+    lead.enrichment_status = ENRICHED
+
+
+async def enrich_leads(db: Session, leads: Iterable[Lead]) -> int:
+    """Match the pending leads among ``leads`` now; returns how many were enriched."""
+    leads = list(leads)
+    waiting = {_inflight[lead.id] for lead in leads if lead.id in _inflight}
+    if waiting:
+        await asyncio.gather(*waiting, return_exceptions=True)
+        for lead in leads:
+            db.refresh(lead)
+
+    pending = [lead for lead in leads if lead.enrichment_status == PENDING and lead.id not in _inflight]
+    if not pending:
+        return 0
+    done = asyncio.get_running_loop().create_future()
+    for lead in pending:
+        _inflight[lead.id] = done
+    try:
+        ids = {lead.id: lead.contact.apollo_id for lead in pending if lead.contact is not None}
+        reused = contact_index.reusable(db, [i for i in ids.values() if i])
+        matched, unanswered = await apollo_service.match_people(
+            [i for i in ids.values() if i and i not in reused]
+        )
+
+        enriched = retry = 0
+        for lead in pending:
+            apollo_id = ids.get(lead.id)
+            if apollo_id in reused:
+                _apply(db, lead, {**reused[apollo_id], "_reused": True})
+            elif apollo_id in matched:
+                _apply(db, lead, matched[apollo_id])
+            elif apollo_id in unanswered:
+                # Apollo failed or isn't configured; stays pending for the next attempt
+                retry += 1
+                continue
+            else:
+                lead.enrichment_status = UNMATCHED
+                continue
+            enriched += 1
+        db.commit()
+        logger.info(
+            f"Lazily enriched {enriched}/{len(pending)} leads ({len(reused)} reused, {retry} left pending)"
+        )
+        return enriched
+    finally:
+        for lead in pending:
+            _inflight.pop(lead.id, None)
+        done.set_result(None)
+
+
+async def enrich_ids(db: Session, lead_ids: Iterable[str]) -> int:
+    """``enrich_leads`` for leads given by ID."""
+    ids = list(lead_ids)
+    if not ids:
+        return 0
+    return await enrich_leads(db, db.query(Lead).filter(Lead.id.in_(ids)).all())
+
+
+async def enrich_selected(bind: Engine, lead_ids: Iterable[str]) -> None:
+    """Background task: queue selected leads and match the batch after the window.
+
+    Every selection within ``APOLLO_LAZY_BATCH_WINDOW_MS`` lands in the same
+    batch; whichever task wakes first matches it and the others find the
+    queue empty.
+    """
+    queue = _queued.setdefault(bind, {})
+    queue.update(dict.fromkeys(lead_ids))
+    await asyncio.sleep(settings.APOLLO_LAZY_BATCH_WINDOW_MS / 1000)
+    batch = list(_queued.pop(bind, {}))
+    if not batch:
+        return
+    db = Session(bind=bind)
+    try:
+        await enrich_ids(db, batch)
+    except Exception as e:
+        logger.error(f"Lazy enrichment of {len(batch)} leads failed: {e}")
+    finally:
+        db.close()
+
+
+def prefetch_candidates(db: Session, session_id: str, limit: int) -> list[Lead]:
+    """The run's pending leads most likely to be exported: selected ones, in listing order."""
+    if limit <= 0:
+        return []
+    return (
+        db.query(Lead)
+        .filter(Lead.session_id == session_id, Lead.enrichment_status == PENDING, Lead.is_selected == True)
+        # lead_generation.page_query's order, so prefetching covers the first page
+        .order_by(Lead.created_at.desc(), Lead.id)
+        .limit(limit)
+        .all()
+    )
@@ -0,0 +1,179 @@
+"""On-demand email generation for leads.
+
+Generating every selected lead's email before a run completes makes users
+wait for emails they may never read. With ``GENERATION_ON_DEMAND`` the
+pipeline completes once leads are enriched, and emails are written:
+
+- when leads are opened (``POST /api/leads/{session_id}/open``) or the
+  session is exported, before responding;
+- ahead of the user: each page of ``GET /api/leads`` queues the next
+  ``GENERATION_PREFETCH_AHEAD`` selected leads, in the same order, for
+  background generation, and a completed run starts with its first ones.
+
+Leads still waiting for lazy Apollo enrichment are enriched first, and
+those Apollo could not answer for are left for later rather than written to
+from their search stubs. Generation goes through the generation cache, with the sender context
+stored on the session and at most ``GENERATION_CONCURRENCY`` LLM calls in
+flight. A lead being generated by one request is waited for, not generated
+twice.
+
+With ``GENERATION_TEMPLATE_DRAFTS`` leads get an ``email_templates`` draft
+first; a draft counts as still needing its LLM email, which replaces it
+unless the user has edited it meanwhile.
+"""
+
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+from app.core.config import settings
+from app.models.lead import Lead
+from app.models.search_session import SearchSession
+from app.services import email_templates, generation_cache, lead_enrichment, llm_service, metering
+
+logger = logging.getLogger(__name__)
+
+# Lead.email_tier once the user has changed the text; never overwritten
+TIER_EDITED = "edited"
+
+# Lead ID -> completion of the generation currently writing its email
+_inflight: dict[str, asyncio.Future] = {}
+
+
+def needs_llm(lead: Lead) -> bool:
+    """No email yet, or only a template draft."""
+    return not lead.personalized_email or lead.email_tier == email_templates.TIER_TEMPLATE
+
+
+def draft_leads(leads: Iterable[Lead], sender_context: str) -> int:
+    """Give leads without an email a template draft (caller commits). Returns how many."""
+    drafted = 0
+    for lead in leads:
+        if lead.personalized_email:
+            continue
+        draft = email_templates.render_draft(llm_service.lead_prompt_data(lead), sender_context)
+        lead.personalized_email = draft["body"]
+        lead.email_subject = draft["subject"]
+        lead.suggested_approach = draft["suggested_approach"]
+        lead.generation_key = None
+        lead.email_tier = email_templates.TIER_TEMPLATE
+        drafted += 1
+    return drafted
+
+
+def page_query(db: Session, session_id: str) -> Query:
+    """A session's leads in listing order (newest first, ties by ID)."""
+    return db.query(Lead).filter(Lead.session_id == session_id).order_by(Lead.created_at.desc(), Lead.id)
+
+
+def ahead(db: Session, session_id: str, position: int, count: Optional[int] = None) -> list[Lead]:
+    """Selected leads needing an LLM email among the ``count`` listed from ``position`` on."""
+    count = settings.GENERATION_PREFETCH_AHEAD if count is None else count
+    if count <= 0:
+        return []
+    leads = page_query(db, session_id).offset(position).limit(count).all()
+    return [lead for lead in leads if lead.is_selected and needs_llm(lead)]
+
+
+async def generate_leads(db: Session, session: SearchSession, leads: Iterable[Lead]) -> int:
+    """Write LLM emails for the leads needing one; returns how many were written.
+
+    Pending leads are enriched first; any still pending are skipped.
+    """
+    leads = list(leads)
+    waiting = {_inflight[lead.id] for lead in leads if lead.id in _inflight}
+    if waiting:
+        await asyncio.gather(*waiting, return_exceptions=True)
+        for lead in leads:
+            db.refresh(lead)
+
+    wanted = [lead for lead in leads if needs_llm(lead)]
+    await lead_enrichment.enrich_leads(db, wanted)
+    todo = [
+        lead for lead in wanted
+        if lead.enrichment_status != lead_enrichment.PENDING and lead.id not in _inflight
+    ]
+    if not todo:
+        return 0
+    done = asyncio.get_running_loop().create_future()
+    for lead in todo:
+        _inflight[lead.id] = done
+    try:
+        model = settings.get_model()
+        sender_context = session.sender_context or ""
+        misses, stats = generation_cache.partition_leads(
+            db, todo, model=model, sender_context=sender_context, original_query=session.raw_query
+        )
+        db.commit()
+
+        semaphore = asyncio.Semaphore(max(settings.GENERATION_CONCURRENCY, 1))
+
+        async def one(lead: Lead) -> dict:
+            async with semaphore:
+                with metering.scope(
+                    session_id=session.id, user_id=session.user_id, stage="generate", lead_id=lead.id
+                ):
+                    return await llm_service.generate_email(
+                        lead_data=llm_service.lead_prompt_data(lead),
+                        sender_context=sender_context,
+                        original_query=session.raw_query,
+                    )
+
+        results = await asyncio.gather(*(one(lead) for lead, _ in misses), return_exceptions=True)
+        generated = stats["hits"]
+        # Drafts edited while their LLM emails were being written are kept
+        edited = {
+            lead_id for (lead_id,) in db.query(Lead.id).filter(
+                Lead.id.in_([lead.id for lead, _ in misses]), Lead.email_tier == TIER_EDITED
+            )
+        }
+        for (lead, key), result in zip(misses, results):
+            if lead.id in edited:
+                continue
+            if isinstance(result, Exception):
+                logger.error(f"Email generation exception for lead {lead.id}: {result}")
+            elif "error" in result:
+                logger.warning(f"Email generation error for lead {lead.id}: {result['error']}")
+            else:
+                generation_cache.apply_result(lead, key, result)
+                generation_cache.store(db, key, model, result)
+                generated += 1
+        db.commit()
+        metering.flush(db, session.id)
+        return generated
+    finally:
+        for lead in todo:
+            _inflight.pop(lead.id, None)
+        done.set_result(None)
+
+
+async def generate_ids(bind: Engine, session_id: str, lead_ids: list[str]) -> None:
+    """Background task: write LLM emails for the given leads."""
+    db = Session(bind=bind)
+    try:
+        session = db.get(SearchSession, session_id)
+        leads = db.query(Lead).filter(Lead.session_id == session_id, Lead.id.in_(lead_ids)).all()
+        if session is not None and leads:
+            await generate_leads(db, session, leads)
+    except Exception as e:
+        logger.error(f"[{session_id}] Email generation for {len(lead_ids)} leads failed: {e}")
+    finally:
+        db.close()
+
+
+async def generate_ahead(bind: Engine, session_id: str, position: int, count: Optional[int] = None) -> None:
+    """Background task: generate the ``count`` leads listed from ``position`` on."""
+    db = Session(bind=bind)
+    try:
+        session = db.get(SearchSession, session_id)
+        leads = ahead(db, session_id, position, count)
+        if session is not None and leads:
+            generated = await generate_leads(db, session, leads)
+            logger.info(f"[{session_id}] Prefetched {generated} emails from position {position}")
+    except Exception as e:
+        logger.error(f"[{session_id}] Email prefetch from position {position} failed: {e}")
+    finally:
+        db.close()
@@ -1,14 +1,15 @@
 import json
 import logging
-from typing import Optional
+import re
+from typing import Callable, Optional
 
 import httpx
 
 from app.core.config import settings
+from app.services import metering, tracing
 
 logger = logging.getLogger(__name__)
 
-OPENAI_CHAT_URL = "https://api.openai.com/v1/chat/completions"
 
 # ── Default prompts (exposed so the UI can show / override them) ──────────
 
@@ -35,6 +36,22 @@ LEAD_INFO_TEMPLATE = """Lead Information:
 - Company Website Context: {scraped_context}"""
 
 
+def _chat_url() -> str:
+    """Chat completions endpoint under the configured OpenAI base URL."""
+    return f"{settings.OPENAI_BASE_URL.rstrip('/')}/chat/completions"
+
+
+def _strip_code_fences(content: str) -> str:
+    """Remove a surrounding markdown code fence from a model response."""
+    content = content.strip()
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1] if "\n" in content else content[3:]
+        if content.endswith("```"):
+            content = content[:-3]
+        content = content.strip()
+    return content
+
+
 async def _call_openai(
     messages: list[dict],
     api_key: str,
@@ -52,10 +69,90 @@ async def _call_openai(
         "messages": messages,
         "temperature": temperature,
     }
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(OPENAI_CHAT_URL, json=payload, headers=headers)
-        response.raise_for_status()
-        return response.json()
+    url = _chat_url()
+    with metering.track("openai", "chat.completions", model=model) as call, \
+            tracing.client_span("openai", url, model=model) as span:
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            response = await client.post(url, json=payload, headers=headers)
+            tracing.record_response(span, response)
+            response.raise_for_status()
+            result = response.json()
+        metering.record_usage(call, result.get("usage"))
+        return result
+
+
+def _parse_sse_line(line: str) -> Optional[dict]:
+    """Decode one ``data:`` line of a chat completion event stream.
+
+    Returns None for comments, keep-alives, the ``[DONE]`` sentinel and
+    undecodable payloads.
+    """
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    try:
+        return json.loads(data)
+    except json.JSONDecodeError:
+        return None
+
+
+async def _call_openai_stream(
+    messages: list[dict],
+    api_key: str,
+    model: Optional[str] = None,
+    temperature: float = 0.7,
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """Stream a chat completion over SSE.
+
+    ``on_delta`` is called with the accumulated content after every token
+    chunk. The return value has the same shape as a non-streamed completion.
+    """
+    model = model or settings.get_model()
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream",
+    }
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    content = ""
+    usage: dict = {}
+    url = _chat_url()
+    with metering.track("openai", "chat.completions.stream", model=model) as call, \
+            tracing.client_span("openai", url, model=model, stream=True) as span:
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            async with client.stream("POST", url, json=payload, headers=headers) as response:
+                if response.is_error:
+                    await response.aread()
+                    tracing.record_response(span, response)
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    chunk = _parse_sse_line(line)
+                    if chunk is None:
+                        continue
+                    if chunk.get("usage"):
+                        usage = chunk["usage"]
+                    for choice in chunk.get("choices") or []:
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            content += delta
+                            if on_delta:
+                                on_delta(content)
+                tracing.record_response(span, response)
+        metering.record_usage(call, usage)
+    return {
+        "model": model,
+        "choices": [{"message": {"role": "assistant", "content": content}}],
+        "usage": usage,
+    }
 
 
 async def parse_query(raw_query: str) -> dict:
@@ -97,14 +194,7 @@ Always respond with valid JSON only, no markdown formatting."""
     try:
         result = await _call_openai(messages, api_key, temperature=0.3)
         content = result["choices"][0]["message"]["content"]
-        # Strip markdown code fences if present
-        content = content.strip()
-        if content.startswith("```"):
-            content = content.split("\n", 1)[1] if "\n" in content else content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-        parsed = json.loads(content)
+        parsed = json.loads(_strip_code_fences(content))
         # Ensure all expected keys exist
         defaults = {
             "search_queries": [],
@@ -157,6 +247,22 @@ Always respond with valid JSON only, no markdown formatting."""
         }
 
 
+def lead_prompt_data(lead) -> dict:
+    """Extract the fields used in generation prompts from a Lead row."""
+    return {
+        "first_name": lead.first_name,
+        "last_name": lead.last_name,
+        "job_title": lead.job_title,
+        "company_name": lead.company_name,
+        "company_industry": lead.company_industry,
+        "city": lead.city,
+        "state": lead.state,
+        "country": lead.country,
+        "linkedin_url": lead.linkedin_url,
+        "scraped_context": lead.scraped_context,
+    }
+
+
 def build_lead_info(lead_data: dict) -> str:
     """Build the lead context string from lead data dict."""
     return LEAD_INFO_TEMPLATE.format(
@@ -173,22 +279,13 @@ def build_lead_info(lead_data: dict) -> str:
     )
 
 
-async def generate_email(
+def build_email_messages(
     lead_data: dict,
     sender_context: str,
     original_query: str,
     custom_system_prompt: Optional[str] = None,
-) -> dict:
-    """Generate a personalized outreach email for a lead."""
-    api_key = settings.get_api_key("openai")
-    if not api_key:
-        return {
-            "error": "OpenAI API key is not configured. Please add it in Settings.",
-            "subject": "",
-            "body": "",
-            "suggested_approach": "",
-        }
-
+) -> list[dict]:
+    """Build the chat messages used to generate an outreach email for a lead."""
     lead_info = build_lead_info(lead_data)
     system_prompt = custom_system_prompt or DEFAULT_EMAIL_SYSTEM_PROMPT
 
@@ -200,26 +297,106 @@ Sender context: {sender_context or 'Not provided'}
 
 Write a personalized outreach email for this lead."""
 
-    messages = [
+    return [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_prompt},
     ]
 
-    try:
-        result = await _call_openai(messages, api_key, temperature=0.7)
-        content = result["choices"][0]["message"]["content"]
-        content = content.strip()
-        if content.startswith("```"):
-            content = content.split("\n", 1)[1] if "\n" in content else content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-        parsed = json.loads(content)
+
+_PARTIAL_FIELD_PATTERNS = {
+    field: re.compile(r'"%s"\s*:\s*"((?:[^"\\]|\\.)*)(")?' % field, re.S)
+    for field in ("subject", "body")
+}
+_INCOMPLETE_ESCAPE_RE = re.compile(r"\\(u[0-9a-fA-F]{0,3})?$")
+
+# Minimum growth (in characters) of a streamed response between partial updates
+PARTIAL_EMIT_CHARS = 24
+
+
+def extract_partial_email(text: str) -> dict:
+    """Best-effort extraction of subject/body from an incomplete JSON response.
+
+    Returns the text decoded so far for each field that has started, plus
+    ``subject_complete``/``body_complete`` flags once its closing quote arrived.
+    """
+    partial: dict = {}
+    for field, pattern in _PARTIAL_FIELD_PATTERNS.items():
+        match = pattern.search(text)
+        if not match:
+            continue
+        raw = match.group(1)
+        complete = match.group(2) is not None
+        if not complete:
+            raw = _INCOMPLETE_ESCAPE_RE.sub("", raw)
+        try:
+            value = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            value = raw
+        partial[field] = value
+        partial[f"{field}_complete"] = complete
+    return partial
+
+
+def parse_email_completion(result: dict) -> dict:
+    """Extract subject/body/approach from a chat completion response body.
+
+    Raises json.JSONDecodeError, KeyError or IndexError on malformed output.
+    """
+    content = result["choices"][0]["message"]["content"]
+    parsed = json.loads(_strip_code_fences(content))
+    return {
+        "subject": parsed.get("subject", ""),
+        "body": parsed.get("body", ""),
+        "suggested_approach": parsed.get("suggested_approach", ""),
+    }
+
+
+async def generate_email(
+    lead_data: dict,
+    sender_context: str,
+    original_query: str,
+    custom_system_prompt: Optional[str] = None,
+    stream: bool = False,
+    on_partial: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """Generate a personalized outreach email for a lead.
+
+    With ``stream=True`` the completion is streamed and ``on_partial`` receives
+    the subject/body decoded so far as tokens arrive. The final text is still
+    parsed and validated as JSON before it is returned.
+    """
+    api_key = settings.get_api_key("openai")
+    if not api_key:
         return {
-            "subject": parsed.get("subject", ""),
-            "body": parsed.get("body", ""),
-            "suggested_approach": parsed.get("suggested_approach", ""),
+            "error": "OpenAI API key is not configured. Please add it in Settings.",
+            "subject": "",
+            "body": "",
+            "suggested_approach": "",
         }
+
+    messages = build_email_messages(
+        lead_data, sender_context, original_query, custom_system_prompt
+    )
+
+    try:
+        if stream:
+            emitted_len = 0
+
+            def _on_delta(text: str) -> None:
+                nonlocal emitted_len
+                if on_partial is None or len(text) - emitted_len < PARTIAL_EMIT_CHARS:
+                    return
+                emitted_len = len(text)
+                on_partial(extract_partial_email(text))
+
+            result = await _call_openai_stream(
+                messages, api_key, temperature=0.7, on_delta=_on_delta
+            )
+        else:
+            result = await _call_openai(messages, api_key, temperature=0.7)
+        email = parse_email_completion(result)
+        email["usage"] = result.get("usage") or {}
+        return email
     except httpx.HTTPStatusError as e:
         logger.error(f"OpenAI API error during email generation: {e.response.status_code}")
         return {
@@ -0,0 +1,188 @@
+"""Usage and cost metering for outbound vendor calls.
+
+Service functions report each call (tokens, model, latency) through
+``track``/``record``. Attribution comes from a context variable set by the
+caller with ``scope``: the pipeline opens a scope for its session and moves
+it through stages, and per-lead work opens a nested scope with the lead ID.
+Calls made outside any session scope are not recorded.
+
+Records are buffered in memory and written to ``usage_records`` by ``flush``.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models.usage_record import UsageRecord
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+# Approximate list prices in USD per 1M (input, output) tokens
+MODEL_PRICING: dict[str, tuple[float, float]] = {
+    "gpt-5.2": (2.00, 8.00),
+    "gpt-5.2-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "o3": (10.00, 40.00),
+    "o3-mini": (1.10, 4.40),
+    "o4-mini": (1.10, 4.40),
+}
+
+# The Batch API bills at half the interactive rate
+BATCH_DISCOUNT = 0.5
+
+_context: ContextVar[Optional[dict]] = ContextVar("metering_context", default=None)
+
+_lock = threading.Lock()
+_pending: dict[str, list[dict]] = {}  # session_id -> buffered records
+
+
+def estimate_cost(
+    model: Optional[str],
+    prompt_tokens: int,
+    completion_tokens: int,
+    batch: bool = False,
+) -> float:
+    """Estimate the USD cost of a completion from its token counts."""
+    if not model:
+        return 0.0
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        # Dated snapshots like "gpt-4o-mini-2024-07-18" price as their base model
+        base = max((m for m in MODEL_PRICING if model.startswith(m)), key=len, default=None)
+        pricing = MODEL_PRICING.get(base) if base else None
+    if pricing is None:
+        return 0.0
+    cost = (prompt_tokens * pricing[0] + completion_tokens * pricing[1]) / 1_000_000
+    return cost * BATCH_DISCOUNT if batch else cost
+
+
+@contextmanager
+def scope(
+    session_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    stage: Optional[str] = None,
+    lead_id: Optional[str] = None,
+) -> Iterator[None]:
+    """Attribute calls made inside the block to a session/stage/lead.
+
+    Nested scopes inherit (and may override) the enclosing attribution.
+    """
+    current = _context.get() or {}
+    updates = {
+        "session_id": session_id,
+        "user_id": user_id,
+        "stage": stage,
+        "lead_id": lead_id,
+    }
+    token = _context.set({**current, **{k: v for k, v in updates.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def set_stage(stage: str) -> None:
+    """Move the enclosing scope to a new pipeline stage."""
+    current = _context.get()
+    if current is not None:
+        _context.set({**current, "stage": stage})
+
+
+def record(
+    vendor: str,
+    operation: str,
+    latency_ms: float,
+    model: Optional[str] = None,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    success: bool = True,
+    call_count: int = 1,
+) -> None:
+    """Buffer one metered call against the current scope."""
+    ctx = _context.get()
+    if not ctx or not ctx.get("session_id"):
+        return
+    entry = {
+        "session_id": ctx["session_id"],
+        "user_id": ctx.get("user_id"),
+        "stage": ctx.get("stage"),
+        "lead_id": ctx.get("lead_id"),
+        "vendor": vendor,
+        "operation": operation,
+        "model": model,
+        "call_count": call_count,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "cost_usd": estimate_cost(
+            model, prompt_tokens, completion_tokens, batch=operation.startswith("batch")
+        ),
+        "latency_ms": round(latency_ms, 1),
+        "success": success,
+        "created_at": datetime.now(timezone.utc),
+    }
+    with _lock:
+        _pending.setdefault(ctx["session_id"], []).append(entry)
+
+
+@contextmanager
+def track(vendor: str, operation: str, model: Optional[str] = None) -> Iterator[dict]:
+    """Time a vendor call and record it when the block exits.
+
+    The yielded dict may be updated with ``prompt_tokens``,
+    ``completion_tokens``, ``model``, ``success`` or ``call_count`` before
+    the block ends.
+    An exception marks the call as failed.
+    """
+    call = {"model": model, "prompt_tokens": 0, "completion_tokens": 0, "success": True}
+    started = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        call["success"] = False
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.OUTBOUND_LATENCY.observe(elapsed, vendor=vendor, operation=operation)
+        if not call["success"]:
+            metrics.OUTBOUND_ERRORS.inc(vendor=vendor, operation=operation)
+        record(vendor, operation, elapsed * 1000, **call)
+
+
+def record_usage(call: dict, usage: Optional[dict]) -> None:
+    """Copy an OpenAI ``usage`` block into a ``track`` call dict."""
+    if usage:
+        call["prompt_tokens"] = usage.get("prompt_tokens", 0) or 0
+        call["completion_tokens"] = usage.get("completion_tokens", 0) or 0
+
+
+def pending_count(session_id: str) -> int:
+    with _lock:
+        return len(_pending.get(session_id, []))
+
+
+def flush(db: Session, session_id: str) -> int:
+    """Persist buffered records for a session. Returns the number written."""
+    with _lock:
+        entries = _pending.pop(session_id, [])
+    if not entries:
+        return 0
+    try:
+        db.add_all([UsageRecord(**entry) for entry in entries])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[{session_id}] Failed to persist {len(entries)} usage records: {e}")
+        return 0
+    return len(entries)
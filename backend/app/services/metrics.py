@@ -0,0 +1,281 @@
+"""In-process metrics with Prometheus text exposition.
+
+A small dependency-free registry of counters, gauges and histograms. Updates
+are a dict lookup and an addition under a lock, so instrumentation can sit on
+hot paths. ``render`` produces the text format served at ``/metrics``.
+"""
+
+import asyncio
+import bisect
+import logging
+import math
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), register: bool = True):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple, object] = {}
+        if register:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), register: bool = True):
+        super().__init__(name, help, labelnames, register)
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Compute the (unlabelled) value at scrape time instead."""
+        self._function = fn
+
+    def value(self, **labels) -> float:
+        if self._function is not None:
+            return self._function()
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} callback failed: {e}")
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        register: bool = True,
+    ):
+        super().__init__(name, help, labelnames, register)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts..., overflow], sum, count
+                state = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[key] = state
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[2] if state else 0
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, ([*s[0]], s[1], s[2])) for k, s in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# ── Application metrics ──────────────────────────────────────────────────────
+
+OUTBOUND_LATENCY = Histogram(
+    "siyada_outbound_request_duration_seconds",
+    "Latency of outbound vendor calls (OpenAI, Serper, Apollo, scraped sites).",
+    ("vendor", "operation"),
+)
+OUTBOUND_ERRORS = Counter(
+    "siyada_outbound_request_errors_total",
+    "Outbound vendor calls that raised or returned an error status.",
+    ("vendor", "operation"),
+)
+HTTP_LATENCY = Histogram(
+    "siyada_http_request_duration_seconds",
+    "Latency of API requests by route template.",
+    ("method", "route", "status"),
+)
+PIPELINE_STAGE_LATENCY = Histogram(
+    "siyada_pipeline_stage_duration_seconds",
+    "Duration of each pipeline stage.",
+    ("stage",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+PIPELINES_ACTIVE = Gauge("siyada_pipelines_active", "Pipeline runs currently executing.")
+PIPELINE_RUNS = Counter("siyada_pipeline_runs_total", "Pipeline runs started.")
+GENERATION_JOBS_ACTIVE = Gauge(
+    "siyada_generation_jobs_active", "Batch email generation jobs currently being processed."
+)
+QUEUE_DEPTH = Gauge(
+    "siyada_queue_depth", "Work items waiting for a concurrency slot.", ("queue",)
+)
+IN_FLIGHT = Gauge("siyada_in_flight", "Work items currently holding a concurrency slot.", ("queue",))
+SCRAPER_BYTES = Counter("siyada_scraper_bytes_total", "Bytes downloaded by the scraper (on the wire).")
+SCRAPER_BYTES_SAVED = Counter(
+    "siyada_scraper_bytes_saved_total",
+    "Response bytes not downloaded thanks to header checks and the size cap (per Content-Length).",
+    ("reason",),
+)
+SCRAPER_ABORTED = Counter(
+    "siyada_scraper_aborted_total", "Fetches closed early by the scraper.", ("reason",)
+)
+SCRAPER_CONCURRENCY_LIMIT = Gauge(
+    "siyada_scraper_concurrency_limit", "Current adaptive limit on concurrent website fetches."
+)
+DOMAINS_FILTERED = Counter(
+    "siyada_domains_filtered_total",
+    "Search result domains dropped as directories/aggregators before scraping and enrichment.",
+)
+CACHE_REQUESTS = Counter(
+    "siyada_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss); hit ratio = hit / total.",
+    ("cache", "result"),
+)
+DB_COMMITS = Counter("siyada_db_commits_total", "Committed database transactions.")
+DB_ROLLBACKS = Counter("siyada_db_rollbacks_total", "Rolled back database transactions.")
+EVENT_LOOP_LAG = Gauge(
+    "siyada_event_loop_lag_seconds", "Most recent delay between a scheduled and actual event loop wakeup."
+)
+EVENT_LOOP_LAG_HISTOGRAM = Histogram(
+    "siyada_event_loop_lag_distribution_seconds",
+    "Distribution of event loop wakeup delays.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0) -> None:
+    if hits:
+        CACHE_REQUESTS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_REQUESTS.inc(misses, cache=cache, result="miss")
+
+
+def observe_span(span: dict) -> None:
+    """Tracing hook: feed finished stage spans into the stage histogram."""
+    if span["kind"] == "stage":
+        PIPELINE_STAGE_LATENCY.observe(span["duration_ms"] / 1000, stage=span["name"])
+
+
+_db_installed = False
+
+
+def install_db_instrumentation() -> None:
+    """Count commits/rollbacks on every ORM session (idempotent)."""
+    global _db_installed
+    if _db_installed:
+        return
+    event.listen(Session, "after_commit", lambda session: DB_COMMITS.inc())
+    event.listen(Session, "after_rollback", lambda session: DB_ROLLBACKS.inc())
+    _db_installed = True
+
+
+async def monitor_event_loop(interval: float = 0.5) -> None:
+    """Sample event loop lag forever; run as a background task."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - started - interval)
+        EVENT_LOOP_LAG.set(lag)
+        EVENT_LOOP_LAG_HISTOGRAM.observe(lag)
@@ -0,0 +1,126 @@
+"""Persistent memoization for LLM query parsing.
+
+Parsed queries are stored per (normalized query text, model) with a TTL, so
+a repeat or near-identical query skips the parse round trip and the pipeline
+can start searching immediately.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import time
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.query_parse_cache import QueryParseCacheEntry
+from app.services import llm_service, metrics
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n\"'.,;:!?"
+
+
+def normalize_query(raw_query: str) -> str:
+    """Canonicalize query text so trivially different inputs share a key."""
+    text = unicodedata.normalize("NFKC", raw_query).lower()
+    text = _WHITESPACE_RE.sub(" ", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def compute_key(normalized_query: str, model: str) -> str:
+    payload = json.dumps([normalized_query, model], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def lookup(db: Session, normalized_query: str, model: str) -> Optional[dict]:
+    """Return the cached parse for a query if present and not expired."""
+    entry = (
+        db.query(QueryParseCacheEntry)
+        .filter(
+            QueryParseCacheEntry.key == compute_key(normalized_query, model),
+            QueryParseCacheEntry.expires_at > datetime.now(timezone.utc),
+        )
+        .first()
+    )
+    if not entry:
+        return None
+    try:
+        parsed = json.loads(entry.parsed_query)
+    except json.JSONDecodeError:
+        return None
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_hit_at = datetime.now(timezone.utc)
+    db.commit()
+    return parsed
+
+
+def store(db: Session, normalized_query: str, model: str, parsed: dict) -> None:
+    """Insert or refresh the cached parse for a query."""
+    key = compute_key(normalized_query, model)
+    now = datetime.now(timezone.utc)
+    entry = db.get(QueryParseCacheEntry, key)
+    if entry is None:
+        entry = QueryParseCacheEntry(
+            key=key,
+            normalized_query=normalized_query,
+            model=model,
+            hit_count=0,
+        )
+        db.add(entry)
+    entry.parsed_query = json.dumps(parsed)
+    entry.created_at = now
+    entry.expires_at = now + timedelta(seconds=settings.PARSE_CACHE_TTL_SECONDS)
+    db.commit()
+
+
+async def cached_parse_query(db: Session, raw_query: str) -> tuple[dict, bool, float]:
+    """Parse a query through the cache.
+
+    Returns ``(parsed, cache_hit, latency_ms)``. Failed parses (those carrying
+    an ``error`` key) are never cached.
+    """
+    started = time.perf_counter()
+    model = settings.get_model()
+    normalized = normalize_query(raw_query)
+
+    parsed = lookup(db, normalized, model)
+    if parsed is not None:
+        metrics.record_cache("query_parse", hits=1)
+        return parsed, True, (time.perf_counter() - started) * 1000
+
+    metrics.record_cache("query_parse", misses=1)
+    parsed = await llm_service.parse_query(raw_query)
+    if "error" not in parsed:
+        try:
+            store(db, normalized, model, parsed)
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Failed to cache parsed query: {e}")
+    return parsed, False, (time.perf_counter() - started) * 1000
+
+
+def invalidate(db: Session, raw_query: Optional[str] = None) -> int:
+    """Drop cached parses for one query (all models), or the whole cache.
+
+    Returns the number of entries removed.
+    """
+    query = db.query(QueryParseCacheEntry)
+    if raw_query is not None:
+        query = query.filter(QueryParseCacheEntry.normalized_query == normalize_query(raw_query))
+    removed = query.delete(synchronize_session=False)
+    db.commit()
+    return removed
+
+
+def count_entries(db: Session) -> int:
+    return (
+        db.query(QueryParseCacheEntry)
+        .filter(QueryParseCacheEntry.expires_at > datetime.now(timezone.utc))
+        .count()
+    )
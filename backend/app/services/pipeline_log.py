@@ -1,16 +1,18 @@
 """In-memory pipeline activity log.
 
 Stores per-session log entries that the frontend polls to display
-a real-time activity feed during pipeline execution.
+a real-time activity feed during pipeline execution, plus live previews
+of emails that are still being streamed from the LLM.
 """
 
 import threading
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Callable, Optional
 
 _lock = threading.Lock()
 _logs: dict[str, list[dict]] = {}
 _progress: dict[str, dict] = {}  # session_id -> {step, pct}
+_previews: dict[str, dict[str, dict]] = {}  # session_id -> lead_id -> preview
 
 
 def add_log(
@@ -46,7 +48,69 @@ def get_logs(session_id: str, after: int = 0) -> list[dict]:
         return list(_logs.get(session_id, [])[after:])
 
 
+def set_preview(
+    session_id: str,
+    lead_id: str,
+    lead_name: str,
+    subject: str = "",
+    body: str = "",
+    done: bool = False,
+) -> None:
+    entry = {
+        "lead_id": lead_id,
+        "lead_name": lead_name,
+        "subject": subject,
+        "body": body,
+        "done": done,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with _lock:
+        _previews.setdefault(session_id, {})[lead_id] = entry
+
+
+def get_previews(session_id: str, include_done: bool = False) -> list[dict]:
+    with _lock:
+        previews = list(_previews.get(session_id, {}).values())
+    if include_done:
+        return previews
+    return [p for p in previews if not p["done"]]
+
+
+def make_preview_callback(session_id: str, lead_id: str, lead_name: str) -> Callable[[dict], None]:
+    """Build an ``on_partial`` handler for a streaming email generation.
+
+    Partial subject/body text is mirrored into the live preview, and the
+    subject is announced in the activity feed as soon as it is complete.
+    """
+    announced = False
+
+    def _on_partial(partial: dict) -> None:
+        nonlocal announced
+        set_preview(
+            session_id,
+            lead_id,
+            lead_name,
+            subject=partial.get("subject", ""),
+            body=partial.get("body", ""),
+        )
+        if partial.get("subject_complete") and not announced:
+            announced = True
+            add_log(
+                session_id, "generate",
+                f"Subject for {lead_name}: \"{partial['subject'][:100]}\"",
+                emoji="📝",
+            )
+
+    return _on_partial
+
+
+def clear_previews(session_id: str) -> None:
+    with _lock:
+        _previews.pop(session_id, None)
+
+
 def clear(session_id: str) -> None:
     with _lock:
         _logs.pop(session_id, None)
         _progress.pop(session_id, None)
+        _previews.pop(session_id, None)
@@ -1,5 +1,6 @@
 import json
 import logging
+from contextlib import aclosing
 from datetime import datetime, timezone
 from typing import Optional
 
@@ -9,7 +10,9 @@ from app.core.config import Settings
 from app.models.search_session import SearchSession
 from app.models.search_result import SearchResult
 from app.models.lead import Lead
-from app.services import llm_service, serper_service, apollo_service, scraper_service
+from app.services import llm_service, serper_service, apollo_service, scraper_service, crawler_service
+from app.services import company_service, contact_harvest, contact_index, domain_filter, metering, metrics
+from app.services import generation_cache, lead_enrichment, lead_generation, parse_cache, tracing
 from app.services import pipeline_log as log
 
 logger = logging.getLogger(__name__)
@@ -41,19 +44,57 @@ async def run_pipeline(
     3. Scrape discovered URLs for context
     4. Enrich contacts with Apollo
     5. Generate personalized emails with LLM
+
+    Vendor usage for the run is metered per stage and a trace with a span per
+    stage and outbound call is recorded; both are persisted at the end.
     """
+    session = db.query(SearchSession).filter(SearchSession.id == session_id).first()
+    user_id = session.user_id if session else None
+    if session is not None:
+        # Emails written after the run (on demand, or regenerated) use the same context
+        session.sender_context = sender_context
+        db.commit()
+    metrics.PIPELINE_RUNS.inc()
+    metrics.PIPELINES_ACTIVE.inc()
+    with metering.scope(session_id=session_id, user_id=user_id):
+        try:
+            with tracing.trace(session_id, query=query):
+                await _run_steps(session_id, query, sender_context, db, settings)
+        finally:
+            metrics.PIPELINES_ACTIVE.dec()
+            metering.flush(db, session_id)
+            spans = tracing.flush(db, session_id)
+            await tracing.export_otlp(session_id, spans)
+
+
+def _enter_stage(stage: str) -> None:
+    """Attribute subsequent usage and spans to a pipeline stage."""
+    metering.set_stage(stage)
+    tracing.start_stage(stage)
+
+
+async def _run_steps(
+    session_id: str,
+    query: str,
+    sender_context: str,
+    db: Session,
+    settings: Settings,
+) -> None:
     try:
         # ── Step 1: Parse query ──────────────────────────────────────
+        _enter_stage("query")
         _update_session_status(db, session_id, "searching")
         log.set_progress(session_id, "query", 5)
         log.add_log(session_id, "query", f"Parsing your query: \"{query}\"", emoji="🔍")
 
-        parsed = await llm_service.parse_query(query)
+        parsed, parse_cache_hit, parse_latency_ms = await parse_cache.cached_parse_query(db, query)
 
         # Store parsed query in session
         session = db.query(SearchSession).filter(SearchSession.id == session_id).first()
         if session:
             session.parsed_query = json.dumps(parsed)
+            session.parse_cache_hit = parse_cache_hit
+            session.parse_latency_ms = round(parse_latency_ms, 1)
             db.commit()
 
         search_queries = parsed.get("search_queries", [query])
@@ -72,16 +113,31 @@ async def run_pipeline(
 
         log.add_log(
             session_id, "query",
-            f"Query parsed — {', '.join(details) if details else 'ready to search'}",
+            f"Query parsed{' (cached)' if parse_cache_hit else ''} — "
+            f"{', '.join(details) if details else 'ready to search'}",
+            detail=f"{parse_latency_ms:.0f} ms",
             emoji="✅",
         )
         log.set_progress(session_id, "search", 15)
 
         # ── Step 2: Serper search ────────────────────────────────────
+        _enter_stage("search")
         for i, sq in enumerate(search_queries):
             log.add_log(session_id, "search", f"Searching: \"{sq}\"", emoji="🌐")
 
-        search_results = await serper_service.search(search_queries)
+        # Directories, aggregators and news sites aren't prospects
+        dfilter = None
+        if settings.DOMAIN_FILTER_ENABLED:
+            dfilter = domain_filter.for_user(db, session.user_id if session else None)
+
+        # Later result pages are only fetched while too few companies turned up
+        search_results = await serper_service.search_domains(
+            search_queries,
+            min_domains=settings.SERPER_TARGET_DOMAINS,
+            max_pages=settings.SERPER_MAX_PAGES,
+            num_results=settings.SERPER_RESULTS_PER_PAGE,
+            accept=(lambda r: bool(r.get("domain")) and not dfilter.is_excluded(r["url"])) if dfilter else None,
+        )
 
         valid_results = [r for r in search_results if "error" not in r]
         if not valid_results:
@@ -114,113 +170,229 @@ async def run_pipeline(
 
         _update_session_status(db, session_id, "enriching", result_count=len(db_results))
 
+        # Only company sites go on to scraping and enrichment
+        company_results = db_results
+        if dfilter is not None:
+            company_results, removed = [], []
+            for r in db_results:
+                (removed if dfilter.is_excluded(r.url or r.domain) else company_results).append(r)
+            skipped = list(dict.fromkeys(r.domain for r in removed if r.domain))
+            if skipped:
+                metrics.DOMAINS_FILTERED.inc(len(skipped))
+                examples = ", ".join(skipped[:3]) + (", …" if len(skipped) > 3 else "")
+                log.add_log(
+                    session_id, "search",
+                    f"Skipped {len(skipped)} directory and media sites ({examples}) — "
+                    f"up to {len(skipped)} site crawls and Apollo searches saved",
+                    emoji="🧹",
+                )
+            if not company_results:
+                log.add_log(session_id, "search", "Search only found directory and media sites", emoji="❌")
+                _update_session_status(db, session_id, "failed")
+                return
+
         # ── Step 3: Scrape URLs for context ──────────────────────────
+        _enter_stage("scrape")
         log.set_progress(session_id, "enrich", 35)
-        urls_to_scrape = [r.url for r in db_results if r.url][:15]
-
-        log.add_log(
-            session_id, "enrich",
-            f"Scraping {len(urls_to_scrape)} websites for context...",
-            emoji="📄",
-        )
+        # One URL per company, best-ranked first
+        urls_by_domain = {}
+        for r in company_results:
+            if r.url:
+                urls_by_domain.setdefault(company_service.normalize_domain(r.domain or r.url), r.url)
+        urls_to_scrape = list(urls_by_domain.values())[:settings.SERPER_TARGET_DOMAINS]
+
+        # Company websites scraped recently (by any session) aren't fetched again
+        companies = company_service.get_or_create_many(db, [r.domain or r.url for r in company_results])
+        db.commit()  # don't hold the write lock across the network fetches below
+        reused = {d for d, c in companies.items() if company_service.is_fresh(c)}
+        urls_to_scrape = [u for u in urls_to_scrape if company_service.normalize_domain(u) not in reused]
+        if reused:
+            log.add_log(
+                session_id, "enrich",
+                f"Reusing website context for {len(reused)} recently scraped companies",
+                emoji="♻️",
+            )
 
-        scraped_data = await scraper_service.scrape_many(urls_to_scrape)
+        if settings.SCRAPER_CRAWL_MODE == "site":
+            site_count = len({crawler_service.site_key(u) for u in urls_to_scrape})
+            log.add_log(
+                session_id, "enrich",
+                f"Crawling {site_count} company sites for context...",
+                emoji="📄",
+            )
+            scraped_data = await crawler_service.crawl_many(urls_to_scrape)
+        else:
+            log.add_log(
+                session_id, "enrich",
+                f"Scraping {len(urls_to_scrape)} websites for context...",
+                emoji="📄",
+            )
+            scraped_data = await scraper_service.scrape_many(urls_to_scrape)
 
-        scraped_map = {}
         scraped_count = 0
+        scraped_domains = set()
         for sd in scraped_data:
             url = sd.get("url", "")
             if url and not sd.get("error"):
-                context_parts = []
-                if sd.get("title"):
-                    context_parts.append(sd["title"])
-                if sd.get("meta_description"):
-                    context_parts.append(sd["meta_description"])
-                if sd.get("text_content"):
-                    context_parts.append(sd["text_content"][:500])
-                scraped_map[url] = " | ".join(context_parts)
                 scraped_count += 1
+                domain = company_service.normalize_domain(url)
+                company = companies.get(domain)
+                # The first page scraped for a company provides its context
+                if company is not None and domain not in scraped_domains:
+                    company_service.record_scrape(
+                        company, crawler_service.build_context(sd), contact_harvest.harvest(sd, domain)
+                    )
+                    scraped_domains.add(domain)
+        db.commit()
 
         log.add_log(
             session_id, "enrich",
-            f"Scraped {scraped_count}/{len(urls_to_scrape)} websites",
+            f"Scraped {scraped_count}/{len(scraped_data)} websites",
             emoji="✅",
         )
         log.set_progress(session_id, "enrich", 45)
 
         # ── Step 4: Apollo enrichment ────────────────────────────────
-        unique_domains = list(set(r.domain for r in db_results if r.domain))[:10]
+        _enter_stage("enrich")
+        # Best-ranked companies first; stop once enough people are found
+        unique_domains = list(dict.fromkeys(r.domain for r in company_results if r.domain))
+        target = settings.APOLLO_TARGET_LEADS
         title_keywords = parsed.get("job_titles", [])
         seniority = parsed.get("seniority_levels", [])
 
         log.add_log(
             session_id, "enrich",
-            f"Enriching contacts from {len(unique_domains)} domains...",
+            f"Enriching up to {target} contacts from {len(unique_domains)} domains...",
             emoji="👥",
         )
 
         all_leads_data = []
+        domains_searched = 0
+        apollo_skipped = 0
+        website_contacts = 0
         for i, domain in enumerate(unique_domains):
-            try:
-                people = await apollo_service.search_people(
-                    domain=domain,
-                    title_keywords=title_keywords if title_keywords else None,
-                    seniority=seniority if seniority else None,
+            if len(all_leads_data) >= target:
+                log.add_log(
+                    session_id, "enrich",
+                    f"Reached {target} contacts — skipping {len(unique_domains) - i} remaining domains",
+                    emoji="🎯",
                 )
-                valid_people = [p for p in people if "error" not in p]
-
+                break
+            domains_searched += 1
+            try:
                 matching_result = next(
-                    (r for r in db_results if r.domain == domain), None
+                    (r for r in company_results if r.domain == domain), None
                 )
                 result_id = matching_result.id if matching_result else None
-                url_for_domain = matching_result.url if matching_result else ""
-
-                for person in valid_people:
-                    person["_search_result_id"] = result_id
-                    person["_scraped_context"] = scraped_map.get(url_for_domain, "")
-                    all_leads_data.append(person)
-                    name = f"{person.get('first_name', '')} {person.get('last_name', '')}".strip()
-                    title = person.get("title", "")
-                    if name:
-                        detail = f"{name}"
-                        if title:
-                            detail += f" — {title}"
-                        log.add_log(session_id, "enrich", f"Found: {detail} at {domain}", emoji="👤")
-
-                pct = 45 + ((i + 1) / max(len(unique_domains), 1)) * 20
+                company = companies.get(company_service.normalize_domain(domain))
+                # Addresses the company's own website lists (from this run's scrape or a reused one)
+                site = company_service.scraped_contacts(company) if company is not None else None
+                named = list(site["named"]) if site else []
+                wanted = min(settings.APOLLO_MAX_PEOPLE_PER_DOMAIN, target - len(all_leads_data))
+                found = []
+
+                with tracing.span("enrich.domain", domain=domain):
+                    if settings.HARVEST_MIN_CONTACTS and len(named) >= settings.HARVEST_MIN_CONTACTS:
+                        # Enough people on the website already; save the Apollo credits
+                        apollo_skipped += 1
+                    else:
+                        people = apollo_service.iter_people(
+                            domain=domain,
+                            title_keywords=title_keywords if title_keywords else None,
+                            seniority=seniority if seniority else None,
+                            reuse_lookup=lambda ids: contact_index.reusable(db, ids),
+                            max_people=max(wanted - len(named), 1),
+                            match=not settings.APOLLO_LAZY_ENRICHMENT,
+                        )
+                        async with aclosing(people):
+                            async for person in people:
+                                if "error" in person:
+                                    logger.warning(f"[{session_id}] Apollo error for domain {domain}: {person['error']}")
+                                    break
+                                contact_harvest.fill_email(person, named)
+                                found.append(person)
+
+                    company_name = (company.name if company is not None else None) or domain
+                    company_linkedin = site["company_linkedin_url"] if site else ""
+                    # Website contacts Apollo already returned aren't added a second time
+                    named = contact_harvest.drop_known(named, found)
+                    found.extend(contact_harvest.to_person(c, domain, company_name, company_linkedin) for c in named)
+                    if not found and site and site["role_emails"] and settings.HARVEST_ROLE_LEADS:
+                        role = contact_harvest.role_contact(site["role_emails"][0])
+                        found.append(contact_harvest.to_person(role, domain, company_name, company_linkedin))
+
+                    for person in found[:wanted]:
+                        person["_search_result_id"] = result_id
+                        person["_company"] = company
+                        if company is not None and person.get("email_status") not in ("unavailable", "scraped"):
+                            company_service.record_enrichment(company, person)
+                        all_leads_data.append(person)
+                        from_site = person.get("_source") == "website"
+                        website_contacts += from_site
+                        name = f"{person.get('first_name', '')} {person.get('last_name', '')}".strip()
+                        title = person.get("title", "")
+                        if name or from_site:
+                            detail = name or person.get("email", "")
+                            if title:
+                                detail += f" — {title}"
+                            log.add_log(
+                                session_id, "enrich", f"Found: {detail} at {domain}"
+                                + (" (from website)" if from_site else ""),
+                                emoji="📇" if from_site else "👤",
+                            )
+
+                pct = 45 + max(len(all_leads_data) / max(target, 1), (i + 1) / max(len(unique_domains), 1)) * 20
                 log.set_progress(session_id, "enrich", pct)
             except Exception as e:
                 logger.error(f"[{session_id}] Apollo error for domain {domain}: {e}")
                 log.add_log(session_id, "enrich", f"Could not enrich {domain}", emoji="⚠️")
                 continue
 
+        if website_contacts:
+            log.add_log(
+                session_id, "enrich",
+                f"{website_contacts} contacts came from company websites"
+                + (f" — skipped Apollo for {apollo_skipped} companies" if apollo_skipped else ""),
+                emoji="📇",
+            )
+
         # If Apollo returned no people, create leads from search results directly
         if not all_leads_data:
             log.add_log(
                 session_id, "enrich",
-                f"No contacts from Apollo — creating {len(db_results)} leads from search results",
+                f"No contacts from Apollo — creating {len(company_results)} leads from search results",
                 emoji="ℹ️",
             )
-            for sr in db_results:
+            for sr in company_results:
+                company = companies.get(company_service.normalize_domain(sr.domain or sr.url or ""))
                 lead = Lead(
                     session_id=session_id,
                     search_result_id=sr.id,
+                    company_id=company.id if company else None,
                     company_name=sr.title or "",
                     company_domain=sr.domain or "",
-                    scraped_context=scraped_map.get(sr.url, ""),
                 )
                 db.add(lead)
             db.commit()
         else:
+            pending_count = sum(1 for p in all_leads_data if p.get("_pending"))
             log.add_log(
                 session_id, "enrich",
-                f"Enriched {len(all_leads_data)} contacts from {len(unique_domains)} companies",
+                f"Enriched {len(all_leads_data)} contacts from {domains_searched} companies"
+                + (f" ({pending_count} to be enriched when used)" if pending_count else ""),
                 emoji="✅",
             )
+            new_leads = []
             for person in all_leads_data:
+                company = person.get("_company")
+                contact = contact_index.upsert(db, person)
+                # Industry, size, company LinkedIn and website context live on the
+                # shared Company row rather than being copied onto every lead
                 lead = Lead(
                     session_id=session_id,
                     search_result_id=person.get("_search_result_id"),
+                    company_id=company.id if company else None,
+                    contact_id=contact.id if contact else None,
                     first_name=person.get("first_name", ""),
                     last_name=person.get("last_name", ""),
                     email=person.get("email", ""),
@@ -234,72 +406,63 @@ async def run_pipeline(
                     country=person.get("country", ""),
                     company_name=person.get("organization_name", ""),
                     company_domain=person.get("organization_domain", ""),
-                    company_industry=person.get("organization_industry", ""),
-                    company_size=person.get("organization_size", ""),
-                    company_linkedin_url=person.get("organization_linkedin_url", ""),
-                    scraped_context=person.get("_scraped_context", ""),
+                    enrichment_status=lead_enrichment.PENDING if person.get("_pending") else None,
                 )
+                if company is None:
+                    lead.company_industry = person.get("organization_industry", "")
+                    lead.company_size = person.get("organization_size", "")
+                    lead.company_linkedin_url = person.get("organization_linkedin_url", "")
                 db.add(lead)
-            db.commit()
-
-        log.set_progress(session_id, "generate", 70)
+                new_leads.append(lead)
 
-        # ── Step 5: Generate emails ──────────────────────────────────
-        _update_session_status(db, session_id, "generating")
-
-        leads = (
-            db.query(Lead)
-            .filter(Lead.session_id == session_id, Lead.is_selected == True)
-            .all()
-        )
-
-        log.add_log(
-            session_id, "generate",
-            f"Generating personalized emails for {len(leads)} leads...",
-            emoji="✉️",
-        )
-
-        success_count = 0
-        for i, lead in enumerate(leads):
-            name = f"{lead.first_name or ''} {lead.last_name or ''}".strip() or lead.company_name or "lead"
-            log.add_log(session_id, "generate", f"Writing email for {name}...", emoji="✍️")
+            # People this user already emailed in earlier sessions aren't written to again
+            user_id = session.user_id if session else None
+            already = contact_index.contacted_by_user(
+                db, user_id, [l.contact_id for l in new_leads], exclude_session_id=session_id
+            )
+            for lead in new_leads:
+                if lead.contact_id in already:
+                    lead.is_duplicate = True
+                    lead.is_selected = False
+            db.commit()
 
-            try:
-                lead_data = {
-                    "first_name": lead.first_name,
-                    "last_name": lead.last_name,
-                    "job_title": lead.job_title,
-                    "company_name": lead.company_name,
-                    "company_industry": lead.company_industry,
-                    "city": lead.city,
-                    "state": lead.state,
-                    "country": lead.country,
-                    "linkedin_url": lead.linkedin_url,
-                    "scraped_context": lead.scraped_context,
-                }
-                email_result = await llm_service.generate_email(
-                    lead_data, sender_context, query
+            reused_count = sum(1 for p in all_leads_data if p.get("_reused"))
+            if reused_count:
+                log.add_log(
+                    session_id, "enrich",
+                    f"Reused recent enrichment for {reused_count} known contacts",
+                    emoji="♻️",
+                )
+            duplicate_count = sum(1 for l in new_leads if l.is_duplicate)
+            if duplicate_count:
+                log.add_log(
+                    session_id, "enrich",
+                    f"Skipping {duplicate_count} contacts you already emailed in earlier sessions",
+                    emoji="ℹ️",
                 )
-                if "error" not in email_result:
-                    lead.personalized_email = email_result.get("body", "")
-                    lead.email_subject = email_result.get("subject", "")
-                    lead.suggested_approach = email_result.get("suggested_approach", "")
-                    success_count += 1
-                    log.add_log(session_id, "generate", f"Email ready for {name}", emoji="✅")
-                else:
-                    logger.warning(
-                        f"[{session_id}] Email generation error for lead {lead.id}: {email_result['error']}"
-                    )
-                    log.add_log(session_id, "generate", f"Failed for {name}: {email_result['error'][:80]}", emoji="⚠️")
-            except Exception as e:
-                logger.error(f"[{session_id}] Email generation failed for lead {lead.id}: {e}")
-                log.add_log(session_id, "generate", f"Error for {name}", emoji="❌")
-                continue
 
-            pct = 70 + ((i + 1) / max(len(leads), 1)) * 25
-            log.set_progress(session_id, "generate", pct)
+        log.set_progress(session_id, "generate", 70)
 
-        db.commit()
+        # ── Step 5: Generate emails ──────────────────────────────────
+        _enter_stage("generate")
+        if settings.GENERATION_TEMPLATE_DRAFTS:
+            selected = db.query(Lead).filter(Lead.session_id == session_id, Lead.is_selected == True).all()
+            success_count = lead_generation.draft_leads(selected, sender_context)
+            db.commit()
+            log.add_log(
+                session_id, "generate",
+                f"Drafted {success_count} emails from templates — AI versions replace them as they are written",
+                emoji="📝",
+            )
+        elif settings.GENERATION_ON_DEMAND:
+            success_count = 0
+            log.add_log(
+                session_id, "generate",
+                "Emails will be written as leads are opened, starting with the first ones",
+                emoji="✉️",
+            )
+        else:
+            success_count = await _generate_emails(session_id, query, sender_context, db, settings)
 
         # ── Done ─────────────────────────────────────────────────────
         final_count = (
@@ -313,7 +476,103 @@ async def run_pipeline(
             emoji="🎉",
         )
 
+        # ── Prefetch lazily enriched leads ───────────────────────────
+        # After completion, so the run's results are available at search speed
+        prefetch = lead_enrichment.prefetch_candidates(db, session_id, settings.APOLLO_PREFETCH_LEADS)
+        if prefetch:
+            _enter_stage("prefetch")
+            try:
+                enriched = await lead_enrichment.enrich_leads(db, prefetch)
+                log.add_log(session_id, "export", f"Prefetched contact details for {enriched} leads", emoji="📥")
+            except Exception as e:
+                logger.warning(f"[{session_id}] Lead prefetch failed: {e}")
+
+        # ── Write the first emails (on demand) or refine drafts ──────
+        if settings.GENERATION_ON_DEMAND or settings.GENERATION_TEMPLATE_DRAFTS:
+            session = db.query(SearchSession).filter(SearchSession.id == session_id).first()
+            if settings.GENERATION_ON_DEMAND:
+                first = lead_generation.ahead(db, session_id, 0)
+            else:
+                first = lead_generation.ahead(db, session_id, 0, count=final_count)
+            if session is not None and first:
+                _enter_stage("prefetch")
+                try:
+                    generated = await lead_generation.generate_leads(db, session, first)
+                    log.add_log(session_id, "export", f"AI wrote emails for {generated} leads", emoji="📥")
+                except Exception as e:
+                    logger.warning(f"[{session_id}] Email prefetch failed: {e}")
+
     except Exception as e:
         logger.error(f"[{session_id}] Pipeline failed: {e}", exc_info=True)
         log.add_log(session_id, "error", f"Pipeline failed: {str(e)[:120]}", emoji="❌")
         _update_session_status(db, session_id, "failed")
+
+
+async def _generate_emails(
+    session_id: str,
+    query: str,
+    sender_context: str,
+    db: Session,
+    settings: Settings,
+) -> int:
+    """Step 5: write an email for every selected lead. Returns how many succeeded."""
+    _update_session_status(db, session_id, "generating")
+
+    leads = (
+        db.query(Lead)
+        .filter(Lead.session_id == session_id, Lead.is_selected == True)
+        .all()
+    )
+
+    log.add_log(
+        session_id, "generate",
+        f"Generating personalized emails for {len(leads)} leads...",
+        emoji="✉️",
+    )
+
+    stream = settings.OPENAI_STREAM_EMAILS
+    success_count = 0
+    for i, lead in enumerate(leads):
+        name = f"{lead.first_name or ''} {lead.last_name or ''}".strip() or lead.company_name or "lead"
+        log.add_log(session_id, "generate", f"Writing email for {name}...", emoji="✍️")
+
+        try:
+            lead_data = llm_service.lead_prompt_data(lead)
+            with metering.scope(lead_id=lead.id), tracing.span("generate.lead", lead_id=lead.id):
+                email_result = await llm_service.generate_email(
+                    lead_data,
+                    sender_context,
+                    query,
+                    stream=stream,
+                    on_partial=log.make_preview_callback(session_id, lead.id, name) if stream else None,
+                )
+            if "error" not in email_result:
+                lead.personalized_email = email_result.get("body", "")
+                lead.email_subject = email_result.get("subject", "")
+                lead.suggested_approach = email_result.get("suggested_approach", "")
+                lead.email_tier = generation_cache.TIER_LLM
+                # Commit per lead so finished emails are readable while the rest stream
+                db.commit()
+                success_count += 1
+                if stream:
+                    log.set_preview(
+                        session_id, lead.id, name,
+                        subject=lead.email_subject, body=lead.personalized_email, done=True,
+                    )
+                log.add_log(session_id, "generate", f"Email ready for {name}", emoji="✅")
+            else:
+                logger.warning(
+                    f"[{session_id}] Email generation error for lead {lead.id}: {email_result['error']}"
+                )
+                log.add_log(session_id, "generate", f"Failed for {name}: {email_result['error'][:80]}", emoji="⚠️")
+        except Exception as e:
+            logger.error(f"[{session_id}] Email generation failed for lead {lead.id}: {e}")
+            log.add_log(session_id, "generate", f"Error for {name}", emoji="❌")
+            continue
+
+        pct = 70 + ((i + 1) / max(len(leads), 1)) * 25
+        log.set_progress(session_id, "generate", pct)
+
+    db.commit()
+    log.clear_previews(session_id)
+    return success_count
@@ -0,0 +1,150 @@
+"""Per-host robots.txt cache for the scraper.
+
+Each origin's robots.txt is fetched once and its parsed rules are kept in
+memory for ``ROBOTS_CACHE_TTL_SECONDS``. Missing or forbidden robots.txt
+files (4xx) allow everything; a server error makes the whole site off-limits
+until the shorter ``ROBOTS_ERROR_TTL_SECONDS`` runs out, as RFC 9309 asks.
+If the host can't be reached at all, fetching is allowed so the page fetch
+reports the real error. Concurrent lookups for one origin share a fetch.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from app.services import dns_cache, metering, metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+# Google stops reading robots.txt at 500 KiB
+MAX_ROBOTS_BYTES = 500 * 1024
+MAX_ENTRIES = 10_000
+
+
+@dataclass
+class _Entry:
+    rules: RobotFileParser
+    expires: float
+
+
+def _allow_all() -> RobotFileParser:
+    rules = RobotFileParser()
+    rules.allow_all = True
+    return rules
+
+
+def _disallow_all() -> RobotFileParser:
+    rules = RobotFileParser()
+    rules.disallow_all = True
+    return rules
+
+
+def _origin(url: str) -> str:
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+class RobotsCache:
+    def __init__(self, ttl: float, error_ttl: float, user_agent: str, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.user_agent = user_agent
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    async def rules(self, url: str) -> RobotFileParser:
+        """Parsed robots.txt rules for the origin of ``url``."""
+        origin = _origin(url)
+        with self._lock:
+            entry = self._entries.get(origin)
+            if entry is not None and entry.expires > time.monotonic():
+                self._entries.move_to_end(origin)
+            else:
+                entry = None
+        if entry is not None:
+            metrics.record_cache("robots", hits=1)
+            return entry.rules
+
+        pending = self._inflight.get(origin)
+        if pending is not None and not pending.get_loop().is_closed():
+            metrics.record_cache("robots", hits=1)
+            return await asyncio.shield(pending)
+
+        metrics.record_cache("robots", misses=1)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[origin] = future
+        try:
+            rules, ttl = await self._fetch(origin)
+            self._store(origin, _Entry(rules, time.monotonic() + ttl))
+            future.set_result(rules)
+            return rules
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                future.exception()
+            raise
+        finally:
+            if self._inflight.get(origin) is future:
+                del self._inflight[origin]
+
+    async def allowed(self, url: str) -> bool:
+        return (await self.rules(url)).can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, rules: RobotFileParser) -> Optional[float]:
+        delay = rules.crawl_delay(self.user_agent)
+        return float(delay) if delay is not None else None
+
+    async def _fetch(self, origin: str) -> tuple[RobotFileParser, float]:
+        url = f"{origin}/robots.txt"
+        try:
+            with metering.track("scraper", "robots"), tracing.client_span("scraper", url) as span:
+                async with httpx.AsyncClient(
+                    timeout=5.0, follow_redirects=True, verify=False, transport=dns_cache.transport(verify=False)
+                ) as client:
+                    async with client.stream("GET", url, headers={"User-Agent": self.user_agent}) as response:
+                        tracing.record_response(span, response)
+                        body = b""
+                        if response.status_code == 200:
+                            async for chunk in response.aiter_bytes():
+                                body += chunk
+                                if len(body) >= MAX_ROBOTS_BYTES:
+                                    body = body[:MAX_ROBOTS_BYTES]
+                                    break
+        except httpx.HTTPError as e:
+            logger.debug(f"robots.txt unavailable for {origin}: {e}")
+            return _allow_all(), self.error_ttl
+
+        status = response.status_code
+        if status >= 500:
+            return _disallow_all(), self.error_ttl
+        if status >= 400:
+            return _allow_all(), self.ttl
+        if status != 200:
+            return _allow_all(), self.error_ttl
+
+        rules = RobotFileParser(url)
+        rules.parse(body.decode("utf-8", errors="replace").splitlines())
+        rules.modified()
+        return rules, self.ttl
+
+    def _store(self, origin: str, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[origin] = entry
+            self._entries.move_to_end(origin)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
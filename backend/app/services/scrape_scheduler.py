@@ -0,0 +1,202 @@
+"""Concurrency scheduler for website scraping.
+
+One scheduler instance is shared by every pipeline in the process. A fetch
+needs two slots:
+
+- a per-host slot: at most ``per_host_limit`` concurrent requests to one
+  host, spaced at least ``delay`` seconds apart (the delay grows when the
+  host throttles us and honours ``Retry-After``);
+- a global slot: at most ``limit`` fetches in flight overall, where ``limit``
+  adapts AIMD-style — it grows additively while fetches succeed within the
+  latency target, and halves on timeouts, 429 and 503 responses.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+from urllib.parse import urlparse
+
+from app.core.config import settings
+from app.services import metrics
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_STATUSES = {429, 503}
+
+# Don't halve the global limit more than once per window, so a burst of
+# failures from requests that were already in flight counts as one signal
+BACKOFF_WINDOW_SECONDS = 1.0
+MAX_HOST_DELAY_SECONDS = 30.0
+
+# Forget idle hosts once this many are tracked
+MAX_TRACKED_HOSTS = 10_000
+IDLE_HOST_SECONDS = 600.0
+
+
+@dataclass
+class HostState:
+    delay: float
+    min_delay: float = 0.0  # floor from robots.txt Crawl-delay
+    active: int = 0
+    next_start: float = 0.0  # monotonic time the next request may start
+    throttled: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ScrapeScheduler:
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int,
+        initial_concurrency: int,
+        per_host_limit: int,
+        per_host_delay: float,
+        latency_target: float,
+    ):
+        self.max_concurrency = max(max_concurrency, 1)
+        self.min_concurrency = max(min(min_concurrency, self.max_concurrency), 1)
+        self.limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.per_host_limit = max(per_host_limit, 1)
+        self.per_host_delay = max(per_host_delay, 0.0)
+        self.latency_target = latency_target
+        self.active = 0
+        self.waiting = 0
+        self._hosts: dict[str, HostState] = {}
+        self._waiters: list[asyncio.Future] = []
+        self._last_backoff = 0.0
+        metrics.SCRAPER_CONCURRENCY_LIMIT.set(self.limit)
+
+    # ── Slots ────────────────────────────────────────────────────────────
+
+    def _host(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= MAX_TRACKED_HOSTS:
+                self._prune()
+            state = self._hosts[host] = HostState(delay=self.per_host_delay)
+        return state
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - IDLE_HOST_SECONDS
+        for host in [h for h, s in self._hosts.items() if s.active == 0 and s.last_used < cutoff]:
+            del self._hosts[host]
+
+    async def _wait_for_change(self) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        finally:
+            if future in self._waiters:
+                self._waiters.remove(future)
+
+    def _wake_all(self) -> None:
+        waiters, self._waiters = self._waiters, []
+        for future in waiters:
+            if not future.done() and not future.get_loop().is_closed():
+                future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Hold a host slot and a global slot for the duration of one fetch."""
+        host = (urlparse(url).hostname or "").lower()
+        state = self._host(host)
+        self.waiting += 1
+        metrics.QUEUE_DEPTH.inc(queue="scraper")
+        acquired_host = False
+        try:
+            while state.active >= self.per_host_limit:
+                await self._wait_for_change()
+            state.active += 1
+            acquired_host = True
+
+            # Reserve a start time respecting the host delay, then wait for it
+            now = time.monotonic()
+            start_at = max(now, state.next_start)
+            state.next_start = start_at + state.delay
+            if start_at > now:
+                await asyncio.sleep(start_at - now)
+
+            while self.active >= int(self.limit):
+                await self._wait_for_change()
+            self.active += 1
+        except BaseException:
+            if acquired_host:
+                state.active -= 1
+                self._wake_all()
+            raise
+        finally:
+            self.waiting -= 1
+            metrics.QUEUE_DEPTH.dec(queue="scraper")
+
+        metrics.IN_FLIGHT.inc(queue="scraper")
+        try:
+            yield
+        finally:
+            metrics.IN_FLIGHT.dec(queue="scraper")
+            self.active -= 1
+            state.active -= 1
+            state.last_used = time.monotonic()
+            self._wake_all()
+
+    # ── Feedback ─────────────────────────────────────────────────────────
+
+    def record(
+        self,
+        url: str,
+        latency: float,
+        status_code: Optional[int] = None,
+        timed_out: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Adjust limits from the outcome of one fetch."""
+        state = self._host((urlparse(url).hostname or "").lower())
+        throttled = timed_out or status_code in THROTTLE_STATUSES
+
+        if throttled:
+            state.throttled += 1
+            state.delay = min(max(state.delay * 2, 1.0, retry_after or 0.0), MAX_HOST_DELAY_SECONDS)
+            state.next_start = max(state.next_start, time.monotonic() + (retry_after or state.delay))
+            now = time.monotonic()
+            if now - self._last_backoff >= BACKOFF_WINDOW_SECONDS:
+                self._last_backoff = now
+                self.limit = max(self.limit / 2, float(self.min_concurrency))
+                logger.info(f"Scraper backing off to {int(self.limit)} concurrent fetches")
+        elif status_code is not None and status_code < 400:
+            # Recover the host delay gradually once it stops throttling
+            state.delay = max(state.delay * 0.75, self.per_host_delay, state.min_delay)
+            if latency <= self.latency_target:
+                self.limit = min(self.limit + 1 / max(self.limit, 1.0), float(self.max_concurrency))
+        metrics.SCRAPER_CONCURRENCY_LIMIT.set(self.limit)
+        self._wake_all()
+
+    def set_crawl_delay(self, url: str, delay: float) -> None:
+        """Never start requests to this host closer together than ``delay``."""
+        state = self._host((urlparse(url).hostname or "").lower())
+        state.min_delay = min(max(delay, 0.0), MAX_HOST_DELAY_SECONDS)
+        state.delay = max(state.delay, state.min_delay)
+
+    def snapshot(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "active": self.active,
+            "waiting": self.waiting,
+            "hosts": len(self._hosts),
+        }
+
+
+def _from_settings() -> ScrapeScheduler:
+    return ScrapeScheduler(
+        max_concurrency=settings.SCRAPER_MAX_CONCURRENCY,
+        min_concurrency=settings.SCRAPER_MIN_CONCURRENCY,
+        initial_concurrency=settings.SCRAPER_INITIAL_CONCURRENCY,
+        per_host_limit=settings.SCRAPER_PER_HOST_CONCURRENCY,
+        per_host_delay=settings.SCRAPER_PER_HOST_DELAY_SECONDS,
+        latency_target=settings.SCRAPER_LATENCY_TARGET_SECONDS,
+    )
+
+
+scheduler = _from_settings()
@@ -1,30 +1,57 @@
 import asyncio
 import logging
 import re
+import time
 from typing import Optional
+from urllib.parse import urldefrag, urljoin, urlparse
 
 import httpx
 from bs4 import BeautifulSoup
 
-logger = logging.getLogger(__name__)
+from app.core.config import settings
+from app.services import dns_cache, metering, metrics, robots_cache, tracing, url_canon
+from app.services.scrape_scheduler import scheduler
 
-# Limit concurrent scraping to 5 at a time
-_semaphore = asyncio.Semaphore(5)
+logger = logging.getLogger(__name__)
 
 EMAIL_REGEX = re.compile(
     r"[a-zA-Z0-9._%+\-]+@[a-zA-Z0-9.\-]+\.[a-zA-Z]{2,}"
 )
 
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml")
 
-async def scrape(url: str) -> dict:
-    """Scrape a URL and extract useful content for lead enrichment."""
-    async with _semaphore:
-        return await _scrape_impl(url)
+# Same-site links kept per page for the crawler to choose from
+MAX_LINKS = 150
 
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/121.0.0.0 Safari/537.36"
+)
 
-async def _scrape_impl(url: str) -> dict:
-    """Internal scraping implementation."""
-    result = {
+robots = robots_cache.RobotsCache(
+    ttl=settings.ROBOTS_CACHE_TTL_SECONDS,
+    error_ttl=settings.ROBOTS_ERROR_TTL_SECONDS,
+    user_agent=USER_AGENT,
+)
+
+
+def _accept_encoding() -> str:
+    """Advertise brotli only when httpx can decode it (brotli/brotlicffi installed)."""
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+            return "gzip, deflate, br"
+        except ImportError:
+            continue
+    return "gzip, deflate"
+
+
+ACCEPT_ENCODING = _accept_encoding()
+
+
+def _empty_result(url: str) -> dict:
+    return {
         "url": url,
         "title": "",
         "meta_description": "",
@@ -34,86 +61,62 @@ async def _scrape_impl(url: str) -> dict:
         "error": None,
     }
 
+
+async def scrape(url: str) -> dict:
+    """Scrape a URL and extract useful content for lead enrichment."""
+    if settings.SCRAPER_RESPECT_ROBOTS:
+        rules = await robots.rules(url)
+        if not rules.can_fetch(USER_AGENT, url):
+            result = _empty_result(url)
+            result["error"] = "Disallowed by robots.txt"
+            return result
+        delay = robots.crawl_delay(rules)
+        if delay:
+            scheduler.set_crawl_delay(url, delay)
+    async with scheduler.slot(url):
+        return await _scrape_impl(url)
+
+
+async def _scrape_impl(url: str) -> dict:
+    """Internal scraping implementation."""
+    result = _empty_result(url)
+
     try:
         headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/121.0.0.0 Safari/537.36"
-            ),
+            "User-Agent": USER_AGENT,
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             "Accept-Language": "en-US,en;q=0.5",
+            "Accept-Encoding": ACCEPT_ENCODING,
         }
 
-        async with httpx.AsyncClient(
-            timeout=10.0, follow_redirects=True, verify=False
-        ) as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
+        started = time.perf_counter()
+        with metering.track("scraper", "fetch"), tracing.client_span("scraper", url) as span:
+            async with httpx.AsyncClient(
+                timeout=10.0, follow_redirects=True, verify=False, transport=dns_cache.transport(verify=False)
+            ) as client:
+                # Stream so the body is only transferred once headers say it's worth it
+                async with client.stream("GET", url, headers=headers) as response:
+                    tracing.record_response(span, response)
+                    scheduler.record(
+                        url,
+                        time.perf_counter() - started,
+                        status_code=response.status_code,
+                        retry_after=_retry_after(response),
+                    )
+                    response.raise_for_status()
+                    html, error = await _read_html(response)
+                    final_url = str(response.url)
+                tracing.record_response(span, response)
+                metrics.SCRAPER_BYTES.inc(response.num_bytes_downloaded)
 
-        content_type = response.headers.get("content-type", "")
-        if "text/html" not in content_type and "application/xhtml" not in content_type:
-            result["error"] = f"Non-HTML content type: {content_type}"
+        if error:
+            result["error"] = error
             return result
 
-        html = response.text
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Remove script and style elements
-        for tag in soup(["script", "style", "noscript", "iframe"]):
-            tag.decompose()
-
-        # Title
-        title_tag = soup.find("title")
-        if title_tag:
-            result["title"] = title_tag.get_text(strip=True)
-
-        # Meta description
-        meta_desc = soup.find("meta", attrs={"name": "description"})
-        if meta_desc:
-            result["meta_description"] = meta_desc.get("content", "")
-
-        # Text content (first 2000 chars)
-        body = soup.find("body")
-        if body:
-            text = body.get_text(separator=" ", strip=True)
-            # Clean up excessive whitespace
-            text = re.sub(r"\s+", " ", text)
-            result["text_content"] = text[:2000]
-
-        # Extract emails from the full HTML
-        full_text = soup.get_text()
-        found_emails = set(EMAIL_REGEX.findall(full_text))
-        # Filter out common false positives
-        filtered_emails = [
-            e
-            for e in found_emails
-            if not e.endswith((".png", ".jpg", ".gif", ".css", ".js"))
-            and "example.com" not in e
-            and "sentry.io" not in e
-        ]
-        result["emails"] = list(filtered_emails)[:10]
-
-        # Social links
-        social_domains = [
-            "linkedin.com",
-            "twitter.com",
-            "x.com",
-            "facebook.com",
-            "instagram.com",
-            "youtube.com",
-            "github.com",
-        ]
-        social_links = set()
-        for a_tag in soup.find_all("a", href=True):
-            href = a_tag["href"]
-            for domain in social_domains:
-                if domain in href:
-                    social_links.add(href)
-                    break
-        result["social_links"] = list(social_links)[:20]
+        result.update(parse_html(html, base_url=final_url))
 
     except httpx.TimeoutException:
+        scheduler.record(url, time.perf_counter() - started, timed_out=True)
         result["error"] = "Request timed out after 10 seconds"
     except httpx.HTTPStatusError as e:
         result["error"] = f"HTTP {e.response.status_code}"
@@ -123,9 +126,166 @@ async def _scrape_impl(url: str) -> dict:
     return result
 
 
+def _content_length(response: httpx.Response) -> Optional[int]:
+    try:
+        return int(response.headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+
+async def _read_html(response: httpx.Response) -> tuple[Optional[str], Optional[str]]:
+    """Read an HTML body from a streamed response, up to ``SCRAPER_MAX_BYTES``.
+
+    Returns ``(html, error)``. Non-HTML responses are rejected from their
+    headers without reading the body; oversized pages are cut off at the cap
+    and the connection is closed early. Bytes avoided are counted using the
+    declared Content-Length where the server sent one.
+    """
+    content_type = response.headers.get("content-type", "")
+    declared = _content_length(response)
+    if not any(t in content_type for t in HTML_CONTENT_TYPES):
+        metrics.SCRAPER_ABORTED.inc(reason="non_html")
+        metrics.SCRAPER_BYTES_SAVED.inc(declared or 0, reason="non_html")
+        return None, f"Non-HTML content type: {content_type}"
+
+    cap = settings.SCRAPER_MAX_BYTES
+    chunks: list[bytes] = []
+    size = 0
+    truncated = False
+    async for chunk in response.aiter_bytes():
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= cap:
+            truncated = size > cap or (declared is not None and declared > response.num_bytes_downloaded)
+            break
+
+    if truncated:
+        metrics.SCRAPER_ABORTED.inc(reason="oversized")
+        if declared is not None:
+            metrics.SCRAPER_BYTES_SAVED.inc(max(declared - response.num_bytes_downloaded, 0), reason="oversized")
+        logger.info(f"Truncated {response.url} at {cap} bytes")
+
+    body = b"".join(chunks)[:cap]
+    return body.decode(response.encoding or "utf-8", errors="replace"), None
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Seconds from a numeric ``Retry-After`` header, if present."""
+    value = response.headers.get("retry-after", "")
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def _same_site(host: str, other: str) -> bool:
+    strip = lambda h: h[4:] if h.startswith("www.") else h
+    return strip(host.lower()) == strip(other.lower())
+
+
+def parse_html(html: str, base_url: Optional[str] = None) -> dict:
+    """Extract title, meta description, text, emails and social links from HTML.
+
+    With ``base_url``, same-site links are also returned (absolute, with their
+    anchor text) so a crawler can pick follow-up pages.
+    """
+    content = {
+        "title": "",
+        "meta_description": "",
+        "text_content": "",
+        "emails": [],
+        "social_links": [],
+        "links": [],
+    }
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Remove script and style elements
+    for tag in soup(["script", "style", "noscript", "iframe"]):
+        tag.decompose()
+
+    # Title
+    title_tag = soup.find("title")
+    if title_tag:
+        content["title"] = title_tag.get_text(strip=True)
+
+    # Meta description
+    meta_desc = soup.find("meta", attrs={"name": "description"})
+    if meta_desc:
+        content["meta_description"] = meta_desc.get("content", "")
+
+    # Text content (first 2000 chars)
+    body = soup.find("body")
+    if body:
+        text = body.get_text(separator=" ", strip=True)
+        # Clean up excessive whitespace
+        text = re.sub(r"\s+", " ", text)
+        content["text_content"] = text[:2000]
+
+    # Extract emails from the full HTML
+    full_text = soup.get_text()
+    found_emails = set(EMAIL_REGEX.findall(full_text))
+    # Filter out common false positives
+    filtered_emails = [
+        e
+        for e in found_emails
+        if not e.endswith((".png", ".jpg", ".gif", ".css", ".js"))
+        and "example.com" not in e
+        and "sentry.io" not in e
+    ]
+    # mailto: links often hide the address behind a name or "Email us"
+    for a_tag in soup.select('a[href^="mailto:"]'):
+        address = a_tag["href"][len("mailto:"):].split("?", 1)[0].strip()
+        if EMAIL_REGEX.fullmatch(address) and address not in filtered_emails:
+            filtered_emails.append(address)
+    content["emails"] = list(filtered_emails)[:10]
+
+    # Social links
+    social_domains = [
+        "linkedin.com",
+        "twitter.com",
+        "x.com",
+        "facebook.com",
+        "instagram.com",
+        "youtube.com",
+        "github.com",
+    ]
+    social_links = set()
+    for a_tag in soup.find_all("a", href=True):
+        href = a_tag["href"]
+        for domain in social_domains:
+            if domain in href:
+                social_links.add(href)
+                break
+    content["social_links"] = list(social_links)[:20]
+
+    if base_url:
+        base_host = urlparse(base_url).hostname or ""
+        seen = set()
+        for a_tag in soup.find_all("a", href=True):
+            href = urldefrag(urljoin(base_url, a_tag["href"].strip()))[0]
+            parsed = urlparse(href)
+            if parsed.scheme not in ("http", "https") or not _same_site(parsed.hostname or "", base_host):
+                continue
+            href = url_canon.canonical_url(href)
+            if url_canon.url_key(href) in seen:
+                continue
+            seen.add(url_canon.url_key(href))
+            content["links"].append({"url": href, "text": a_tag.get_text(" ", strip=True)[:80]})
+            if len(content["links"]) >= MAX_LINKS:
+                break
+
+    return content
+
+
 async def scrape_many(urls: list[str]) -> list[dict]:
-    """Scrape multiple URLs concurrently (limited by semaphore)."""
-    tasks = [scrape(url) for url in urls]
+    """Scrape multiple URLs concurrently (limited by semaphore).
+
+    URLs that canonicalize to the same page are fetched once.
+    """
+    unique = {}
+    for url in urls:
+        unique.setdefault(url_canon.url_key(url), url)
+    tasks = [scrape(url) for url in unique.values()]
     results = await asyncio.gather(*tasks, return_exceptions=True)
     final = []
     for r in results:
@@ -1,85 +1,233 @@
+"""
+Serper.dev Google search.
+
+By default queries go out in batch mode: Serper accepts an array of queries
+in one POST and answers with one result object per query. ``batcher``
+collects the queries submitted within ``SERPER_BATCH_WINDOW_MS`` — a
+pipeline's whole query list, plus those of any other pipelines searching at
+the same moment — into one request per API key, and hands each caller back
+the results for its own queries. Identical queries in one window are sent
+once. With ``SERPER_BATCH_MODE`` off, each query is its own request.
+
+``search_domains`` pages through results lazily: further pages are only
+requested, for queries that still have more, while fewer than the wanted
+number of distinct company domains have turned up.
+"""
+
 import asyncio
+import contextvars
 import logging
-from typing import Optional
-from urllib.parse import urlparse
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Union
 
 import httpx
 
 from app.core.config import settings
+from app.services import metering, tracing, url_canon
 
 logger = logging.getLogger(__name__)
 
 SERPER_URL = "https://google.serper.dev/search"
 
 
+def _parse_organic(data: dict, offset: int = 0) -> list[dict]:
+    results = []
+    organic = data.get("organic", [])
+    for i, item in enumerate(organic):
+        link = item.get("link", "")
+        url = url_canon.canonical_url(link) if link else ""
+        domain = url_canon.registrable_domain(link) if link else ""
+        results.append(
+            {
+                "title": item.get("title", ""),
+                "url": url,
+                "snippet": item.get("snippet", ""),
+                "domain": domain,
+                "position": offset + i + 1,
+                "raw_data": item,
+            }
+        )
+    return results
+
+
+def _payload(query: str, num_results: int, page: int = 1) -> dict:
+    payload = {"q": query, "num": num_results}
+    if page > 1:
+        payload["page"] = page
+    return payload
+
+
 async def _search_single(
-    query: str, api_key: str, num_results: int = 10
+    query: str, api_key: str, num_results: int = 10, page: int = 1
 ) -> list[dict]:
     """Execute a single search query against the Serper API."""
     headers = {
         "X-API-KEY": api_key,
         "Content-Type": "application/json",
     }
-    payload = {
-        "q": query,
-        "num": num_results,
+    payload = _payload(query, num_results, page)
+
+    with metering.track("serper", "search"), tracing.client_span("serper", SERPER_URL) as span:
+        async with httpx.AsyncClient(timeout=15.0) as client:
+            response = await client.post(SERPER_URL, json=payload, headers=headers)
+            tracing.record_response(span, response)
+            response.raise_for_status()
+            data = response.json()
+
+    return _parse_organic(data, offset=(page - 1) * num_results)
+
+
+async def _search_batch(
+    requests: list[tuple[str, int]], api_key: str, num_results: int = 10
+) -> list[list[dict]]:
+    """Execute several ``(query, page)`` searches in one Serper request; results are in order."""
+    headers = {
+        "X-API-KEY": api_key,
+        "Content-Type": "application/json",
     }
+    payload = [_payload(query, num_results, page) for query, page in requests]
 
     async with httpx.AsyncClient(timeout=15.0) as client:
         response = await client.post(SERPER_URL, json=payload, headers=headers)
         response.raise_for_status()
         data = response.json()
 
-    results = []
-    organic = data.get("organic", [])
-    for i, item in enumerate(organic):
-        url = item.get("link", "")
-        domain = ""
-        if url:
-            try:
-                parsed = urlparse(url)
-                domain = parsed.netloc.replace("www.", "")
-            except Exception:
-                domain = ""
-        results.append(
-            {
-                "title": item.get("title", ""),
-                "url": url,
-                "snippet": item.get("snippet", ""),
-                "domain": domain,
-                "position": i + 1,
-                "raw_data": item,
-            }
-        )
+    if not isinstance(data, list) or len(data) != len(requests):
+        raise ValueError(f"Serper batch returned {type(data).__name__} for {len(requests)} queries")
+    return [
+        _parse_organic(item or {}, offset=(page - 1) * num_results)
+        for item, (_, page) in zip(data, requests)
+    ]
+
+
+@dataclass
+class _Batch:
+    api_key: str
+    num_results: int
+    loop: asyncio.AbstractEventLoop
+    futures: dict[tuple[str, int], asyncio.Future] = field(default_factory=dict)  # (query, page) -> results
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class SearchBatcher:
+    """Coalesces queries submitted within ``window`` seconds into batch requests."""
+
+    def __init__(self, window: float, max_queries: int, send=None):
+        self.window = window
+        self.max_queries = max(max_queries, 1)
+        self._send = send or _search_batch
+        self._open: dict[tuple[str, int], _Batch] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def search(
+        self, requests: list[tuple[str, int]], api_key: str, num_results: int = 10
+    ) -> list[Union[list[dict], BaseException]]:
+        """Results (or the exception) for each ``(query, page)``, in order."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for request in requests:
+            batch = self._open_batch(api_key, num_results, loop)
+            future = batch.futures.get(request)
+            if future is None:
+                future = batch.futures[request] = loop.create_future()
+            futures.append(future)
+            if len(batch.futures) >= self.max_queries:
+                self._dispatch(batch)
+        # Shield the shared futures: one caller giving up mustn't cancel
+        # a query another session is waiting on too
+        return await asyncio.gather(*(asyncio.shield(f) for f in futures), return_exceptions=True)
+
+    def _open_batch(self, api_key: str, num_results: int, loop: asyncio.AbstractEventLoop) -> _Batch:
+        key = (api_key, num_results)
+        batch = self._open.get(key)
+        if batch is None or batch.loop is not loop:
+            batch = self._open[key] = _Batch(api_key, num_results, loop)
+            batch.timer = loop.call_later(self.window, self._dispatch, batch)
+        return batch
+
+    def _dispatch(self, batch: _Batch) -> None:
+        key = (batch.api_key, batch.num_results)
+        if self._open.get(key) is batch:
+            del self._open[key]
+        if batch.timer is not None:
+            batch.timer.cancel()
+        # Run outside the first caller's metering/tracing scope; each caller
+        # accounts for its own queries
+        task = batch.loop.create_task(self._run(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _Batch) -> None:
+        requests = list(batch.futures)
+        try:
+            results = await self._send(requests, batch.api_key, batch.num_results)
+        except Exception as e:
+            logger.error(f"Serper batch of {len(requests)} queries failed: {e}")
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for request, result in zip(requests, results):
+            if not batch.futures[request].done():
+                batch.futures[request].set_result(result)
+
+
+batcher = SearchBatcher(
+    window=settings.SERPER_BATCH_WINDOW_MS / 1000,
+    max_queries=settings.SERPER_BATCH_MAX_QUERIES,
+)
+
+
+async def _search_batched(requests: list[tuple[str, int]], api_key: str, num_results: int) -> list:
+    with metering.track("serper", "search") as call, \
+            tracing.client_span("serper", SERPER_URL, queries=len(requests), batched=True) as span:
+        # Serper bills per query, batched or not
+        call["call_count"] = len(requests)
+        results = await batcher.search(requests, api_key, num_results)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            call["success"] = len(errors) < len(results)
+            if span is not None:
+                span["error"] = str(errors[0])[:300]
     return results
 
 
+async def _fetch(requests: list[tuple[str, int]], api_key: str, num_results: int) -> list:
+    """Results (or the exception) for each ``(query, page)``, batched or one request each."""
+    if settings.SERPER_BATCH_MODE:
+        return await _search_batched(requests, api_key, num_results)
+    tasks = [_search_single(query, api_key, num_results, page) for query, page in requests]
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _api_key_error() -> list[dict]:
+    return [
+        {
+            "error": "Serper API key is not configured. Please add it in Settings.",
+        }
+    ]
+
+
 async def search(
     queries: list[str], num_results: int = 10, api_key_override: Optional[str] = None
 ) -> list[dict]:
     """Execute multiple search queries concurrently and deduplicate by URL."""
     api_key = api_key_override or settings.get_api_key("serper")
     if not api_key:
-        return [
-            {
-                "error": "Serper API key is not configured. Please add it in Settings.",
-            }
-        ]
-
-    tasks = [_search_single(query, api_key, num_results) for query in queries]
+        return _api_key_error()
 
     all_results = []
     try:
-        results_lists = await asyncio.gather(*tasks, return_exceptions=True)
+        results_lists = await _fetch([(query, 1) for query in queries], api_key, num_results)
         seen_urls = set()
         for result_or_error in results_lists:
             if isinstance(result_or_error, Exception):
                 logger.error(f"Serper search error: {result_or_error}")
                 continue
             for item in result_or_error:
-                url = item.get("url", "")
-                if url and url not in seen_urls:
-                    seen_urls.add(url)
+                key = url_canon.url_key(item.get("url", ""))
+                if key and key not in seen_urls:
+                    seen_urls.add(key)
                     all_results.append(item)
     except Exception as e:
         logger.error(f"Unexpected error in serper search: {e}")
@@ -88,6 +236,66 @@ async def search(
     return all_results
 
 
+def _has_domain(result: dict) -> bool:
+    return bool(result.get("domain"))
+
+
+async def search_domains(
+    queries: list[str],
+    min_domains: int,
+    max_pages: int = 3,
+    num_results: int = 10,
+    api_key_override: Optional[str] = None,
+    accept: Optional[Callable[[dict], bool]] = None,
+) -> list[dict]:
+    """Search page by page until ``min_domains`` distinct domains are found.
+
+    Every query's first page is fetched; after that, the next page of each
+    query whose last page came back full is requested only while fewer than
+    ``min_domains`` distinct domains of ``accept``-ed results have been seen,
+    up to ``max_pages`` pages per query. Returns every result seen (deduped
+    by canonical URL, earlier pages first).
+    """
+    api_key = api_key_override or settings.get_api_key("serper")
+    if not api_key:
+        return _api_key_error()
+    accept = accept or _has_domain
+
+    all_results = []
+    seen_urls = set()
+    domains = set()
+    pending = list(dict.fromkeys(queries))
+    page = 0
+    try:
+        while pending and page < max_pages:
+            page += 1
+            results_lists = await _fetch([(query, page) for query in pending], api_key, num_results)
+            more = []
+            for query, result_or_error in zip(pending, results_lists):
+                if isinstance(result_or_error, Exception):
+                    logger.error(f"Serper search error: {result_or_error}")
+                    continue
+                # A short page means the query has run out of results
+                if len(result_or_error) >= num_results:
+                    more.append(query)
+                for item in result_or_error:
+                    key = url_canon.url_key(item.get("url", ""))
+                    if key and key not in seen_urls:
+                        seen_urls.add(key)
+                        all_results.append(item)
+                        if accept(item):
+                            domains.add(item["domain"])
+            if len(domains) >= min_domains:
+                break
+            pending = more
+    except Exception as e:
+        logger.error(f"Unexpected error in serper search: {e}")
+        return [{"error": str(e)}]
+
+    logger.info(f"Serper: {len(domains)} domains from {len(all_results)} results over {page} page(s)")
+    return all_results
+
+
 async def test_api_key(api_key: str) -> dict:
     """Test a Serper API key by making a simple search request."""
     try:
@@ -0,0 +1,374 @@
+"""Structured tracing for pipeline runs.
+
+A trace is opened per pipeline session. Each stage gets a span, and every
+outbound call (OpenAI, Serper, Apollo, scraped websites) gets a client span
+recording service, host, status, duration and bytes. Finished spans are
+buffered in memory, persisted to ``trace_spans`` by ``flush`` and can be
+summarized into a waterfall and critical path.
+
+When ``OTEL_EXPORTER_OTLP_ENDPOINT`` is set, flushed spans are also sent to
+that collector using the OTLP/HTTP JSON encoding.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+from urllib.parse import urlparse
+
+import httpx
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.trace_span import TraceSpan
+
+logger = logging.getLogger(__name__)
+
+# (trace_id, root span, current span) for the running task
+_current: ContextVar[Optional[tuple[str, dict, dict]]] = ContextVar("trace_context", default=None)
+
+_lock = threading.Lock()
+_pending: dict[str, list[dict]] = {}  # trace_id -> finished spans
+_open_stages: dict[str, dict] = {}  # trace_id -> currently open stage span
+
+_SPAN_FIELDS = ("service", "host", "status_code", "bytes", "error")
+
+# Callables invoked with every finished span (e.g. metrics collection)
+_finish_hooks: list = []
+
+
+def _new_span(trace_id: str, parent: Optional[dict], name: str, kind: str, attributes: dict) -> dict:
+    span = {
+        "trace_id": trace_id,
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": parent["span_id"] if parent else None,
+        "name": name,
+        "kind": kind,
+        "service": None,
+        "host": None,
+        "status_code": None,
+        "bytes": None,
+        "error": None,
+        "start_ts": time.time(),
+        "duration_ms": 0.0,
+        "attributes": {},
+        "_started": time.perf_counter(),
+    }
+    for key, value in attributes.items():
+        if key in _SPAN_FIELDS:
+            span[key] = value
+        else:
+            span["attributes"][key] = value
+    return span
+
+
+def _finish(span: dict) -> None:
+    span["duration_ms"] = round((time.perf_counter() - span.pop("_started")) * 1000, 2)
+    with _lock:
+        _pending.setdefault(span["trace_id"], []).append(span)
+    for hook in _finish_hooks:
+        try:
+            hook(span)
+        except Exception as e:
+            logger.debug(f"Span finish hook failed: {e}")
+
+
+def add_finish_hook(hook) -> None:
+    if hook not in _finish_hooks:
+        _finish_hooks.append(hook)
+
+
+@contextmanager
+def trace(trace_id: str, name: str = "pipeline", **attributes) -> Iterator[dict]:
+    """Open a trace with a root span; spans created inside attach to it."""
+    root = _new_span(trace_id, None, name, "internal", attributes)
+    token = _current.set((trace_id, root, root))
+    try:
+        yield root
+    except BaseException as e:
+        root["error"] = str(e)[:300]
+        raise
+    finally:
+        end_stage(trace_id)
+        _current.reset(token)
+        _finish(root)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes) -> Iterator[Optional[dict]]:
+    """Record a child span of the current span. No-op outside a trace.
+
+    The yielded dict may be updated (``status_code``, ``bytes``, ``error`` or
+    entries in ``attributes``) before the block exits.
+    """
+    ctx = _current.get()
+    if ctx is None:
+        yield None
+        return
+    trace_id, root, parent = ctx
+    child = _new_span(trace_id, parent, name, kind, attributes)
+    token = _current.set((trace_id, root, child))
+    try:
+        yield child
+    except BaseException as e:
+        child["error"] = child["error"] or str(e)[:300]
+        raise
+    finally:
+        _current.reset(token)
+        _finish(child)
+
+
+@contextmanager
+def client_span(service: str, url: str, **attributes) -> Iterator[Optional[dict]]:
+    """Span for one outbound HTTP call to ``service``."""
+    host = urlparse(url).hostname or ""
+    with span(f"{service} {host}", kind="client", service=service, host=host, **attributes) as sp:
+        yield sp
+
+
+def record_response(sp: Optional[dict], response: httpx.Response, num_bytes: Optional[int] = None) -> None:
+    """Copy status and body size from a response onto a client span."""
+    if sp is None:
+        return
+    sp["status_code"] = response.status_code
+    if num_bytes is None:
+        num_bytes = response.num_bytes_downloaded
+    sp["bytes"] = num_bytes
+
+
+def start_stage(name: str) -> None:
+    """End the open stage span (if any) and start a new one under the root.
+
+    Spans created afterwards in this task attach to the new stage.
+    """
+    ctx = _current.get()
+    if ctx is None:
+        return
+    trace_id, root, _ = ctx
+    end_stage(trace_id)
+    stage = _new_span(trace_id, root, name, "stage", {})
+    with _lock:
+        _open_stages[trace_id] = stage
+    _current.set((trace_id, root, stage))
+
+
+def end_stage(trace_id: str) -> None:
+    with _lock:
+        stage = _open_stages.pop(trace_id, None)
+    if stage is None:
+        return
+    _finish(stage)
+    ctx = _current.get()
+    if ctx is not None and ctx[2] is stage:
+        _current.set((trace_id, ctx[1], ctx[1]))
+
+
+def get_pending(trace_id: str) -> list[dict]:
+    with _lock:
+        return list(_pending.get(trace_id, []))
+
+
+def flush(db: Session, trace_id: str) -> list[dict]:
+    """Persist buffered spans for a trace and return them."""
+    with _lock:
+        spans = _pending.pop(trace_id, [])
+    if not spans:
+        return []
+    try:
+        db.add_all([
+            TraceSpan(
+                id=s["span_id"],
+                session_id=trace_id,
+                parent_id=s["parent_id"],
+                name=s["name"],
+                kind=s["kind"],
+                service=s["service"],
+                host=s["host"],
+                status_code=s["status_code"],
+                bytes=s["bytes"],
+                error=s["error"],
+                start_ts=s["start_ts"],
+                duration_ms=s["duration_ms"],
+                attributes=json.dumps(s["attributes"], default=str) if s["attributes"] else None,
+            )
+            for s in spans
+        ])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[{trace_id}] Failed to persist {len(spans)} trace spans: {e}")
+    return spans
+
+
+def load_spans(db: Session, trace_id: str) -> list[dict]:
+    """Persisted spans for a trace plus any still buffered in memory."""
+    rows = db.query(TraceSpan).filter(TraceSpan.session_id == trace_id).all()
+    spans = [
+        {
+            "trace_id": trace_id,
+            "span_id": row.id,
+            "parent_id": row.parent_id,
+            "name": row.name,
+            "kind": row.kind,
+            "service": row.service,
+            "host": row.host,
+            "status_code": row.status_code,
+            "bytes": row.bytes,
+            "error": row.error,
+            "start_ts": row.start_ts,
+            "duration_ms": row.duration_ms,
+            "attributes": json.loads(row.attributes) if row.attributes else {},
+        }
+        for row in rows
+    ]
+    return spans + get_pending(trace_id)
+
+
+def summarize(spans: list[dict]) -> dict:
+    """Build a waterfall, per-stage and per-service totals and the critical path."""
+    if not spans:
+        return {"total_ms": 0.0, "waterfall": [], "stages": [], "services": [], "critical_path": []}
+
+    spans = sorted(spans, key=lambda s: s["start_ts"])
+    by_id = {s["span_id"]: s for s in spans}
+    children: dict[Optional[str], list[dict]] = {}
+    for s in spans:
+        parent_id = s["parent_id"] if s["parent_id"] in by_id else None
+        children.setdefault(parent_id, []).append(s)
+
+    origin = spans[0]["start_ts"]
+    end_ms = lambda s: (s["start_ts"] - origin) * 1000 + s["duration_ms"]
+    total_ms = max(end_ms(s) for s in spans)
+
+    def depth(s: dict) -> int:
+        d = 0
+        while s["parent_id"] in by_id:
+            s = by_id[s["parent_id"]]
+            d += 1
+        return d
+
+    waterfall = [
+        {
+            "span_id": s["span_id"],
+            "parent_id": s["parent_id"],
+            "name": s["name"],
+            "kind": s["kind"],
+            "service": s["service"],
+            "host": s["host"],
+            "status_code": s["status_code"],
+            "bytes": s["bytes"],
+            "error": s["error"],
+            "offset_ms": round((s["start_ts"] - origin) * 1000, 2),
+            "duration_ms": s["duration_ms"],
+            "depth": depth(s),
+        }
+        for s in spans
+    ]
+
+    stages = [
+        {
+            "name": s["name"],
+            "duration_ms": s["duration_ms"],
+            "pct": round(100 * s["duration_ms"] / total_ms, 1) if total_ms else 0.0,
+        }
+        for s in spans if s["kind"] == "stage"
+    ]
+
+    services: dict[str, dict] = {}
+    for s in spans:
+        if s["kind"] != "client":
+            continue
+        entry = services.setdefault(
+            s["service"] or "unknown",
+            {"service": s["service"] or "unknown", "calls": 0, "errors": 0,
+             "total_ms": 0.0, "max_ms": 0.0, "bytes": 0},
+        )
+        entry["calls"] += 1
+        entry["total_ms"] = round(entry["total_ms"] + s["duration_ms"], 2)
+        entry["max_ms"] = max(entry["max_ms"], s["duration_ms"])
+        entry["bytes"] += s["bytes"] or 0
+        if s["error"] or (s["status_code"] or 0) >= 400:
+            entry["errors"] += 1
+
+    # Critical path: from each root, follow the child that finished last
+    critical_path = []
+    node = max(children.get(None, []), key=end_ms, default=None)
+    while node is not None:
+        critical_path.append({
+            "span_id": node["span_id"],
+            "name": node["name"],
+            "duration_ms": node["duration_ms"],
+        })
+        node = max(children.get(node["span_id"], []), key=end_ms, default=None)
+
+    return {
+        "total_ms": round(total_ms, 2),
+        "waterfall": waterfall,
+        "stages": stages,
+        "services": sorted(services.values(), key=lambda e: e["total_ms"], reverse=True),
+        "critical_path": critical_path,
+    }
+
+
+# ── OTLP export ──────────────────────────────────────────────────────────────
+
+_OTLP_KINDS = {"internal": 1, "stage": 1, "client": 3}
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(trace_id: str, spans: list[dict]) -> dict:
+    """Encode spans as an OTLP/HTTP JSON ``ExportTraceServiceRequest``."""
+    otlp_trace_id = trace_id.replace("-", "")[:32].rjust(32, "0")
+    encoded = []
+    for s in spans:
+        attributes = {k: s[k] for k in _SPAN_FIELDS if s.get(k) is not None}
+        attributes.update(s["attributes"])
+        start_ns = int(s["start_ts"] * 1e9)
+        encoded.append({
+            "traceId": otlp_trace_id,
+            "spanId": s["span_id"],
+            "parentSpanId": s["parent_id"] or "",
+            "name": s["name"],
+            "kind": _OTLP_KINDS.get(s["kind"], 1),
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int(s["duration_ms"] * 1e6)),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items()],
+            "status": {"code": 2, "message": s["error"]} if s["error"] else {"code": 0},
+        })
+    return {
+        "resourceSpans": [{
+            "resource": {
+                "attributes": [{"key": "service.name", "value": {"stringValue": "siyada-lead-gen"}}],
+            },
+            "scopeSpans": [{"scope": {"name": "app.services.tracing"}, "spans": encoded}],
+        }],
+    }
+
+
+async def export_otlp(trace_id: str, spans: list[dict]) -> None:
+    """Send spans to the configured OTLP/HTTP collector (best effort)."""
+    endpoint = settings.OTEL_EXPORTER_OTLP_ENDPOINT
+    if not endpoint or not spans:
+        return
+    try:
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            response = await client.post(
+                f"{endpoint.rstrip('/')}/v1/traces",
+                json=to_otlp(trace_id, spans),
+            )
+            response.raise_for_status()
+    except Exception as e:
+        logger.warning(f"[{trace_id}] OTLP trace export failed: {e}")
@@ -0,0 +1,179 @@
+"""URL canonicalization and registrable-domain extraction.
+
+Search results, scraped links and company lookups all refer to the same
+companies through differently spelled URLs: ``https://www.acme.com:443/``,
+``http://acme.com/?utm_source=x`` and ``https://blog.acme.com/post/`` are one
+company, and the first two are one page. This module gives every caller the
+same answer:
+
+- ``canonical_url`` drops fragments, default ports, tracking parameters and
+  trailing slashes, lowercases the scheme and host and sorts the query, so
+  equal pages compare equal (the result is still fetchable);
+- ``url_key`` is the dedup key for pages: the canonical URL without its
+  scheme or a leading ``www.``;
+- ``registrable_domain`` is the public suffix plus one label (``acme.com``,
+  ``acme.co.uk``, ``acme.github.io``), used as the company's domain.
+
+Public suffixes come from a bundled subset of the Public Suffix List
+(``data/public_suffix_list.dat``), or the full list at
+``PUBLIC_SUFFIX_LIST_PATH``, compiled once into a label trie.
+"""
+
+import ipaddress
+import logging
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_LIST = Path(__file__).resolve().parent / "data" / "public_suffix_list.dat"
+
+TRACKING_PARAMS = frozenset({
+    "gclid", "gclsrc", "dclid", "gbraid", "wbraid", "fbclid", "msclkid", "yclid", "twclid",
+    "igshid", "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "hsctatracking",
+    "mkt_tok", "oly_anon_id", "oly_enc_id", "vero_id", "ref", "ref_src", "srsltid",
+})
+TRACKING_PREFIXES = ("utm_", "pk_", "mtm_")
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Trie nodes are dicts keyed by label (right to left); these keys mark rules
+_RULE = "\x00rule"
+_EXCEPTION = "\x00exception"
+
+
+def compile_rules(lines: Iterable[str]) -> dict:
+    """Build the suffix trie from Public Suffix List lines."""
+    trie: dict = {}
+    for line in lines:
+        rule = line.strip().split()[0] if line.strip() else ""
+        if not rule or rule.startswith("//"):
+            continue
+        exception = rule.startswith("!")
+        labels = rule.lstrip("!").lower().split(".")
+        node = trie
+        for label in reversed(labels):
+            node = node.setdefault(label, {})
+        node[_EXCEPTION if exception else _RULE] = True
+    return trie
+
+
+def _load_trie() -> dict:
+    path = Path(settings.PUBLIC_SUFFIX_LIST_PATH) if settings.PUBLIC_SUFFIX_LIST_PATH else BUNDLED_LIST
+    try:
+        with open(path, encoding="utf-8") as f:
+            return compile_rules(f)
+    except OSError as e:
+        logger.error(f"Could not read public suffix list {path}: {e}; using the bundled list")
+        with open(BUNDLED_LIST, encoding="utf-8") as f:
+            return compile_rules(f)
+
+
+_trie = _load_trie()
+
+
+def hostname(value: str) -> str:
+    """Lowercase hostname from a URL or a bare host (``host:port/path`` allowed)."""
+    value = (value or "").strip()
+    if "://" not in value:
+        value = "//" + value
+    try:
+        host = urlsplit(value).hostname or ""
+    except ValueError:
+        return ""
+    return host.rstrip(".")
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def public_suffix_length(labels: list[str], trie: Optional[dict] = None) -> int:
+    """Number of trailing ``labels`` that form the public suffix.
+
+    Follows the PSL algorithm: the longest matching rule wins, wildcards
+    match any one label, exceptions drop their last label, and an unlisted
+    TLD counts as a one-label suffix.
+    """
+    node = trie if trie is not None else _trie
+    length = 1
+    for depth, label in enumerate(reversed(labels), start=1):
+        exact = node.get(label)
+        wildcard = node.get("*")
+        if exact is not None and exact.get(_EXCEPTION):
+            return depth - 1
+        if exact is not None and exact.get(_RULE):
+            length = depth
+        elif wildcard is not None and wildcard.get(_RULE):
+            length = depth
+        node = exact if exact is not None else wildcard
+        if node is None:
+            break
+    return length
+
+
+def public_suffix(value: str) -> str:
+    host = hostname(value)
+    if not host or _is_ip(host):
+        return ""
+    labels = host.split(".")
+    return ".".join(labels[-public_suffix_length(labels):])
+
+
+def registrable_domain(value: str) -> str:
+    """Public suffix plus one label of a URL's or bare host's hostname.
+
+    IP addresses and single-label hosts are returned unchanged; a host that
+    is itself a public suffix is returned as is. Empty for unparseable input.
+    """
+    host = hostname(value)
+    if not host or _is_ip(host):
+        return host
+    labels = host.split(".")
+    suffix = public_suffix_length(labels)
+    if suffix >= len(labels):
+        return host
+    return ".".join(labels[-(suffix + 1):])
+
+
+def _is_tracking(param: str) -> bool:
+    param = param.lower()
+    return param in TRACKING_PARAMS or param.startswith(TRACKING_PREFIXES)
+
+
+def canonical_url(url: str) -> str:
+    """Normalized, still fetchable form of ``url``; returned unchanged if it can't be parsed."""
+    raw = (url or "").strip()
+    try:
+        parts = urlsplit(raw if "://" in raw else "https://" + raw)
+        host = (parts.hostname or "").rstrip(".")
+        port = parts.port
+    except ValueError:
+        return raw
+    if not host:
+        return raw
+    scheme = parts.scheme.lower()
+    netloc = f"[{host}]" if ":" in host else host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc += f":{port}"
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(k)
+    ))
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def url_key(url: str) -> str:
+    """Dedup key for pages: equal for URLs differing only by scheme, ``www.`` or noise."""
+    canonical = canonical_url(url)
+    rest = canonical.split("://", 1)[-1]
+    return rest[4:] if rest.startswith("www.") else rest
@@ -0,0 +1,10 @@
+"""Performance benchmarks for the backend.
+
+- ``benchmarks.pipeline``: end-to-end ``run_pipeline`` throughput against
+  in-process vendor stubs (``benchmarks.stubs``).
+- ``benchmarks.micro``: CPU hot paths (HTML parsing, CSV export, prompt
+  building, log polling, lead serialization) over synthetic fixtures.
+
+Results are JSON documents that can be saved as a baseline and compared on
+later runs with ``benchmarks.report.compare``.
+"""
@@ -0,0 +1,114 @@
+"""Connect-latency benchmark for the scraper's DNS cache.
+
+Fetches ``--urls`` URLs spread over ``--hosts`` hostnames from a local HTTP
+server, one client per fetch like the scraper, through
+``dns_cache.CachingTransport``. Hostname lookups go to a stand-in resolver
+that answers after ``--lookup-ms`` (a typical recursive resolver round trip),
+so the run isolates what resolution costs per fetch:
+
+- ``uncached``: the cache is emptied before every fetch (the old behaviour,
+  one lookup per fetch);
+- ``cached``: the shared cache is used as in production, so only the first
+  fetch per host pays for a lookup.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.connect
+    python -m benchmarks.connect --urls 500 --hosts 20 --lookup-ms 40 --output connect.json
+    python -m benchmarks.connect --baseline connect.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Optional
+
+import httpx
+
+from app.services import dns_cache
+from benchmarks import report
+
+GATED_METRICS = {"modes.cached.request_ms.p50": "lower", "modes.cached.request_ms.p95": "lower"}
+
+
+async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: 13\r\n"
+                     b"Connection: close\r\n\r\n<html></html>")
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def run_connect(urls: int = 200, hosts: int = 10, lookup_ms: float = 25.0) -> dict:
+    lookups = 0
+
+    async def lookup(host: str, port: int) -> tuple[list[str], float]:
+        nonlocal lookups
+        lookups += 1
+        await asyncio.sleep(lookup_ms / 1000)
+        return ["127.0.0.1"], 300.0
+
+    server = await asyncio.start_server(_serve, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    modes = {}
+    try:
+        for mode in ("uncached", "cached"):
+            cache = dns_cache.DnsCache(default_ttl=300, negative_ttl=60, lookup=lookup)
+            lookups = 0
+            samples = []
+            started = time.perf_counter()
+            for i in range(urls):
+                if mode == "uncached":
+                    cache.clear()
+                request_started = time.perf_counter()
+                async with httpx.AsyncClient(transport=dns_cache.CachingTransport(cache)) as client:
+                    response = await client.get(f"http://site{i % hosts}.bench.invalid:{port}/page/{i}")
+                    response.raise_for_status()
+                samples.append((time.perf_counter() - request_started) * 1000)
+            modes[mode] = {
+                "request_ms": report.summarize(samples),
+                "total_ms": round((time.perf_counter() - started) * 1000, 3),
+                "lookups": lookups,
+            }
+    finally:
+        server.close()
+        await server.wait_closed()
+
+    return {
+        "benchmark": "connect",
+        "environment": report.environment(),
+        "parameters": {"urls": urls, "hosts": hosts, "lookup_ms": lookup_ms},
+        "modes": modes,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--urls", type=int, default=200)
+    parser.add_argument("--hosts", type=int, default=10)
+    parser.add_argument("--lookup-ms", type=float, default=25.0)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown (fraction)")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_connect(args.urls, args.hosts, args.lookup_ms))
+    for mode, stats in results["modes"].items():
+        latency = stats["request_ms"]
+        print(f"{mode:<9}  p50 {latency['p50']:>8.2f} ms  p95 {latency['p95']:>8.2f} ms  "
+              f"total {stats['total_ms']:>9.1f} ms  lookups {stats['lookups']}")
+    if args.output:
+        report.save(results, args.output)
+
+    if args.baseline:
+        regressions = report.compare(results, report.load(args.baseline), GATED_METRICS, args.threshold)
+        report.print_regressions(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Duplicate-call benchmark for URL canonicalization.
+
+Replays the saved search result links in ``fixtures/serp_urls.txt`` through
+the old and new dedup rules and counts the downstream calls each would make:
+
+- ``page_fetches``: distinct pages scraped. Old rule: exact URL string;
+  new rule: ``url_canon.url_key``.
+- ``company_lookups``: distinct companies crawled and searched on Apollo.
+  Old rule: host without ``www.``; new rule: ``url_canon.registrable_domain``.
+
+Also times canonicalization per URL, since it now runs on every result.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.dedup
+    python -m benchmarks.dedup --output dedup.json
+    python -m benchmarks.dedup --baseline dedup.json --threshold 0.2
+"""
+
+import argparse
+import sys
+import time
+from typing import Optional
+from urllib.parse import urlparse
+
+from app.services import url_canon
+from benchmarks import fixtures, report
+
+GATED_METRICS = {"*.eliminated": "higher", "canonicalize_us_per_url": "lower"}
+
+
+def _legacy_domain(url: str) -> str:
+    # What serper_service derived before canonicalization
+    return urlparse(url).netloc.replace("www.", "")
+
+
+def _counts(urls: list[str], old, new) -> dict:
+    before, after = len(set(map(old, urls))), len(set(map(new, urls)))
+    return {
+        "before": before,
+        "after": after,
+        "eliminated": before - after,
+        "eliminated_pct": round((before - after) / before * 100, 1) if before else 0.0,
+    }
+
+
+def run_dedup(urls: Optional[list[str]] = None, repeat: int = 200) -> dict:
+    urls = urls if urls is not None else fixtures.serp_urls()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for url in urls:
+            url_canon.url_key(url)
+            url_canon.registrable_domain(url)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "benchmark": "dedup",
+        "environment": report.environment(),
+        "parameters": {"urls": len(urls), "repeat": repeat},
+        "page_fetches": _counts(urls, lambda u: u, url_canon.url_key),
+        "company_lookups": _counts(urls, _legacy_domain, url_canon.registrable_domain),
+        "canonicalize_us_per_url": round(elapsed / max(repeat * len(urls), 1) * 1e6, 3),
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown (fraction)")
+    args = parser.parse_args(argv)
+
+    results = run_dedup(repeat=args.repeat)
+    print(f"{results['parameters']['urls']} search result links")
+    for name in ("page_fetches", "company_lookups"):
+        c = results[name]
+        print(f"{name:<16} {c['before']:>4} -> {c['after']:>4}  "
+              f"({c['eliminated']} duplicate calls eliminated, {c['eliminated_pct']}%)")
+    print(f"canonicalize     {results['canonicalize_us_per_url']:.2f} us/url")
+    if args.output:
+        report.save(results, args.output)
+
+    if args.baseline:
+        regressions = report.compare(results, report.load(args.baseline), GATED_METRICS, args.threshold)
+        report.print_regressions(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
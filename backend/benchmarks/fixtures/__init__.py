@@ -0,0 +1,79 @@
+"""Deterministic fixtures for the micro-benchmarks.
+
+Saved HTML pages live in ``fixtures/html`` and search result links in
+``fixtures/serp_urls.txt``; lead rows are synthesized as transient (unsaved)
+``Lead`` objects so no database is needed.
+"""
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from app.models.lead import Lead
+
+HTML_DIR = Path(__file__).resolve().parent / "html"
+SERP_URLS = Path(__file__).resolve().parent / "serp_urls.txt"
+
+_FIRST = ["Alice", "Bob", "Carla", "Deniz", "Eitan", "Farah", "Goran", "Hana", "Ivan", "Julia"]
+_LAST = ["Smith", "Jones", "Haddad", "Kaya", "Levi", "Nasser", "Petrov", "Sato", "Okafor", "Silva"]
+_TITLES = ["CTO", "VP Engineering", "Head of Sales", "CEO", "Director of Operations", "Founder"]
+_INDUSTRIES = ["software", "fintech", "logistics", "healthcare", "retail", "energy"]
+_CITIES = [("Dubai", "", "United Arab Emirates"), ("Austin", "TX", "United States"), ("Berlin", "", "Germany")]
+
+
+def load_html(name: str) -> str:
+    return (HTML_DIR / name).read_text(encoding="utf-8")
+
+
+def html_pages() -> dict[str, str]:
+    """Saved pages by name (without extension)."""
+    return {path.stem: path.read_text(encoding="utf-8") for path in sorted(HTML_DIR.glob("*.html"))}
+
+
+def serp_urls() -> list[str]:
+    """Saved search result links, in result order."""
+    lines = SERP_URLS.read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def make_leads(count: int, seed: int = 42) -> list[Lead]:
+    """Build ``count`` fully populated leads with generated emails."""
+    rng = random.Random(seed)
+    session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+    created = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    leads = []
+    for i in range(count):
+        first, last = rng.choice(_FIRST), rng.choice(_LAST)
+        company = f"Company {i % 5000}"
+        domain = f"company{i % 5000}.example"
+        city, state, country = rng.choice(_CITIES)
+        leads.append(Lead(
+            id=str(uuid.UUID(int=rng.getrandbits(128))),
+            session_id=session_id,
+            search_result_id=None,
+            first_name=first,
+            last_name=last,
+            email=f"{first.lower()}.{last.lower()}{i}@{domain}",
+            email_status="verified",
+            phone=f"+971 4 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+            job_title=rng.choice(_TITLES),
+            headline=f"{rng.choice(_TITLES)} at {company}",
+            linkedin_url=f"https://www.linkedin.com/in/{first.lower()}-{last.lower()}-{i}",
+            city=city,
+            state=state,
+            country=country,
+            company_name=company,
+            company_domain=domain,
+            company_industry=rng.choice(_INDUSTRIES),
+            company_size="51-200",
+            company_linkedin_url=f"https://www.linkedin.com/company/company-{i % 5000}",
+            scraped_context=f"{company} | B2B {rng.choice(_INDUSTRIES)} platform | " + "Lorem ipsum " * 40,
+            personalized_email=("Hi " + first + ",\n\n" + "We help teams like yours move faster. " * 12).strip(),
+            email_subject=f"Quick idea for {company}",
+            suggested_approach="Lead with a relevant customer story.",
+            is_selected=True,
+            created_at=created + timedelta(seconds=i),
+            updated_at=created + timedelta(seconds=i),
+        ))
+    return leads
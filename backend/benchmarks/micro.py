@@ -0,0 +1,138 @@
+"""Micro-benchmarks for CPU hot paths.
+
+Covers HTML parsing in the scraper, HubSpot CSV generation, lead prompt
+building, activity-log polling and ``LeadResponse`` validation over large
+lead lists, using the deterministic fixtures in ``benchmarks.fixtures``.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.micro                       # 10k leads
+    python -m benchmarks.micro --leads 100000 --output micro.json
+    python -m benchmarks.micro --baseline micro.json --threshold 0.15
+    python -m benchmarks.micro --filter export       # only matching cases
+
+Each case reports the median and minimum of ``--repeat`` timed runs. With
+``--baseline``, the process exits with status 1 if any case's median got
+slower than the threshold allows.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from app.schemas.lead import LeadResponse
+from app.services import export_service, llm_service, pipeline_log, scraper_service
+from benchmarks import fixtures, report
+
+GATED_METRICS = {"cases.*.median_ms": "lower"}
+
+_LOG_SESSION = "micro-benchmark"
+
+
+@dataclass
+class Case:
+    name: str
+    run: Callable[[], object]
+    items: int = 1  # work items per run, for per-item timings
+
+
+def build_cases(lead_count: int) -> list[Case]:
+    leads = fixtures.make_leads(lead_count)
+    lead_dicts = [llm_service.lead_prompt_data(lead) for lead in leads]
+
+    pipeline_log.clear(_LOG_SESSION)
+    for i in range(lead_count):
+        pipeline_log.add_log(_LOG_SESSION, "generate", f"Email ready for lead {i}", emoji="✅")
+
+    cases = [
+        Case(f"scraper.parse_html[{name}]", lambda html=html: scraper_service.parse_html(html))
+        for name, html in fixtures.html_pages().items()
+    ]
+    cases += [
+        Case("export.generate_csv[full]", lambda: export_service.generate_csv(leads, "full"), lead_count),
+        Case("export.generate_csv[outreach]", lambda: export_service.generate_csv(leads, "outreach"), lead_count),
+        Case(
+            "llm.build_lead_info",
+            lambda: [llm_service.build_lead_info(d) for d in lead_dicts],
+            lead_count,
+        ),
+        Case("pipeline_log.get_logs[all]", lambda: pipeline_log.get_logs(_LOG_SESSION), lead_count),
+        Case(
+            "pipeline_log.get_logs[poll]",
+            # The UI polls with the index of the last entry it has seen
+            lambda: [pipeline_log.get_logs(_LOG_SESSION, after=lead_count - 5) for _ in range(100)],
+            100,
+        ),
+        Case(
+            "schemas.LeadResponse.model_validate",
+            lambda: [LeadResponse.model_validate(lead) for lead in leads],
+            lead_count,
+        ),
+    ]
+    return cases
+
+
+def time_case(case: Case, repeat: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        case.run()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        case.run()
+        samples.append((time.perf_counter() - started) * 1000)
+    median = statistics.median(samples)
+    return {
+        "median_ms": round(median, 3),
+        "min_ms": round(min(samples), 3),
+        "items": case.items,
+        "per_item_us": round(median * 1000 / case.items, 3),
+    }
+
+
+def run_micro(lead_count: int = 10_000, repeat: int = 5, name_filter: Optional[str] = None) -> dict:
+    cases = [c for c in build_cases(lead_count) if not name_filter or name_filter in c.name]
+    try:
+        results = {case.name: time_case(case, repeat) for case in cases}
+    finally:
+        pipeline_log.clear(_LOG_SESSION)
+    return {
+        "benchmark": "micro",
+        "environment": report.environment(),
+        "parameters": {"leads": lead_count, "repeat": repeat},
+        "cases": results,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--leads", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--filter", help="Only run cases whose name contains this text")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown (fraction)")
+    args = parser.parse_args(argv)
+
+    results = run_micro(args.leads, args.repeat, args.filter)
+    width = max(len(name) for name in results["cases"]) if results["cases"] else 0
+    for name, stats in results["cases"].items():
+        print(f"{name:<{width}}  median {stats['median_ms']:>10.2f} ms  "
+              f"min {stats['min_ms']:>10.2f} ms  {stats['per_item_us']:>9.2f} µs/item")
+    if args.output:
+        report.save(results, args.output)
+
+    if args.baseline:
+        baseline = report.load(args.baseline)
+        if baseline.get("parameters", {}).get("leads") != args.leads:
+            print(f"Warning: baseline used {baseline.get('parameters', {}).get('leads')} leads, this run {args.leads}")
+        regressions = report.compare(results, baseline, GATED_METRICS, args.threshold)
+        report.print_regressions(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
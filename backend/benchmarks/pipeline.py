@@ -0,0 +1,235 @@
+"""End-to-end ``run_pipeline`` benchmark against in-process vendor stubs.
+
+Runs N pipelines with bounded concurrency on a throwaway SQLite database and
+reports sessions/min, per-session and per-stage latency (from trace spans),
+time spent in SQL, and peak memory.
+
+Usage (from ``backend/``)::
+
+    python -m benchmarks.pipeline --sessions 20 --concurrency 5
+    python -m benchmarks.pipeline --output baseline.json
+    python -m benchmarks.pipeline --baseline baseline.json --threshold 0.1
+
+``--profile`` picks a latency preset (``realistic``, ``fast`` or ``instant``);
+``--stub-config`` loads a JSON ``StubConfig`` for custom latency/error/429
+mixes. The process exits with status 1 when ``--baseline`` is given and a
+gated metric regressed beyond the threshold.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import Base
+from app.models.search_session import SearchSession
+from app.models.trace_span import TraceSpan
+from app.models.user import User
+from app.services import pipeline_log, pipeline_service
+from benchmarks import report, stubs
+
+# Metrics that make up the regression gate, with the direction that is better
+GATED_METRICS = {
+    "sessions_per_min": "higher",
+    "session_latency_ms.p95": "lower",
+    "stage_latency_ms.*.p95": "lower",
+    "db_time_ms_per_session": "lower",
+    "peak_rss_mb": "lower",
+}
+
+PROFILES = {
+    "realistic": stubs.StubConfig,
+    "fast": lambda: stubs.StubConfig.from_dict({
+        name: {"median_ms": 10, "p95_ms": 30}
+        for name in ("serper", "apollo_search", "apollo_match", "openai", "website")
+    }),
+    "instant": stubs.StubConfig.instant,
+}
+
+_STUB_API_KEYS = {
+    "SERPER_API_KEY": "bench-serper",
+    "APOLLO_API_KEY": "bench-apollo",
+    "OPENAI_API_KEY": "bench-openai",
+}
+
+
+class _SqlTimer:
+    """Accumulate wall time spent executing SQL on an engine."""
+
+    def __init__(self, engine):
+        self.total_s = 0.0
+        self.statements = 0
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("bench_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.total_s += time.perf_counter() - conn.info["bench_started"].pop()
+        self.statements += 1
+
+
+async def run_benchmark(
+    sessions: int = 20,
+    concurrency: int = 5,
+    config: Optional[stubs.StubConfig] = None,
+    query: str = "Find CTOs at SaaS companies in Dubai",
+    distinct_queries: bool = True,
+    trace_memory: bool = False,
+) -> dict:
+    """Drive ``sessions`` pipelines (``concurrency`` at a time) and return a results dict."""
+    config = config or stubs.StubConfig()
+    fd, db_path = tempfile.mkstemp(prefix="siyada_bench_", suffix=".db")
+    os.close(fd)
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    saved_keys = {name: getattr(settings, name) for name in _STUB_API_KEYS}
+    for name, value in _STUB_API_KEYS.items():
+        setattr(settings, name, value)
+
+    setup = Session()
+    user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", hashed_password="-")
+    setup.add(user)
+    setup.commit()
+    session_ids = []
+    for i in range(sessions):
+        raw_query = f"{query} #{i}" if distinct_queries else query
+        session = SearchSession(id=str(uuid.uuid4()), user_id=user.id, raw_query=raw_query, status="pending")
+        setup.add(session)
+        session_ids.append((session.id, raw_query))
+    setup.commit()
+    setup.close()
+
+    stub = stubs.create_stub_app(config)
+    timer = _SqlTimer(engine)
+    semaphore = asyncio.Semaphore(concurrency)
+    durations: dict[str, float] = {}
+
+    async def one(session_id: str, raw_query: str) -> None:
+        async with semaphore:
+            db = Session()
+            started = time.perf_counter()
+            try:
+                await pipeline_service.run_pipeline(session_id, raw_query, "Benchmark sender", db, settings)
+            finally:
+                durations[session_id] = (time.perf_counter() - started) * 1000
+                db.close()
+                pipeline_log.clear(session_id)
+
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with stubs.install(stub):
+            wall_started = time.perf_counter()
+            await asyncio.gather(*(one(sid, q) for sid, q in session_ids))
+            wall_s = time.perf_counter() - wall_started
+        traced_peak_mb = tracemalloc.get_traced_memory()[1] / 1e6 if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        for name, value in saved_keys.items():
+            setattr(settings, name, value)
+
+    check = Session()
+    statuses = Counter(status for (status,) in check.query(SearchSession.status).all())
+    stage_durations: dict[str, list[float]] = {}
+    for name, duration in (
+        check.query(TraceSpan.name, TraceSpan.duration_ms).filter(TraceSpan.kind == "stage").all()
+    ):
+        stage_durations.setdefault(name, []).append(duration)
+    check.close()
+    engine.dispose()
+    os.remove(db_path)
+
+    results = {
+        "benchmark": "pipeline",
+        "environment": report.environment(),
+        "parameters": {"sessions": sessions, "concurrency": concurrency, "distinct_queries": distinct_queries},
+        "wall_s": round(wall_s, 3),
+        "sessions_per_min": round(sessions / wall_s * 60, 2) if wall_s else 0.0,
+        "session_latency_ms": report.summarize(durations.values()),
+        "stage_latency_ms": {stage: report.summarize(v) for stage, v in sorted(stage_durations.items())},
+        "db_time_ms": round(timer.total_s * 1000, 1),
+        "db_time_ms_per_session": round(timer.total_s * 1000 / max(sessions, 1), 2),
+        "db_statements": timer.statements,
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        "peak_rss_mb": round(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1e6 if sys.platform == "darwin" else 1e3), 1
+        ),
+        "statuses": dict(statuses),
+        "vendor_requests": stubs.request_counts(stub),
+    }
+    if traced_peak_mb is not None:
+        results["peak_traced_mb"] = round(traced_peak_mb, 1)
+    return results
+
+
+def _print_summary(results: dict) -> None:
+    print(
+        f"{results['parameters']['sessions']} sessions @ concurrency {results['parameters']['concurrency']}: "
+        f"{results['sessions_per_min']} sessions/min in {results['wall_s']}s"
+    )
+    latency = results["session_latency_ms"]
+    print(f"  session latency  p50 {latency['p50']:.0f} ms  p95 {latency['p95']:.0f} ms")
+    for stage, stats in results["stage_latency_ms"].items():
+        print(f"  {stage:<8} p50 {stats['p50']:>8.0f} ms  p95 {stats['p95']:>8.0f} ms")
+    print(
+        f"  db time {results['db_time_ms']:.0f} ms ({results['db_statements']} statements), "
+        f"peak RSS {results['peak_rss_mb']} MB"
+    )
+    print(f"  statuses {results['statuses']}  vendor requests {results['vendor_requests']}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic")
+    parser.add_argument("--stub-config", help="JSON file with StubConfig overrides")
+    parser.add_argument("--same-query", action="store_true", help="Reuse one query (exercises the parse cache)")
+    parser.add_argument("--trace-memory", action="store_true", help="Also report tracemalloc peak (slower)")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed regression (fraction)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    config = PROFILES[args.profile]()
+    if args.stub_config:
+        config = stubs.StubConfig.from_dict(report.load(args.stub_config))
+
+    results = asyncio.run(run_benchmark(
+        sessions=args.sessions,
+        concurrency=args.concurrency,
+        config=config,
+        distinct_queries=not args.same_query,
+        trace_memory=args.trace_memory,
+    ))
+    _print_summary(results)
+    if args.output:
+        report.save(results, args.output)
+
+    if args.baseline:
+        regressions = report.compare(results, report.load(args.baseline), GATED_METRICS, args.threshold)
+        report.print_regressions(regressions, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
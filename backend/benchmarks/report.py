@@ -0,0 +1,100 @@
+"""Shared helpers for benchmark results: percentiles, persistence and regression checks."""
+
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+from typing import Iterable, Optional
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Linear-interpolated percentile (``pct`` in 0–100); 0.0 for no data."""
+    data = sorted(values)
+    if not data:
+        return 0.0
+    rank = (len(data) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(data) - 1)
+    return data[low] + (data[high] - data[low]) * (rank - low)
+
+
+def summarize(values: Iterable[float]) -> dict:
+    data = list(values)
+    return {
+        "count": len(data),
+        "p50": round(percentile(data, 50), 3),
+        "p95": round(percentile(data, 95), 3),
+        "max": round(max(data), 3) if data else 0.0,
+    }
+
+
+def environment() -> dict:
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def save(results: dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def load(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _flatten(data: dict, prefix: str = "") -> dict[str, float]:
+    flat: dict[str, float] = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+
+def compare(
+    current: dict,
+    baseline: dict,
+    gated: dict[str, str],
+    threshold: float = 0.10,
+) -> list[dict]:
+    """Find gated metrics that got worse than ``baseline`` by more than ``threshold``.
+
+    ``gated`` maps dotted metric paths (``fnmatch`` wildcards allowed, e.g.
+    ``stage_latency_ms.*.p95``) to ``"higher"`` or ``"lower"`` — the direction
+    that is better. Returns one dict per regression.
+    """
+    now, before = _flatten(current), _flatten(baseline)
+    regressions = []
+    for path, old in sorted(before.items()):
+        direction: Optional[str] = next(
+            (d for pattern, d in gated.items() if fnmatch(path, pattern)), None
+        )
+        if direction is None or path not in now or old == 0:
+            continue
+        change = (now[path] - old) / abs(old)
+        worse = -change if direction == "higher" else change
+        if worse > threshold:
+            regressions.append({
+                "metric": path,
+                "baseline": old,
+                "current": now[path],
+                "change_pct": round(change * 100, 1),
+            })
+    return regressions
+
+
+def print_regressions(regressions: list[dict], threshold: float) -> None:
+    if not regressions:
+        print(f"No regressions beyond {threshold:.0%}.")
+        return
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}:")
+    for r in regressions:
+        print(f"  {r['metric']}: {r['baseline']:g} -> {r['current']:g} ({r['change_pct']:+.1f}%)")
@@ -0,0 +1,323 @@
+"""In-process stand-ins for Serper, Apollo, OpenAI and scraped websites.
+
+``create_stub_app`` builds one ASGI app that answers every vendor. Requests
+are dispatched by host: ``google.serper.dev``, ``api.apollo.io`` and the host
+of ``settings.OPENAI_BASE_URL`` get vendor responses; any other host is a
+synthetic company website. ``install`` routes every ``httpx.AsyncClient``
+created afterwards to that app, so no request leaves the process.
+
+Each vendor has its own ``VendorProfile`` with a latency distribution, an
+error rate (HTTP 500) and a rate-limit rate (HTTP 429 with ``Retry-After``).
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+from urllib.parse import urlparse
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+
+from app.core.config import settings
+
+SERPER_HOST = "google.serper.dev"
+APOLLO_HOST = "api.apollo.io"
+
+_TITLES = ["CTO", "VP Engineering", "Head of Sales", "CEO", "Director of Operations", "Founder"]
+_FIRST_NAMES = ["Alice", "Bob", "Carla", "Deniz", "Eitan", "Farah", "Goran", "Hana"]
+_LAST_NAMES = ["Smith", "Jones", "Haddad", "Kaya", "Levi", "Nasser", "Petrov", "Sato"]
+
+
+@dataclass
+class VendorProfile:
+    """Latency and failure behaviour of one stubbed vendor.
+
+    Latency is log-normal with the given median and 95th percentile (ms).
+    """
+
+    median_ms: float = 50.0
+    p95_ms: float = 150.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_s: float = 1.0
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        sigma = max(math.log(max(self.p95_ms, self.median_ms) / self.median_ms) / 1.645, 1e-6)
+        return rng.lognormvariate(math.log(self.median_ms), sigma) / 1000
+
+
+@dataclass
+class StubConfig:
+    serper: VendorProfile = field(default_factory=lambda: VendorProfile(300, 800))
+    apollo_search: VendorProfile = field(default_factory=lambda: VendorProfile(400, 1200))
+    apollo_match: VendorProfile = field(default_factory=lambda: VendorProfile(250, 700))
+    openai: VendorProfile = field(default_factory=lambda: VendorProfile(1500, 4000))
+    website: VendorProfile = field(default_factory=lambda: VendorProfile(400, 2500))
+    results_per_query: int = 10
+    # Leading results per query that point at directory sites (LinkedIn,
+    # Wikipedia, ...); requests to those hosts are counted as "directory"
+    directory_results: int = 0
+    # Named team members (with first.last@ addresses) on each company website
+    site_contacts: int = 0
+    people_per_domain: int = 3
+    email_words: int = 120
+    seed: int = 1234
+
+    @classmethod
+    def instant(cls) -> "StubConfig":
+        """Zero-latency, error-free vendors (useful for CPU/DB-bound runs and tests)."""
+        zero = lambda: VendorProfile(0, 0)
+        return cls(serper=zero(), apollo_search=zero(), apollo_match=zero(), openai=zero(), website=zero())
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StubConfig":
+        config = cls()
+        for key, value in data.items():
+            current = getattr(config, key)
+            setattr(config, key, VendorProfile(**value) if isinstance(current, VendorProfile) else value)
+        return config
+
+
+_DIRECTORY_HOSTS = ("www.linkedin.com", "en.wikipedia.org", "www.crunchbase.com", "www.yelp.com")
+
+
+def _is_directory(host: str) -> bool:
+    bases = (h.split(".", 1)[1] for h in _DIRECTORY_HOSTS)
+    return any(host == base or host.endswith("." + base) for base in bases)
+
+
+def _domain_for(query: str, index: int) -> str:
+    digest = hashlib.sha1(f"{query}|{index}".encode()).hexdigest()[:10]
+    return f"company-{digest}.example"
+
+
+def _company_html(host: str, words: int = 400, contacts: int = 0) -> str:
+    name = host.split(".")[0].replace("-", " ").title()
+    paragraph = " ".join(f"{name} builds software for growing teams." for _ in range(words // 6))
+    team = "".join(
+        f"<p>{first} {last}: <a href='mailto:{first.lower()}.{last.lower()}@{host}'>Email</a></p>"
+        for first, last in (
+            # The same people Apollo has for the company, as on a real team page
+            (_FIRST_NAMES[i % len(_FIRST_NAMES)], _LAST_NAMES[i % len(_LAST_NAMES)]) for i in range(contacts)
+        )
+    )
+    return (
+        f"<html><head><title>{name}</title>"
+        f'<meta name="description" content="{name} — B2B software company"></head>'
+        f"<body><nav><a href='/about'>About</a><a href='/team'>Team</a></nav>"
+        f"<main><h1>{name}</h1><p>{paragraph}</p>"
+        f"<p>Contact us at hello@{host}</p>{team}"
+        f"<a href='https://www.linkedin.com/company/{host.split('.')[0]}'>LinkedIn</a></main>"
+        f"<footer>&copy; {name}</footer></body></html>"
+    )
+
+
+def create_stub_app(config: Optional[StubConfig] = None) -> FastAPI:
+    """Build the stub ASGI app. ``app.state.requests`` counts (vendor, status)."""
+    config = config or StubConfig()
+    rng = random.Random(config.seed)
+    openai_host = urlparse(settings.OPENAI_BASE_URL).hostname or "api.openai.com"
+    stub = FastAPI()
+    stub.state.requests = Counter()
+
+    async def behave(vendor: str, profile: VendorProfile) -> Optional[Response]:
+        """Sleep for a sampled latency, then maybe fail. Returns an error response or None."""
+        await asyncio.sleep(profile.sample_latency(rng))
+        roll = rng.random()
+        if roll < profile.rate_limit_rate:
+            stub.state.requests[(vendor, 429)] += 1
+            return JSONResponse(
+                {"error": "rate limited"}, status_code=429,
+                headers={"Retry-After": str(profile.retry_after_s)},
+            )
+        if roll < profile.rate_limit_rate + profile.error_rate:
+            stub.state.requests[(vendor, 500)] += 1
+            return JSONResponse({"error": "stub failure"}, status_code=500)
+        stub.state.requests[(vendor, 200)] += 1
+        return None
+
+    def serper(payload: dict) -> dict:
+        query = payload.get("q", "")
+        organic = []
+        num = payload.get("num", 10)
+        start = (max(int(payload.get("page", 1)), 1) - 1) * num
+        if start == 0:
+            for i in range(min(config.directory_results, num)):
+                host = _DIRECTORY_HOSTS[i % len(_DIRECTORY_HOSTS)]
+                organic.append({"title": f"Directory {i + 1}", "link": f"https://{host}/company/{i}", "position": i + 1})
+        for i in range(start, min(start + num, config.results_per_query)):
+            domain = _domain_for(query, i)
+            organic.append({
+                "title": f"{domain.split('.')[0]} — Company",
+                "link": f"https://{domain}/",
+                "snippet": f"Result {i + 1} for {query}",
+                "position": i - start + 1,
+            })
+        return {"organic": organic}
+
+    def apollo_search(payload: dict) -> dict:
+        domain = (payload.get("q_organization_domains_list") or ["unknown.example"])[0]
+        page = max(int(payload.get("page", 1)), 1)
+        per_page = max(int(payload.get("per_page", 10)), 1)
+        people = []
+        for i in range((page - 1) * per_page, min(page * per_page, config.people_per_domain)):
+            people.append({
+                "id": f"{domain}:{i}",
+                "first_name": _FIRST_NAMES[i % len(_FIRST_NAMES)],
+                "last_name_obfuscated": "S***",
+                "title": _TITLES[i % len(_TITLES)],
+                "organization": {"name": domain.split(".")[0]},
+            })
+        return {
+            "people": people,
+            "pagination": {
+                "page": page,
+                "per_page": per_page,
+                "total_entries": config.people_per_domain,
+                "total_pages": -(-config.people_per_domain // per_page),
+            },
+        }
+
+    def apollo_match(payload: dict) -> dict:
+        person_id = str(payload.get("id", "unknown.example:0"))
+        domain, _, index = person_id.rpartition(":")
+        i = int(index) if index.isdigit() else 0
+        first = _FIRST_NAMES[i % len(_FIRST_NAMES)]
+        last = _LAST_NAMES[i % len(_LAST_NAMES)]
+        return {"person": {
+            "id": person_id,
+            "first_name": first,
+            "last_name": last,
+            "email": f"{first.lower()}.{last.lower()}@{domain}",
+            "email_status": "verified",
+            "title": _TITLES[i % len(_TITLES)],
+            "headline": f"{_TITLES[i % len(_TITLES)]} at {domain}",
+            "linkedin_url": f"https://www.linkedin.com/in/{first.lower()}-{last.lower()}-{i}",
+            "city": "Dubai",
+            "country": "United Arab Emirates",
+            "organization": {
+                "name": domain.split(".")[0],
+                "primary_domain": domain,
+                "industry": "software",
+                "estimated_num_employees": 120,
+            },
+        }}
+
+    def completion_content(payload: dict) -> str:
+        system = next((m["content"] for m in payload.get("messages", []) if m["role"] == "system"), "")
+        user = next((m["content"] for m in payload.get("messages", []) if m["role"] == "user"), "")
+        if "query parser" in system:
+            return json.dumps({
+                "search_queries": [f"{user} companies", f"{user} startups"],
+                "job_titles": ["CTO", "VP Engineering"],
+                "industries": ["software"],
+                "locations": ["Dubai"],
+                "company_size": ["51-200"],
+                "seniority_levels": ["c_suite", "vp"],
+                "keywords": [],
+            })
+        body = " ".join(["We help teams like yours move faster."] * max(config.email_words // 7, 1))
+        return json.dumps({
+            "subject": "Quick idea for your team",
+            "body": body,
+            "suggested_approach": "Lead with a relevant customer story.",
+        })
+
+    def usage(content: str) -> dict:
+        completion_tokens = max(len(content) // 4, 1)
+        return {"prompt_tokens": 600, "completion_tokens": completion_tokens, "total_tokens": 600 + completion_tokens}
+
+    def openai(payload: dict) -> Response:
+        content = completion_content(payload)
+        model = payload.get("model", "gpt-4o-mini")
+        if not payload.get("stream"):
+            return JSONResponse({
+                "id": "chatcmpl-stub",
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+                "usage": usage(content),
+            })
+
+        async def events():
+            for start in range(0, len(content), 16):
+                chunk = {"choices": [{"index": 0, "delta": {"content": content[start:start + 16]}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield f"data: {json.dumps({'choices': [], 'usage': usage(content)})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @stub.api_route("/{path:path}", methods=["GET", "POST"])
+    async def dispatch(path: str, request: Request):
+        host = (request.headers.get("host") or "").split(":")[0]
+        payload = await request.json() if request.method == "POST" and await request.body() else {}
+
+        if host == SERPER_HOST:
+            if isinstance(payload, list):
+                # Batch mode: one result object per query, in order
+                return await behave("serper", config.serper) or JSONResponse([serper(q) for q in payload])
+            return await behave("serper", config.serper) or JSONResponse(serper(payload))
+        if host == APOLLO_HOST and path.endswith("people/bulk_match"):
+            details = payload.get("details") or []
+            return await behave("apollo_match", config.apollo_match) or JSONResponse({
+                "status": "success",
+                "matches": [apollo_match(detail)["person"] for detail in details],
+            })
+        if host == APOLLO_HOST and _is_directory((payload.get("q_organization_domains_list") or [""])[0]):
+            return await behave("directory", config.apollo_search) or JSONResponse(apollo_search(payload))
+        if host == APOLLO_HOST and path.endswith("people/match"):
+            return await behave("apollo_match", config.apollo_match) or JSONResponse(apollo_match(payload))
+        if host == APOLLO_HOST:
+            return await behave("apollo_search", config.apollo_search) or JSONResponse(apollo_search(payload))
+        if host == openai_host:
+            return await behave("openai", config.openai) or openai(payload)
+        if _is_directory(host):
+            return await behave("directory", config.website) or HTMLResponse(_company_html(host))
+        if path == "robots.txt":
+            return await behave("website", config.website) or PlainTextResponse("User-agent: *\nDisallow:\n")
+        return await behave("website", config.website) or HTMLResponse(
+            _company_html(host, contacts=config.site_contacts)
+        )
+
+    return stub
+
+
+@contextmanager
+def install(stub: FastAPI) -> Iterator[None]:
+    """Route every ``httpx.AsyncClient`` created inside the block to ``stub``."""
+    original = httpx.AsyncClient
+    transport = httpx.ASGITransport(app=stub)
+
+    class StubbedAsyncClient(original):
+        def __init__(self, *args, **kwargs):
+            kwargs.pop("verify", None)
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    httpx.AsyncClient = StubbedAsyncClient
+    try:
+        yield
+    finally:
+        httpx.AsyncClient = original
+
+
+def request_counts(stub: FastAPI) -> dict:
+    """``{vendor: {"requests", "errors", "rate_limited"}}`` seen by the stub."""
+    summary: dict[str, dict] = {}
+    for (vendor, status), count in stub.state.requests.items():
+        entry = summary.setdefault(vendor, {"requests": 0, "errors": 0, "rate_limited": 0})
+        entry["requests"] += count
+        if status == 429:
+            entry["rate_limited"] += count
+        elif status >= 500:
+            entry["errors"] += count
+    return summary
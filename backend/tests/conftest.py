@@ -49,6 +49,8 @@ app.dependency_overrides[get_db] = override_get_db
 # Also patch SessionLocal in the pipeline module so background tasks use the test DB
 import app.api.pipeline as pipeline_module
 pipeline_module.SessionLocal = TestingSessionLocal
+import app.api.generate as generate_module
+generate_module.SessionLocal = TestingSessionLocal
 
 
 # ── Fixtures ────────────────────────────────────────────────────────────────
@@ -0,0 +1,207 @@
+"""
+Tests for Apollo people search: pagination and bulk enrichment.
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from app.core.config import settings
+from app.services import apollo_service
+
+
+def _person(person_id: str) -> dict:
+    domain, _, index = person_id.partition(":")
+    return {"id": person_id, "first_name": f"P{index}", "email": f"p{index}@{domain}", "email_status": "verified"}
+
+
+def _fake_apollo(monkeypatch, people_per_domain: int = 35, unmatched=(), failing=()) -> list[dict]:
+    """Serve paginated search and bulk match; returns the request log.
+
+    IDs in ``unmatched`` come back as null matches; a bulk request containing
+    any ID in ``failing`` gets a 500.
+    """
+    calls: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        calls.append({"path": request.url.path, **payload})
+        if request.url.path.endswith("api_search"):
+            domain = payload["q_organization_domains_list"][0]
+            page, per_page = payload["page"], payload["per_page"]
+            ids = range((page - 1) * per_page, min(page * per_page, people_per_domain))
+            return httpx.Response(200, json={
+                "people": [{"id": f"{domain}:{i}", "first_name": f"P{i}"} for i in ids],
+                "pagination": {"page": page, "total_pages": -(-people_per_domain // per_page)},
+            })
+        ids = [d["id"] for d in payload["details"]]
+        if any(i in failing for i in ids):
+            return httpx.Response(500, json={"error": "boom"})
+        return httpx.Response(200, json={"matches": [None if i in unmatched else _person(i) for i in ids]})
+
+    transport = httpx.MockTransport(handler)
+    original = httpx.AsyncClient
+
+    class MockClient(original):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(apollo_service.httpx, "AsyncClient", MockClient)
+    return calls
+
+
+def _searches(calls: list[dict]) -> list[int]:
+    return [c["page"] for c in calls if c["path"].endswith("api_search")]
+
+
+def _matches(calls: list[dict]) -> list[int]:
+    return [len(c["details"]) for c in calls if c["path"].endswith("bulk_match")]
+
+
+def test_iter_people_pages_until_cap(monkeypatch):
+    calls = _fake_apollo(monkeypatch)
+
+    async def run():
+        return [p async for p in apollo_service.iter_people(
+            "acme.io", api_key_override="key", max_people=25, page_size=10,
+        )]
+
+    people = asyncio.run(run())
+    assert len(people) == 25
+    assert people[24]["email"] == "p24@acme.io"
+    assert _searches(calls) == [1, 2, 3]
+    # The last page is trimmed to the cap before anyone is enriched
+    assert _matches(calls) == [10, 10, 5]
+
+
+def test_iter_people_stops_when_caller_stops(monkeypatch):
+    """Breaking out of the loop issues no further search requests."""
+    calls = _fake_apollo(monkeypatch)
+
+    async def run():
+        found = []
+        people = apollo_service.iter_people("acme.io", api_key_override="key", max_people=35, page_size=10)
+        async for person in people:
+            found.append(person)
+            if len(found) == 12:
+                break
+        await people.aclose()
+        return found
+
+    assert len(asyncio.run(run())) == 12
+    assert _searches(calls) == [1, 2]
+
+
+def test_iter_people_stops_at_last_page(monkeypatch):
+    calls = _fake_apollo(monkeypatch, people_per_domain=7)
+
+    async def run():
+        return [p async for p in apollo_service.iter_people(
+            "small.io", api_key_override="key", max_people=50, page_size=5,
+        )]
+
+    assert len(asyncio.run(run())) == 7
+    assert _searches(calls) == [1, 2]
+
+
+def test_search_people_keeps_single_page_default(monkeypatch):
+    calls = _fake_apollo(monkeypatch)
+    people = asyncio.run(apollo_service.search_people("acme.io", api_key_override="key"))
+    assert len(people) == 10
+    assert _searches(calls) == [1]
+
+
+def test_enrichment_uses_bulk_match_in_chunks(monkeypatch):
+    calls = _fake_apollo(monkeypatch)
+
+    async def run():
+        return [p async for p in apollo_service.iter_people(
+            "acme.io", api_key_override="key", max_people=25, page_size=25,
+        )]
+
+    people = asyncio.run(run())
+    assert [p["apollo_id"] for p in people] == [f"acme.io:{i}" for i in range(25)]
+    assert all(p["email_status"] == "verified" for p in people)
+    assert _matches(calls) == [10, 10, 5]
+
+
+def test_bulk_match_falls_back_to_stubs_per_missing_person(monkeypatch):
+    """Null matches and failed chunks degrade to search data for just those people."""
+    calls = _fake_apollo(monkeypatch, unmatched={"acme.io:3"}, failing={"acme.io:12"})
+
+    async def run():
+        return [p async for p in apollo_service.iter_people(
+            "acme.io", api_key_override="key", max_people=25, page_size=25,
+        )]
+
+    people = {p["apollo_id"]: p for p in asyncio.run(run())}
+    assert len(people) == 25
+    assert people["acme.io:3"]["email_status"] == "unavailable"
+    assert people["acme.io:4"]["email"] == "p4@acme.io"
+    # The whole second chunk (10-19) failed
+    assert all(people[f"acme.io:{i}"]["email_status"] == "unavailable" for i in range(10, 20))
+    assert people["acme.io:20"]["email_status"] == "verified"
+
+
+def test_bulk_match_concurrency_is_bounded(monkeypatch):
+    monkeypatch.setattr(settings, "APOLLO_BULK_CONCURRENCY", 2)
+    _fake_apollo(monkeypatch)
+    active = peak = 0
+    original_bulk_match = apollo_service._bulk_match
+
+    async def tracked(*args, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        try:
+            return await original_bulk_match(*args, **kwargs)
+        finally:
+            active -= 1
+
+    monkeypatch.setattr(apollo_service, "_bulk_match", tracked)
+
+    async def run():
+        return [p async for p in apollo_service.iter_people(
+            "acme.io", api_key_override="key", max_people=50, page_size=50,
+        )]
+
+    assert len(asyncio.run(run())) == 35
+    assert peak == 2
+
+
+def test_iter_people_without_match_yields_pending_stubs(monkeypatch):
+    calls = _fake_apollo(monkeypatch, people_per_domain=5)
+
+    async def run():
+        return [p async for p in apollo_service.iter_people("acme.io", api_key_override="key", match=False)]
+
+    people = asyncio.run(run())
+    assert [p["first_name"] for p in people] == ["P0", "P1", "P2", "P3", "P4"]
+    assert all(p["_pending"] and p["email"] == "" for p in people)
+    assert _matches(calls) == []
+
+
+def test_match_people_batches_ids_across_companies(monkeypatch):
+    calls = _fake_apollo(monkeypatch, unmatched={"globex.com:1"})
+    ids = [f"acme.io:{i}" for i in range(12)] + ["globex.com:0", "globex.com:1", "acme.io:0"]
+
+    matched, unanswered = asyncio.run(apollo_service.match_people(ids, api_key_override="key"))
+
+    assert _matches(calls) == [10, 4]
+    assert len(matched) == 13 and "globex.com:1" not in matched
+    assert unanswered == set()
+    assert matched["globex.com:0"]["email"] == "p0@globex.com"
+
+
+def test_match_people_reports_failed_chunks_as_unanswered(monkeypatch):
+    calls = _fake_apollo(monkeypatch, unmatched={"acme.io:3"}, failing={"acme.io:12"})
+    ids = [f"acme.io:{i}" for i in range(15)]
+
+    matched, unanswered = asyncio.run(apollo_service.match_people(ids, api_key_override="key"))
+
+    assert _matches(calls) == [10, 5]
+    assert unanswered == {f"acme.io:{i}" for i in range(10, 15)}
+    assert set(matched) == {f"acme.io:{i}" for i in range(10)} - {"acme.io:3"}
@@ -0,0 +1,76 @@
+"""
+Smoke tests for the benchmark harness so it keeps working as the pipeline changes.
+"""
+
+import asyncio
+
+from app.services import scraper_service
+from benchmarks import fixtures, report, stubs
+from benchmarks.connect import run_connect
+from benchmarks.dedup import run_dedup
+from benchmarks.micro import run_micro
+from benchmarks.pipeline import GATED_METRICS, run_benchmark
+
+
+def test_pipeline_benchmark_runs_against_stubs():
+    """Pipelines should complete end to end against the in-process vendor stubs."""
+    results = asyncio.run(run_benchmark(sessions=2, concurrency=2, config=stubs.StubConfig.instant()))
+
+    assert results["statuses"] == {"completed": 2}
+    assert results["sessions_per_min"] > 0
+    assert {"query", "search", "scrape", "enrich", "generate"} <= set(results["stage_latency_ms"])
+    assert results["vendor_requests"]["serper"]["requests"] >= 1
+    assert results["db_statements"] > 0
+
+
+def test_stub_rate_limits_are_reported():
+    config = stubs.StubConfig.instant()
+    config.serper = stubs.VendorProfile(0, 0, rate_limit_rate=1.0)
+    results = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+
+    assert results["statuses"] == {"failed": 1}
+    assert results["vendor_requests"]["serper"]["rate_limited"] >= 1
+
+
+def test_compare_flags_regressions_by_direction():
+    baseline = {"sessions_per_min": 100.0, "stage_latency_ms": {"scrape": {"p95": 1000.0}}}
+    current = {"sessions_per_min": 80.0, "stage_latency_ms": {"scrape": {"p95": 1050.0}}}
+
+    regressions = report.compare(current, baseline, GATED_METRICS, threshold=0.10)
+    assert [r["metric"] for r in regressions] == ["sessions_per_min"]
+    assert regressions[0]["change_pct"] == -20.0
+
+
+def test_micro_benchmarks_cover_hot_paths():
+    results = run_micro(lead_count=50, repeat=1)
+
+    names = set(results["cases"])
+    assert "export.generate_csv[full]" in names
+    assert "schemas.LeadResponse.model_validate" in names
+    assert any(name.startswith("scraper.parse_html[") for name in names)
+    assert all(case["median_ms"] >= 0 for case in results["cases"].values())
+
+
+def test_parse_html_extracts_fixture_page():
+    """The saved landing page should yield its title, contact emails and social links."""
+    content = scraper_service.parse_html(fixtures.load_html("landing.html"))
+
+    assert content["title"].startswith("Northwind Analytics")
+    assert "sales@northwind-analytics.io" in content["emails"]
+    assert "https://github.com/northwind-analytics" in content["social_links"]
+    assert "gtag" not in content["text_content"]
+
+
+def test_connect_benchmark_resolves_each_host_once_when_cached():
+    results = asyncio.run(run_connect(urls=6, hosts=2, lookup_ms=1))
+
+    assert results["modes"]["uncached"]["lookups"] == 6
+    assert results["modes"]["cached"]["lookups"] == 2
+    assert results["modes"]["cached"]["request_ms"]["count"] == 6
+
+
+def test_dedup_benchmark_counts_eliminated_calls():
+    results = run_dedup(repeat=1)
+
+    assert results["page_fetches"]["after"] < results["page_fetches"]["before"]
+    assert results["company_lookups"]["eliminated"] > 0
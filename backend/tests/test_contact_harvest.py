@@ -0,0 +1,76 @@
+"""
+Tests for harvesting contacts from scraped company websites.
+"""
+
+from app.services import contact_harvest
+
+
+def _scraped(emails, social_links=(), text=""):
+    return {"emails": list(emails), "social_links": list(social_links), "text_content": text, "pages": []}
+
+
+def test_harvest_splits_named_and_role_addresses():
+    scraped = _scraped(
+        [
+            "jane.doe@acme.com", "info@acme.com", "sales@acme.com", "noreply@acme.com",
+            "bob@acme.com", "omar@acme.com", "x9@acme.com", "someone@gmail.com", "lee.park@partner.io",
+        ],
+        social_links=[
+            "https://www.linkedin.com/company/acme",
+            "https://www.linkedin.com/in/jane-doe-123",
+            "https://twitter.com/acme",
+        ],
+        text="Our team: Jane Doe (CEO) and Omar Haddad (CTO).",
+    )
+    result = contact_harvest.harvest(scraped, "acme.com")
+
+    assert result["named"] == [
+        {"email": "jane.doe@acme.com", "first_name": "Jane", "last_name": "Doe",
+         "linkedin_url": "https://www.linkedin.com/in/jane-doe-123"},
+        {"email": "omar@acme.com", "first_name": "Omar", "last_name": "Haddad", "linkedin_url": ""},
+    ]
+    assert result["role_emails"] == ["sales@acme.com", "info@acme.com"]
+    assert result["company_linkedin_url"] == "https://www.linkedin.com/company/acme"
+
+
+def test_harvest_keeps_subdomain_addresses_of_the_company():
+    result = contact_harvest.harvest(_scraped(["amy.chen@mail.acme.co.uk"]), "acme.co.uk")
+    assert [c["email"] for c in result["named"]] == ["amy.chen@mail.acme.co.uk"]
+
+
+def test_fill_email_matches_apollo_people_by_name():
+    named = [
+        {"email": "jane.doe@acme.com", "first_name": "Jane", "last_name": "Doe", "linkedin_url": ""},
+        {"email": "sam@acme.com", "first_name": "Sam", "last_name": "", "linkedin_url": ""},
+    ]
+    jane = {"first_name": "Jane", "last_name": "Smith", "email": ""}
+    sam = {"first_name": "Sam", "last_name": "Lee", "email": ""}
+    verified = {"first_name": "Jane", "last_name": "Doe", "email": "jd@acme.com"}
+
+    assert not contact_harvest.fill_email(jane, named)
+    assert not contact_harvest.fill_email(verified, named)
+    assert contact_harvest.fill_email(sam, named)
+    assert sam["email"] == "sam@acme.com" and sam["email_status"] == "scraped"
+    assert [c["first_name"] for c in named] == ["Jane"]
+
+
+def test_to_person_looks_like_an_apollo_result():
+    person = contact_harvest.to_person(contact_harvest.role_contact("sales@acme.com"), "acme.com", "Acme")
+    assert person["email_status"] == "scraped"
+    assert person["title"] == "Sales (shared inbox)"
+    assert person["organization_domain"] == "acme.com"
+    assert person["_source"] == "website"
+
+
+def test_drop_known_removes_people_apollo_returned():
+    named = [
+        {"email": "jane.doe@acme.com", "first_name": "Jane", "last_name": "Doe", "linkedin_url": ""},
+        {"email": "sam@acme.com", "first_name": "Sam", "last_name": "", "linkedin_url": ""},
+        {"email": "omar.haddad@acme.com", "first_name": "Omar", "last_name": "Haddad", "linkedin_url": ""},
+    ]
+    apollo = [
+        {"first_name": "Janet", "last_name": "Doe", "email": "Jane.Doe@acme.com"},
+        {"first_name": "Sam", "last_name": "Lee", "email": "slee@acme.com"},
+        {"first_name": "Omar", "last_name": "Nasser", "email": "onasser@acme.com"},
+    ]
+    assert [c["email"] for c in contact_harvest.drop_known(named, apollo)] == ["omar.haddad@acme.com"]
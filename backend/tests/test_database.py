@@ -0,0 +1,30 @@
+"""Tests for upgrading databases created by older versions."""
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.database import Base, add_missing_columns
+from app.models.lead import Lead
+
+
+def test_add_missing_columns_upgrades_an_old_leads_table(tmp_path):
+    """Leads stored before new columns existed stay queryable after startup."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE leads"))
+        conn.execute(text(
+            "CREATE TABLE leads (id VARCHAR PRIMARY KEY, session_id VARCHAR NOT NULL, "
+            "first_name VARCHAR, is_selected BOOLEAN)"
+        ))
+        conn.execute(text("INSERT INTO leads (id, session_id, first_name, is_selected) VALUES ('l1', 's1', 'Ann', 1)"))
+
+    added = add_missing_columns(engine)
+    assert {"leads.company_id", "leads.generation_key", "leads.email_tier", "leads.enrichment_status"} <= set(added)
+    assert "ix_leads_company_id" in {i["name"] for i in inspect(engine).get_indexes("leads")}
+    assert add_missing_columns(engine) == []
+
+    with Session(bind=engine) as db:
+        lead = db.query(Lead).one()
+        assert (lead.first_name, lead.company_id, lead.is_duplicate) == ("Ann", None, False)
+    engine.dispose()
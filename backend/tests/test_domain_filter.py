@@ -0,0 +1,78 @@
+"""
+Tests for the directory/aggregator domain filter and its per-user overrides.
+"""
+
+import asyncio
+
+from app.core.config import settings
+from app.services import domain_filter
+from benchmarks import stubs
+from benchmarks.pipeline import run_benchmark
+
+
+def test_default_list_excludes_directories_and_subdomains():
+    dfilter = domain_filter.DomainFilter(domain_filter.DEFAULT_EXCLUDED)
+
+    for url in (
+        "https://www.linkedin.com/company/acme",
+        "https://uk.linkedin.com/in/someone",
+        "https://en.wikipedia.org/wiki/Acme",
+        "crunchbase.com",
+        "https://www.yelp.com/biz/acme-dubai",
+    ):
+        assert dfilter.is_excluded(url), url
+    assert not dfilter.is_excluded("https://acme.io/about")
+    # Suffix match is by whole labels only
+    assert not dfilter.is_excluded("https://notlinkedin.com/")
+
+
+def test_most_specific_rule_wins():
+    dfilter = domain_filter.DomainFilter({"example.com", "news.acme.io"}, {"jobs.example.com"})
+
+    assert dfilter.is_excluded("https://www.example.com/")
+    assert not dfilter.is_excluded("https://jobs.example.com/apply")
+    assert dfilter.is_excluded("https://news.acme.io/post")
+    assert not dfilter.is_excluded("https://acme.io/")
+
+
+def test_user_overrides_and_extra_domains(db_session, test_user, monkeypatch):
+    monkeypatch.setattr(settings, "DOMAIN_FILTER_EXTRA", "competitor.com, https://www.rival.io/")
+    domain_filter.set_rules(db_session, test_user.id, excluded=["https://www.Partner.net/x"], allowed=["crunchbase.com"])
+
+    dfilter = domain_filter.for_user(db_session, test_user.id)
+    assert dfilter.is_excluded("https://partner.net/")
+    assert dfilter.is_excluded("https://app.rival.io/")
+    assert dfilter.is_excluded("competitor.com")
+    assert not dfilter.is_excluded("https://www.crunchbase.com/organization/acme")
+    # Other users only get the defaults
+    assert domain_filter.for_user(db_session, "someone-else").is_excluded("crunchbase.com")
+
+
+def test_domain_filter_endpoints(client, auth_headers):
+    response = client.put(
+        "/api/settings/domain-filter",
+        json={"excluded": ["Partner.net", "yelp.com"], "allowed": ["yelp.com"]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["excluded"] == ["partner.net"]
+    assert data["allowed"] == ["yelp.com"]
+    assert "linkedin.com" in data["default_excluded"]
+
+    assert client.get("/api/settings/domain-filter", headers=auth_headers).json()["allowed"] == ["yelp.com"]
+    assert client.get("/api/settings/domain-filter").status_code == 401
+
+
+def test_pipeline_skips_directory_results(monkeypatch):
+    """Directory links in search results are never crawled or searched on Apollo."""
+    config = stubs.StubConfig.instant()
+    config.directory_results = 3
+
+    filtered = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+    assert filtered["statuses"] == {"completed": 1}
+    assert "directory" not in filtered["vendor_requests"]
+
+    monkeypatch.setattr(settings, "DOMAIN_FILTER_ENABLED", False)
+    unfiltered = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+    assert unfiltered["vendor_requests"]["directory"]["requests"] > 0
@@ -0,0 +1,52 @@
+"""
+Tests for deterministic template drafts.
+"""
+
+from app.services import email_templates
+
+
+LEAD = {
+    "first_name": "Alice",
+    "job_title": "CTO",
+    "company_name": "TechCorp",
+    "company_industry": "Software",
+    "scraped_context": "TechCorp | TechCorp builds AI tools for hospitals. Founded 2015. | Home Products About",
+}
+
+
+def test_draft_uses_lead_fields_and_website_description():
+    draft = email_templates.render_draft(LEAD, "We help B2B teams book meetings. Ask us anything.")
+
+    assert draft["subject"] == "Alice, a quick idea for TechCorp"
+    assert draft["body"].startswith("Hi Alice,\n\nI came across TechCorp while looking at software companies, "
+                                     "and your role as CTO stood out.")
+    assert "From your website: TechCorp builds AI tools for hospitals." in draft["body"]
+    assert "We help B2B teams book meetings." in draft["body"]
+    assert "Ask us anything" not in draft["body"]
+    assert email_templates.render_draft(LEAD, "We help B2B teams book meetings.") == \
+        email_templates.render_draft(LEAD, "We help B2B teams book meetings.")
+
+
+def test_draft_leaves_out_missing_fields():
+    draft = email_templates.render_draft({"company_name": "", "scraped_context": None})
+
+    assert draft["subject"] == "A quick idea"
+    assert draft["body"].startswith("Hi,\n\nI came across your work.")
+    assert "From your website" not in draft["body"]
+    assert "None" not in draft["body"]
+
+
+def test_website_hook_is_trimmed_to_one_sentence():
+    long = "Acme | " + "word " * 99 + "word. Second sentence here."
+    hook = email_templates.website_hook(long)
+    assert len(hook) <= email_templates.MAX_HOOK_CHARS + 1 and hook.endswith("…")
+    assert email_templates.website_hook("Only A Title") == ""
+
+
+def test_website_hook_skips_page_text_that_is_not_prose():
+    # No meta description: the part after the title is the page's navigation
+    context = "Acme Corp | Home Products Solutions Pricing About Contact Login"
+    assert email_templates.website_hook(context) == ""
+    assert email_templates.website_hook("Acme Corp | Welcome!") == ""
+    draft = email_templates.render_draft({"company_name": "Acme", "scraped_context": context})
+    assert "From your website" not in draft["body"]
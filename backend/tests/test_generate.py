@@ -0,0 +1,291 @@
+"""Tests for the email generation endpoints (/api/generate)."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI, Form, UploadFile
+from fastapi.responses import PlainTextResponse
+
+import app.api.generate as generate_module
+from app.core.config import settings
+from app.models.generation_cache import GenerationCacheEntry
+from app.models.generation_job import GenerationJob
+from app.models.lead import Lead
+from app.services import batch_service, llm_service
+
+
+def _make_batch_stand_in() -> FastAPI:
+    """A local stand-in for the OpenAI /files and /batches endpoints."""
+    stand_in = FastAPI()
+    state = {"files": {}, "polls": 0}
+
+    @stand_in.post("/v1/files")
+    async def upload_file(file: UploadFile, purpose: str = Form(...)):
+        file_id = f"file-{len(state['files'])}"
+        state["files"][file_id] = (await file.read()).decode("utf-8")
+        return {"id": file_id, "purpose": purpose}
+
+    @stand_in.post("/v1/batches")
+    def create_batch(payload: dict):
+        output_lines = []
+        for raw in state["files"][payload["input_file_id"]].splitlines():
+            request = json.loads(raw)
+            content = json.dumps({
+                "subject": "Quick question",
+                "body": f"Hello from batch ({request['custom_id']})",
+                "suggested_approach": "Batch approach",
+            })
+            output_lines.append(json.dumps({
+                "custom_id": request["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "body": {"choices": [{"message": {"content": content}}]},
+                },
+                "error": None,
+            }))
+        state["files"]["file-output"] = "\n".join(output_lines)
+        return {"id": "batch-1", "status": "validating"}
+
+    @stand_in.get("/v1/batches/{batch_id}")
+    def get_batch(batch_id: str):
+        state["polls"] += 1
+        if state["polls"] < 2:
+            return {"id": batch_id, "status": "in_progress"}
+        return {"id": batch_id, "status": "completed", "output_file_id": "file-output"}
+
+    @stand_in.get("/v1/files/{file_id}/content")
+    def file_content(file_id: str):
+        return PlainTextResponse(state["files"][file_id])
+
+    return stand_in
+
+
+# ── POST /api/generate/{session_id} ─────────────────────────────────────────
+
+
+def test_generate_interactive(client, auth_headers, test_session_with_leads, monkeypatch):
+    """Interactive mode should call the LLM per lead and store the results."""
+    session = test_session_with_leads["session"]
+
+    async def fake_generate_email(**kwargs):
+        return {"subject": "Hi", "body": "Generated body", "suggested_approach": "Direct"}
+
+    monkeypatch.setattr(llm_service, "generate_email", fake_generate_email)
+
+    response = client.post(
+        f"/api/generate/{session.id}",
+        json={"sender_context": "We sell AI", "mode": "interactive"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["mode"] == "interactive"
+    assert data["success_count"] == 2
+    assert data["error_count"] == 0
+
+
+def test_generate_reuses_cached_emails(client, auth_headers, test_session_with_leads, monkeypatch):
+    """A repeat run with unchanged inputs should skip the LLM unless forced."""
+    session = test_session_with_leads["session"]
+    calls = []
+
+    async def fake_generate_email(**kwargs):
+        calls.append(kwargs)
+        return {
+            "subject": "Hi",
+            "body": "Generated body",
+            "suggested_approach": "Direct",
+            "usage": {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150},
+        }
+
+    monkeypatch.setattr(llm_service, "generate_email", fake_generate_email)
+    payload = {"sender_context": "We sell AI", "mode": "interactive"}
+
+    first = client.post(f"/api/generate/{session.id}", json=payload, headers=auth_headers).json()
+    assert first["cache_misses"] == 2
+    assert len(calls) == 2
+
+    second = client.post(f"/api/generate/{session.id}", json=payload, headers=auth_headers).json()
+    assert second["cache_hits"] == 2
+    assert second["cache_misses"] == 0
+    assert second["tokens_saved"] == 300
+    assert second["success_count"] == 2
+    assert len(calls) == 2
+
+    forced = client.post(
+        f"/api/generate/{session.id}", json={**payload, "force": True}, headers=auth_headers
+    ).json()
+    assert forced["cache_misses"] == 2
+    assert len(calls) == 4
+
+    changed = client.post(
+        f"/api/generate/{session.id}",
+        json={**payload, "sender_context": "We sell data"},
+        headers=auth_headers,
+    ).json()
+    assert changed["cache_misses"] == 2
+
+
+def test_forced_generation_overwrites_emails(client, auth_headers, db_session, test_session_with_leads, monkeypatch):
+    """Regenerating with force replaces the stored email even with unchanged inputs."""
+    session = test_session_with_leads["session"]
+    lead = test_session_with_leads["leads"][0]
+    bodies = iter(f"Body {i}" for i in range(4))
+
+    async def fake_generate_email(**kwargs):
+        return {"subject": "Hi", "body": next(bodies), "suggested_approach": "Direct"}
+
+    monkeypatch.setattr(llm_service, "generate_email", fake_generate_email)
+    url = f"/api/generate/{session.id}"
+    client.post(url, json={"mode": "interactive"}, headers=auth_headers)
+    db_session.refresh(lead)
+    first = lead.personalized_email
+
+    response = client.post(url, json={"mode": "interactive", "force": True}, headers=auth_headers)
+    assert response.status_code == 200
+    db_session.refresh(lead)
+    assert lead.personalized_email != first and lead.personalized_email.startswith("Body")
+
+
+def test_generate_leads_with_identical_prompts(client, auth_headers, db_session, test_session_with_leads, monkeypatch):
+    """Two misses sharing a cache key store one entry instead of failing the commit."""
+    session = test_session_with_leads["session"]
+    alice, bob = test_session_with_leads["leads"]
+    for field in ("first_name", "last_name", "job_title", "company_name", "company_industry",
+                  "city", "state", "country", "linkedin_url", "scraped_context"):
+        setattr(bob, field, getattr(alice, field))
+    db_session.commit()
+
+    async def fake_generate_email(**kwargs):
+        return {"subject": "Hi", "body": "Generated body", "suggested_approach": "Direct"}
+
+    monkeypatch.setattr(llm_service, "generate_email", fake_generate_email)
+    response = client.post(
+        f"/api/generate/{session.id}", json={"mode": "interactive"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["success_count"] == 2
+    assert db_session.query(GenerationCacheEntry).count() == 1
+
+
+def test_generate_batch_mode_creates_job(client, auth_headers, test_session_with_leads, monkeypatch):
+    """Batch mode should return 202 with a job that can be polled."""
+    session = test_session_with_leads["session"]
+
+    async def noop(job_id):
+        return None
+
+    monkeypatch.setattr(generate_module, "_run_batch_job_background", noop)
+
+    response = client.post(
+        f"/api/generate/{session.id}",
+        json={"mode": "batch"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 202
+    data = response.json()
+    assert data["mode"] == "batch"
+    assert data["total_leads"] == 2
+
+    job_response = client.get(
+        f"/api/generate/{session.id}/jobs/{data['job_id']}", headers=auth_headers
+    )
+    assert job_response.status_code == 200
+    assert job_response.json()["status"] == "pending"
+    assert job_response.json()["total_requests"] == 2
+
+
+def test_generate_without_mode_stays_interactive(client, auth_headers, test_session_with_leads, monkeypatch):
+    """Clients that don't ask for a mode never get a batch job back."""
+    session = test_session_with_leads["session"]
+
+    async def fake_generate_email(**kwargs):
+        return {"subject": "Hi", "body": "Generated body", "suggested_approach": "Direct"}
+
+    monkeypatch.setattr(llm_service, "generate_email", fake_generate_email)
+    monkeypatch.setattr(settings, "BATCH_GENERATION_MIN_LEADS", 1)
+
+    response = client.post(f"/api/generate/{session.id}", json={}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["mode"] == "interactive"
+    assert response.json()["success_count"] == 2
+
+
+def test_generate_invalid_mode(client, auth_headers, test_session_with_leads):
+    """An unknown generation mode should return 400."""
+    session = test_session_with_leads["session"]
+    response = client.post(
+        f"/api/generate/{session.id}", json={"mode": "turbo"}, headers=auth_headers
+    )
+    assert response.status_code == 400
+
+
+def test_generate_email_streaming(monkeypatch):
+    """Streaming mode should emit partial text and still return validated JSON."""
+    content = json.dumps({
+        "subject": "Scaling AI at TechCorp",
+        "body": "Hi Alice, I saw TechCorp is hiring ML engineers and wanted to reach out.",
+        "suggested_approach": "Lead with hiring signal",
+    })
+    pieces = [content[i:i + 8] for i in range(0, len(content), 8)]
+    events = [
+        "data: " + json.dumps({"choices": [{"delta": {"content": piece}}]})
+        for piece in pieces
+    ]
+    events.append("data: " + json.dumps({"choices": [], "usage": {"total_tokens": 42}}))
+    events.append("data: [DONE]")
+    sse_body = "\n\n".join(events) + "\n\n"
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, text=sse_body, headers={"content-type": "text/event-stream"})
+
+    real_client = httpx.AsyncClient
+
+    def mock_client(*args, **kwargs):
+        return real_client(*args, transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(llm_service.httpx, "AsyncClient", mock_client)
+
+    partials = []
+    result = asyncio.run(
+        llm_service.generate_email(
+            {"first_name": "Alice"}, "", "Find AI engineers",
+            stream=True, on_partial=partials.append,
+        )
+    )
+
+    assert result["subject"] == "Scaling AI at TechCorp"
+    assert result["usage"] == {"total_tokens": 42}
+    assert partials
+    assert any(p.get("subject_complete") for p in partials)
+    assert any(p.get("body") and not p.get("body_complete") for p in partials)
+
+
+def test_batch_job_against_stand_in(db_session, test_user, test_session_with_leads, monkeypatch):
+    """A batch job should upload, poll and stream results back into the leads."""
+    session = test_session_with_leads["session"]
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", "sk-test")
+
+    job = GenerationJob(session_id=session.id, user_id=test_user.id, model="gpt-4o-mini")
+    db_session.add(job)
+    db_session.commit()
+
+    transport = httpx.ASGITransport(app=_make_batch_stand_in())
+    asyncio.run(
+        batch_service.process_generation_job(job.id, db_session, transport=transport, poll_interval=0)
+    )
+
+    db_session.refresh(job)
+    assert job.status == "completed"
+    assert job.batch_id == "batch-1"
+    assert job.success_count == 2
+    assert job.error_count == 0
+
+    for lead in db_session.query(Lead).filter(Lead.session_id == session.id):
+        assert lead.email_subject == "Quick question"
+        assert lead.personalized_email == f"Hello from batch ({lead.id})"
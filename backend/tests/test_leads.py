@@ -1,8 +1,17 @@
 """Tests for the leads endpoints (/api/leads)."""
 
+import asyncio
+import json
 import uuid
 
+import httpx
 import pytest
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.contact import Contact
+from app.models.lead import Lead
+from app.services import apollo_service, lead_enrichment, lead_generation, llm_service
 
 
 # ── GET /api/leads/{session_id} ─────────────────────────────────────────────
@@ -167,3 +176,241 @@ def test_update_lead_email_unauthenticated(client, test_session_with_leads):
         json={"personalized_email": "Test"},
     )
     assert response.status_code == 401
+
+
+# ── Lazy enrichment ─────────────────────────────────────────────────────────
+
+
+@pytest.fixture()
+def pending_lead(db_session, test_session_with_leads, monkeypatch):
+    """Bob as a lazily stored Apollo search stub, with Apollo faked."""
+    lead = test_session_with_leads["leads"][1]
+    contact = Contact(apollo_id="apollo-bob", first_name="Bob")
+    db_session.add(contact)
+    db_session.flush()
+    lead.contact_id = contact.id
+    lead.email, lead.email_status, lead.last_name = "", "unavailable", ""
+    lead.enrichment_status = lead_enrichment.PENDING
+    db_session.commit()
+
+    matches = []
+    apollo = {"status": 200}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        details = json.loads(request.content)["details"]
+        matches.append([d["id"] for d in details])
+        if apollo["status"] != 200:
+            return httpx.Response(apollo["status"], json={"error": "rate limited"})
+        return httpx.Response(200, json={"matches": [
+            {"id": d["id"], "first_name": "Bob", "last_name": "Jones", "email": "bob@dataio.com",
+             "email_status": "verified"} for d in details
+        ]})
+
+    transport = httpx.MockTransport(handler)
+    original = httpx.AsyncClient
+
+    class MockClient(original):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(apollo_service.httpx, "AsyncClient", MockClient)
+    monkeypatch.setattr(settings, "APOLLO_API_KEY", "key")
+    monkeypatch.setattr(settings, "APOLLO_LAZY_BATCH_WINDOW_MS", 0)
+    return {"lead": lead, "matches": matches, "apollo": apollo}
+
+
+def test_selecting_pending_lead_enriches_it(client, auth_headers, db_session, pending_lead):
+    lead = pending_lead["lead"]
+    response = client.patch(f"/api/leads/{lead.id}", json={"is_selected": True}, headers=auth_headers)
+    assert response.status_code == 200
+
+    db_session.refresh(lead)
+    assert pending_lead["matches"] == [["apollo-bob"]]
+    assert lead.enrichment_status == "enriched"
+    assert (lead.email, lead.last_name) == ("bob@dataio.com", "Jones")
+
+
+def test_enrich_endpoint_matches_viewed_leads_once(client, auth_headers, pending_lead):
+    lead = pending_lead["lead"]
+    url = f"/api/leads/{lead.session_id}/enrich"
+    for _ in range(2):
+        response = client.post(url, json={"lead_ids": [lead.id]}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()[0]["email"] == "bob@dataio.com"
+        assert response.json()[0]["enrichment_status"] == "enriched"
+    assert pending_lead["matches"] == [["apollo-bob"]]
+
+
+def test_failed_bulk_match_leaves_lead_pending(db_session, pending_lead):
+    lead = pending_lead["lead"]
+    pending_lead["apollo"]["status"] = 429
+    assert asyncio.run(lead_enrichment.enrich_ids(db_session, [lead.id])) == 0
+    db_session.refresh(lead)
+    assert lead.enrichment_status == "pending"
+
+    pending_lead["apollo"]["status"] = 200
+    assert asyncio.run(lead_enrichment.enrich_ids(db_session, [lead.id])) == 1
+    db_session.refresh(lead)
+    assert pending_lead["matches"] == [["apollo-bob"], ["apollo-bob"]]
+    assert (lead.enrichment_status, lead.email) == ("enriched", "bob@dataio.com")
+
+
+def test_lead_stays_pending_without_apollo_key(db_session, pending_lead, monkeypatch):
+    lead = pending_lead["lead"]
+    monkeypatch.setattr(settings, "APOLLO_API_KEY", "")
+    assert asyncio.run(lead_enrichment.enrich_ids(db_session, [lead.id])) == 0
+    db_session.refresh(lead)
+    assert lead.enrichment_status == "pending"
+    assert pending_lead["matches"] == []
+
+
+# ── On-demand generation ────────────────────────────────────────────────────
+
+
+def test_get_leads_paginates_in_listing_order(client, auth_headers, test_session_with_leads):
+    session = test_session_with_leads["session"]
+    url = f"/api/leads/{session.id}"
+
+    everything = [l["id"] for l in client.get(url, headers=auth_headers).json()]
+    pages = [
+        client.get(url, params={"offset": offset, "limit": 1}, headers=auth_headers).json()
+        for offset in (0, 1, 2)
+    ]
+    assert [[l["id"] for l in page] for page in pages] == [everything[:1], everything[1:], []]
+
+
+@pytest.fixture()
+def leads_without_emails(db_session, test_session_with_leads, monkeypatch):
+    """Both leads with no email yet, on-demand generation on and the LLM faked."""
+    session = test_session_with_leads["session"]
+    session.sender_context = "We sell AI"
+    for lead in test_session_with_leads["leads"]:
+        lead.personalized_email = None
+    db_session.commit()
+
+    written = []
+
+    async def fake_generate_email(**kwargs):
+        written.append(kwargs["lead_data"]["first_name"])
+        assert kwargs["sender_context"] == "We sell AI"
+        return {"subject": "Hi", "body": f"Hello {kwargs['lead_data']['first_name']}", "suggested_approach": ""}
+
+    monkeypatch.setattr(llm_service, "generate_email", fake_generate_email)
+    monkeypatch.setattr(settings, "GENERATION_ON_DEMAND", True)
+    monkeypatch.setattr(settings, "GENERATION_PREFETCH_AHEAD", 0)
+    return written
+
+
+def test_listing_a_page_generates_its_emails(client, auth_headers, test_session_with_leads, leads_without_emails):
+    session = test_session_with_leads["session"]
+    url = f"/api/leads/{session.id}"
+
+    first = client.get(url, params={"limit": 1}, headers=auth_headers).json()[0]
+    assert len(leads_without_emails) == 1
+
+    # The background prefetch ran after the first page was listed
+    listed = client.get(url, headers=auth_headers).json()
+    assert next(l for l in listed if l["id"] == first["id"])["personalized_email"].startswith("Hello")
+
+
+def test_listing_without_a_limit_prefetches_only_ahead(
+    client, auth_headers, test_session_with_leads, leads_without_emails, monkeypatch
+):
+    monkeypatch.setattr(settings, "GENERATION_PREFETCH_AHEAD", 1)
+    session = test_session_with_leads["session"]
+
+    listed = client.get(f"/api/leads/{session.id}", headers=auth_headers).json()
+    assert len(listed) == 2
+    assert leads_without_emails == [listed[0]["first_name"]]
+
+
+def test_pending_lead_is_enriched_before_its_email(
+    client, auth_headers, test_session_with_leads, pending_lead, leads_without_emails
+):
+    session = test_session_with_leads["session"]
+    url = f"/api/leads/{session.id}"
+
+    # The first page is generated in the background, Bob's stub matched first
+    client.get(url, params={"limit": 2}, headers=auth_headers)
+    assert pending_lead["matches"] == [["apollo-bob"]]
+    assert sorted(leads_without_emails) == ["Alice", "Bob"]
+    bob = next(l for l in client.get(url, headers=auth_headers).json() if l["id"] == pending_lead["lead"].id)
+    assert (bob["enrichment_status"], bob["email"]) == ("enriched", "bob@dataio.com")
+
+
+def test_no_email_for_lead_apollo_could_not_enrich(
+    db_session, test_session_with_leads, pending_lead, leads_without_emails
+):
+    session = test_session_with_leads["session"]
+    pending_lead["apollo"]["status"] = 429
+
+    assert asyncio.run(lead_generation.generate_leads(db_session, session, [pending_lead["lead"]])) == 0
+    db_session.refresh(pending_lead["lead"])
+    assert pending_lead["lead"].enrichment_status == "pending"
+    assert pending_lead["lead"].personalized_email is None
+    assert leads_without_emails == []
+
+
+def test_opening_a_lead_generates_its_email_once(client, auth_headers, test_session_with_leads, leads_without_emails):
+    session = test_session_with_leads["session"]
+    lead = test_session_with_leads["leads"][1]
+    url = f"/api/leads/{session.id}/open"
+
+    for _ in range(2):
+        response = client.post(url, json={"lead_ids": [lead.id]}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()[0]["personalized_email"] == "Hello Bob"
+    assert leads_without_emails == ["Bob"]
+
+
+# ── Template drafts ─────────────────────────────────────────────────────────
+
+
+def test_export_uses_template_drafts_without_waiting_for_the_llm(
+    client, auth_headers, test_session_with_leads, leads_without_emails, monkeypatch
+):
+    monkeypatch.setattr(settings, "GENERATION_TEMPLATE_DRAFTS", True)
+    session = test_session_with_leads["session"]
+
+    response = client.get(f"/api/export/{session.id}", params={"export_type": "outreach"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert "I came across TechCorp" in response.text
+    assert leads_without_emails == []
+
+
+def test_opened_draft_is_replaced_by_llm_email(
+    client, auth_headers, db_session, test_session_with_leads, leads_without_emails, monkeypatch
+):
+    monkeypatch.setattr(settings, "GENERATION_TEMPLATE_DRAFTS", True)
+    session = test_session_with_leads["session"]
+    lead = test_session_with_leads["leads"][0]
+
+    response = client.post(f"/api/leads/{session.id}/open", json={"lead_ids": [lead.id]}, headers=auth_headers)
+    assert response.json()[0]["email_tier"] == "template"
+
+    # The refinement ran in the background after the response
+    db_session.refresh(lead)
+    assert (lead.email_tier, lead.personalized_email) == ("llm", "Hello Alice")
+
+
+def test_refinement_keeps_drafts_edited_meanwhile(db_session, test_session_with_leads, monkeypatch):
+    session = test_session_with_leads["session"]
+    lead = test_session_with_leads["leads"][0]
+    lead.personalized_email = None
+    lead_generation.draft_leads([lead], "")
+    db_session.commit()
+
+    async def fake_generate_email(**kwargs):
+        # The user saves an edit from another request while the LLM is writing
+        other = Session(bind=db_session.get_bind())
+        other.query(Lead).filter(Lead.id == lead.id).update({"email_tier": "edited", "personalized_email": "Mine"})
+        other.commit()
+        other.close()
+        return {"subject": "Hi", "body": "From the LLM", "suggested_approach": ""}
+
+    monkeypatch.setattr(llm_service, "generate_email", fake_generate_email)
+    assert asyncio.run(lead_generation.generate_leads(db_session, session, [lead])) == 0
+
+    db_session.refresh(lead)
+    assert (lead.email_tier, lead.personalized_email) == ("edited", "Mine")
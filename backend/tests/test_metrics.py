@@ -0,0 +1,72 @@
+"""
+Tests for the /metrics endpoint and the in-process metrics registry.
+"""
+
+import asyncio
+
+from app.services import metering, metrics
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client, auth_headers):
+    """GET /metrics should serve the text format without authentication."""
+    client.get("/api/health")
+    client.get("/api/leads/does-not-exist", headers=auth_headers)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "# TYPE siyada_http_request_duration_seconds histogram" in body
+    assert 'route="/api/health"' in body
+    # Path parameters are labelled by template, not by value
+    assert "does-not-exist" not in body
+    assert "# TYPE siyada_pipelines_active gauge" in body
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram(
+        "test_latency_seconds", "Test histogram.", ("service",), buckets=(0.1, 1.0), register=False
+    )
+    histogram.observe(0.05, service="a")
+    histogram.observe(0.5, service="a")
+    histogram.observe(5.0, service="a")
+
+    lines = histogram.render().splitlines()
+    assert 'test_latency_seconds_bucket{service="a",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{service="a",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{service="a",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{service="a"} 3' in lines
+
+
+def test_outbound_calls_are_observed_outside_sessions():
+    """Vendor latency and errors should be counted even without a metering scope."""
+    before = metrics.OUTBOUND_LATENCY.count(vendor="serper", operation="search")
+    errors_before = metrics.OUTBOUND_ERRORS.value(vendor="serper", operation="search")
+
+    with metering.track("serper", "search"):
+        pass
+    try:
+        with metering.track("serper", "search"):
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+
+    assert metrics.OUTBOUND_LATENCY.count(vendor="serper", operation="search") == before + 2
+    assert metrics.OUTBOUND_ERRORS.value(vendor="serper", operation="search") == errors_before + 1
+
+
+def test_db_commits_are_counted(db_session):
+    before = metrics.DB_COMMITS.value()
+    db_session.commit()
+    assert metrics.DB_COMMITS.value() == before + 1
+
+
+def test_event_loop_monitor_records_lag():
+    async def sample():
+        task = asyncio.create_task(metrics.monitor_event_loop(interval=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    before = metrics.EVENT_LOOP_LAG_HISTOGRAM.count()
+    asyncio.run(sample())
+    assert metrics.EVENT_LOOP_LAG_HISTOGRAM.count() > before
@@ -1,9 +1,18 @@
 """Tests for the pipeline endpoints (/api/pipeline)."""
 
+import asyncio
 import uuid
 
 import pytest
 
+from app.core.config import settings
+from app.models.lead import Lead
+from app.models.search_session import SearchSession
+from app.services import company_service, contact_index, llm_service, parse_cache, pipeline_log, scraper_service, tracing
+from app.services import pipeline_service
+from benchmarks import stubs
+from benchmarks.pipeline import run_benchmark
+
 
 # ── POST /api/pipeline/run ──────────────────────────────────────────────────
 
@@ -75,3 +84,364 @@ def test_pipeline_status_unauthenticated(client, test_session_with_leads):
     session = test_session_with_leads["session"]
     response = client.get(f"/api/pipeline/{session.id}/status")
     assert response.status_code == 401
+
+
+# ── GET /api/pipeline/{session_id}/preview ──────────────────────────────────
+
+
+def test_pipeline_preview_returns_streaming_emails(client, auth_headers, test_session_with_leads):
+    """Previews still streaming should be listed; finished ones only on request."""
+    session = test_session_with_leads["session"]
+    alice, bob = test_session_with_leads["leads"]
+    pipeline_log.set_preview(session.id, alice.id, "Alice Smith", subject="Hello Al")
+    pipeline_log.set_preview(session.id, bob.id, "Bob Jones", subject="Done", body="Body", done=True)
+
+    try:
+        response = client.get(f"/api/pipeline/{session.id}/preview", headers=auth_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert [p["lead_id"] for p in data] == [alice.id]
+        assert data[0]["subject"] == "Hello Al"
+
+        response = client.get(
+            f"/api/pipeline/{session.id}/preview?include_done=true", headers=auth_headers
+        )
+        assert len(response.json()) == 2
+
+        status_data = client.get(f"/api/pipeline/{session.id}/status", headers=auth_headers).json()
+        assert len(status_data["previews"]) == 1
+    finally:
+        pipeline_log.clear(session.id)
+
+
+# ── Query parse cache ───────────────────────────────────────────────────────
+
+
+def test_parse_cache_reuses_normalized_queries(db_session, monkeypatch):
+    """Repeat queries differing only in case/whitespace should hit the cache."""
+    calls = []
+
+    async def fake_parse_query(raw_query):
+        calls.append(raw_query)
+        return {"search_queries": ["ai startups dubai"], "job_titles": ["CTO"]}
+
+    monkeypatch.setattr(llm_service, "parse_query", fake_parse_query)
+
+    parsed, hit, _ = asyncio.run(parse_cache.cached_parse_query(db_session, "Find CTOs in Dubai"))
+    assert hit is False
+    assert parsed["job_titles"] == ["CTO"]
+
+    parsed, hit, _ = asyncio.run(parse_cache.cached_parse_query(db_session, "  find ctos   in dubai. "))
+    assert hit is True
+    assert parsed["job_titles"] == ["CTO"]
+    assert len(calls) == 1
+
+    assert parse_cache.invalidate(db_session, "FIND CTOs in Dubai") == 1
+    _, hit, _ = asyncio.run(parse_cache.cached_parse_query(db_session, "Find CTOs in Dubai"))
+    assert hit is False
+    assert len(calls) == 2
+
+
+def test_parse_cache_skips_failed_parses(db_session, monkeypatch):
+    """Parses that returned an error should not be cached."""
+    async def failing_parse_query(raw_query):
+        return {"error": "boom", "search_queries": [raw_query]}
+
+    monkeypatch.setattr(llm_service, "parse_query", failing_parse_query)
+
+    asyncio.run(parse_cache.cached_parse_query(db_session, "Find CTOs"))
+    _, hit, _ = asyncio.run(parse_cache.cached_parse_query(db_session, "Find CTOs"))
+    assert hit is False
+
+
+def test_parse_cache_stats(client, auth_headers, db_session, test_session_with_leads):
+    """GET /api/pipeline/parse-cache/stats should report hit rate and latency."""
+    session = test_session_with_leads["session"]
+    session.parse_cache_hit = True
+    session.parse_latency_ms = 4.0
+    db_session.commit()
+
+    response = client.get("/api/pipeline/parse-cache/stats", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["sessions"] == 1
+    assert data["cache_hits"] == 1
+    assert data["hit_rate"] == 1.0
+    assert data["avg_hit_latency_ms"] == 4.0
+
+
+def test_parse_cache_invalidate_endpoint(client, auth_headers, db_session, test_session_with_leads):
+    """DELETE /api/pipeline/parse-cache should invalidate one of the user's own queries."""
+    parse_cache.store(db_session, parse_cache.normalize_query("Find AI engineers in San Francisco"), "m", {})
+
+    assert client.delete("/api/pipeline/parse-cache", headers=auth_headers).status_code == 422
+    response = client.delete(
+        "/api/pipeline/parse-cache", params={"query": "find AI engineers in San Francisco."}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {"invalidated": 1}
+
+
+def test_parse_cache_invalidate_rejects_other_users_queries(client, db_session, test_session_with_leads):
+    """A user cannot clear parses cached for queries only another user has run."""
+    query = test_session_with_leads["session"].raw_query
+    parse_cache.store(db_session, parse_cache.normalize_query(query), "m", {})
+    other = client.post(
+        "/api/auth/register",
+        json={"email": "other@example.com", "password": "StrongPass123!", "full_name": "Other User"},
+    ).json()
+
+    response = client.delete(
+        "/api/pipeline/parse-cache",
+        params={"query": query},
+        headers={"Authorization": f"Bearer {other['access_token']}"},
+    )
+    assert response.status_code == 404
+    assert parse_cache.count_entries(db_session) == 1
+
+
+# ── GET /api/pipeline/{session_id}/trace ────────────────────────────────────
+
+
+def test_pipeline_trace_waterfall(client, auth_headers, db_session, test_session_with_leads):
+    """Recorded spans should come back as a waterfall with a critical path."""
+    session = test_session_with_leads["session"]
+
+    async def fake_run():
+        with tracing.trace(session.id):
+            tracing.start_stage("search")
+            with tracing.client_span("serper", "https://google.serper.dev/search") as span:
+                span["status_code"] = 200
+                span["bytes"] = 512
+                await asyncio.sleep(0.01)
+            tracing.start_stage("scrape")
+
+            async def fetch(url, delay):
+                with tracing.client_span("scraper", url):
+                    await asyncio.sleep(delay)
+
+            await asyncio.gather(
+                fetch("https://fast.example.com", 0.005),
+                fetch("https://slow.example.com", 0.03),
+            )
+
+    asyncio.run(fake_run())
+    spans = tracing.flush(db_session, session.id)
+    assert len(spans) == 6
+
+    response = client.get(f"/api/pipeline/{session.id}/trace", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert [s["name"] for s in data["stages"]] == ["search", "scrape"]
+    assert data["waterfall"][0]["name"] == "pipeline"
+    assert data["waterfall"][0]["depth"] == 0
+    services = {s["service"]: s for s in data["services"]}
+    assert services["scraper"]["calls"] == 2
+    assert services["serper"]["bytes"] == 512
+    assert [s["name"] for s in data["critical_path"]] == [
+        "pipeline", "scrape", "scraper slow.example.com",
+    ]
+
+
+def test_pipeline_trace_otlp_encoding(test_session_with_leads):
+    """Spans should encode to OTLP JSON with hex trace and span IDs."""
+    session = test_session_with_leads["session"]
+    with tracing.trace(session.id):
+        with tracing.client_span("apollo", "https://api.apollo.io/x") as span:
+            span["status_code"] = 500
+    spans = tracing.get_pending(session.id)
+    payload = tracing.to_otlp(session.id, spans)
+    encoded = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert len(encoded) == 2
+    assert all(len(s["traceId"]) == 32 for s in encoded)
+    client_span = next(s for s in encoded if s["kind"] == 3)
+    assert {"key": "host", "value": {"stringValue": "api.apollo.io"}} in client_span["attributes"]
+
+
+def test_pipeline_trace_nonexistent_session(client, auth_headers):
+    response = client.get(f"/api/pipeline/{uuid.uuid4()}/trace", headers=auth_headers)
+    assert response.status_code == 404
+
+
+# ── Shared company records ──────────────────────────────────────────────────
+
+
+def test_leads_read_company_fields_from_shared_company(client, auth_headers, db_session, test_session_with_leads):
+    lead = test_session_with_leads["leads"][0]
+    company = company_service.get_or_create_many(db_session, ["https://www.Example.com/about"])["example.com"]
+    company_service.record_scrape(company, "Example | We build examples")
+    company.industry = "Software"
+    lead.company_id = company.id
+    lead.scraped_context = None
+    lead.company_industry = None
+    db_session.commit()
+
+    assert company_service.is_fresh(company)
+    response = client.get(f"/api/leads/{test_session_with_leads['session'].id}", headers=auth_headers)
+    data = next(l for l in response.json() if l["id"] == lead.id)
+    assert data["scraped_context"] == "Example | We build examples"
+    assert data["company_industry"] == "Software"
+
+
+def test_pipeline_reuses_fresh_company_context():
+    """A repeat query fetches no company websites the first run already scraped."""
+    config = stubs.StubConfig.instant()
+    scraper_service.robots.clear()
+    once = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config, distinct_queries=False))
+    scraper_service.robots.clear()
+    twice = asyncio.run(run_benchmark(sessions=2, concurrency=1, config=config, distinct_queries=False))
+
+    assert twice["statuses"] == {"completed": 2}
+    assert twice["vendor_requests"]["website"]["requests"] == once["vendor_requests"]["website"]["requests"]
+
+
+# ── Contact index ───────────────────────────────────────────────────────────
+
+
+def test_contact_index_merges_keys_and_reuses_enrichment(db_session, monkeypatch):
+    person = {
+        "apollo_id": "p-1",
+        "first_name": "Alice",
+        "email": "Alice@TechCorp.com",
+        "email_status": "verified",
+        "linkedin_url": "https://www.linkedin.com/in/alice-smith/",
+    }
+    contact = contact_index.upsert(db_session, person)
+    db_session.commit()
+
+    # Same person found by email or LinkedIn without an Apollo ID
+    assert contact_index.find(db_session, email="alice@techcorp.com").id == contact.id
+    assert contact_index.find(db_session, linkedin_url="http://linkedin.com/in/Alice-Smith").id == contact.id
+    assert contact_index.upsert(db_session, {"email": "alice@techcorp.com", "email_status": "unavailable"}).id == contact.id
+    # A different Apollo person sharing an email is kept apart
+    assert contact_index.upsert(db_session, {**person, "apollo_id": "p-2"}).id != contact.id
+
+    assert contact_index.reusable(db_session, ["p-1", "p-3"])["p-1"]["first_name"] == "Alice"
+    monkeypatch.setattr(settings, "CONTACT_ENRICHMENT_TTL_SECONDS", 0)
+    assert contact_index.reusable(db_session, ["p-1"]) == {}
+
+
+def test_template_drafts_do_not_count_as_contacted(db_session, test_user, test_session_with_leads):
+    """Only emails written by the LLM or the user mark a contact as already emailed."""
+    lead = test_session_with_leads["leads"][0]
+    contact = contact_index.upsert(db_session, {"apollo_id": "p-1", "email": "alice@techcorp.com"})
+    lead.contact_id = contact.id
+    lead.email_tier = "template"
+    db_session.commit()
+
+    def contacted():
+        return contact_index.contacted_by_user(db_session, test_user.id, [contact.id], exclude_session_id="later")
+
+    assert contacted() == set()
+    lead.email_tier = "llm"
+    db_session.commit()
+    assert contacted() == {contact.id}
+
+
+def test_pipeline_reuses_contacts_and_skips_already_emailed():
+    """A repeat query re-enriches no one and writes no second email to the same people."""
+    config = stubs.StubConfig.instant()
+    once = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config, distinct_queries=False))
+    twice = asyncio.run(run_benchmark(sessions=2, concurrency=1, config=config, distinct_queries=False))
+
+    assert twice["statuses"] == {"completed": 2}
+    for vendor in ("apollo_match", "openai"):
+        assert twice["vendor_requests"][vendor]["requests"] == once["vendor_requests"][vendor]["requests"]
+
+
+def test_pipeline_stops_apollo_search_at_target(monkeypatch):
+    """With 3 people per stub company, a target of 4 needs exactly two domains."""
+    monkeypatch.setattr(settings, "APOLLO_TARGET_LEADS", 4)
+    results = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=stubs.StubConfig.instant()))
+
+    assert results["statuses"] == {"completed": 1}
+    assert results["vendor_requests"]["apollo_search"]["requests"] == 2
+    # One bulk match per company: 3 people, then the 1 still needed
+    assert results["vendor_requests"]["apollo_match"]["requests"] == 2
+
+
+def test_pipeline_uses_website_contacts_before_apollo(monkeypatch):
+    """Companies whose sites list enough named addresses cost no Apollo calls."""
+    # Reachable from the scraped companies alone (two site contacts each)
+    monkeypatch.setattr(settings, "APOLLO_TARGET_LEADS", 10)
+    scraper_service.robots.clear()
+    config = stubs.StubConfig.instant()
+    config.site_contacts = settings.HARVEST_MIN_CONTACTS
+    results = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+
+    assert results["statuses"] == {"completed": 1}
+    assert "apollo_search" not in results["vendor_requests"]
+    assert "apollo_match" not in results["vendor_requests"]
+    assert results["vendor_requests"]["openai"]["requests"] > 0
+
+
+def test_pipeline_lazy_enrichment_matches_only_prefetched_leads(monkeypatch):
+    monkeypatch.setattr(settings, "APOLLO_LAZY_ENRICHMENT", True)
+    monkeypatch.setattr(settings, "APOLLO_TARGET_LEADS", 12)
+    config = stubs.StubConfig.instant()
+
+    monkeypatch.setattr(settings, "APOLLO_PREFETCH_LEADS", 0)
+    lazy = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+    assert lazy["statuses"] == {"completed": 1}
+    assert lazy["vendor_requests"]["apollo_search"]["requests"] == 4
+    assert "apollo_match" not in lazy["vendor_requests"]
+
+    # The first five selected leads are matched, in one bulk request, after completion
+    monkeypatch.setattr(settings, "APOLLO_PREFETCH_LEADS", 5)
+    prefetched = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+    assert prefetched["vendor_requests"]["apollo_match"]["requests"] == 1
+
+
+def test_pipeline_on_demand_generation_writes_only_the_first_emails(monkeypatch):
+    monkeypatch.setattr(settings, "GENERATION_ON_DEMAND", True)
+    monkeypatch.setattr(settings, "APOLLO_TARGET_LEADS", 12)
+    config = stubs.StubConfig.instant()
+
+    monkeypatch.setattr(settings, "GENERATION_PREFETCH_AHEAD", 0)
+    parse_only = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+    monkeypatch.setattr(settings, "GENERATION_PREFETCH_AHEAD", 5)
+    prefetched = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+
+    assert parse_only["statuses"] == prefetched["statuses"] == {"completed": 1}
+    openai = parse_only["vendor_requests"]["openai"]["requests"]
+    assert prefetched["vendor_requests"]["openai"]["requests"] == openai + 5
+
+
+def test_pipeline_template_drafts_are_refined_after_completion(monkeypatch):
+    """Drafts cost no LLM calls; the refinement writes every email once the run is complete."""
+    monkeypatch.setattr(settings, "APOLLO_TARGET_LEADS", 6)
+    config = stubs.StubConfig.instant()
+    eager = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+
+    monkeypatch.setattr(settings, "GENERATION_TEMPLATE_DRAFTS", True)
+    drafted = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+    monkeypatch.setattr(settings, "GENERATION_ON_DEMAND", True)
+    monkeypatch.setattr(settings, "GENERATION_PREFETCH_AHEAD", 0)
+    drafts_only = asyncio.run(run_benchmark(sessions=1, concurrency=1, config=config))
+
+    assert drafted["statuses"] == drafts_only["statuses"] == {"completed": 1}
+    assert drafted["vendor_requests"]["openai"]["requests"] == eager["vendor_requests"]["openai"]["requests"]
+    assert drafts_only["vendor_requests"]["openai"]["requests"] == eager["vendor_requests"]["openai"]["requests"] - 6
+
+
+def test_pipeline_adds_people_on_both_website_and_apollo_once(db_session, test_user, monkeypatch):
+    """A site listing someone Apollo also returns yields one lead for them, not two."""
+    for name in ("SERPER_API_KEY", "APOLLO_API_KEY", "OPENAI_API_KEY"):
+        monkeypatch.setattr(settings, name, "stub-key")
+    monkeypatch.setattr(settings, "APOLLO_TARGET_LEADS", 4)
+    config = stubs.StubConfig.instant()
+    config.site_contacts = 1  # below HARVEST_MIN_CONTACTS, so Apollo is still searched
+    session = SearchSession(user_id=test_user.id, raw_query="Find CTOs at SaaS companies", status="pending")
+    db_session.add(session)
+    db_session.commit()
+
+    scraper_service.robots.clear()
+    with stubs.install(stubs.create_stub_app(config)):
+        asyncio.run(pipeline_service.run_pipeline(session.id, session.raw_query, "Sender", db_session, settings))
+    pipeline_log.clear(session.id)
+
+    leads = db_session.query(Lead).filter(Lead.session_id == session.id).all()
+    emails = [lead.email for lead in leads]
+    assert len(leads) == 4
+    assert len(set(emails)) == len(emails)
+    assert len({lead.contact_id for lead in leads}) == 4
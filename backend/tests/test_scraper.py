@@ -0,0 +1,367 @@
+"""
+Tests for website scraping: the shared fetch scheduler and page extraction.
+"""
+
+import asyncio
+import socket
+import time
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services import crawler_service, dns_cache, metrics, scraper_service
+from app.services.scrape_scheduler import ScrapeScheduler
+
+
+def _scheduler(**overrides) -> ScrapeScheduler:
+    options = dict(
+        max_concurrency=8,
+        min_concurrency=1,
+        initial_concurrency=4,
+        per_host_limit=1,
+        per_host_delay=0.0,
+        latency_target=1.0,
+    )
+    options.update(overrides)
+    return ScrapeScheduler(**options)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_robots_cache():
+    scraper_service.robots.clear()
+    yield
+    scraper_service.robots.clear()
+
+
+def _patch_client(monkeypatch, handler, robots_txt=None):
+    def route(request):
+        if request.url.path == "/robots.txt":
+            return httpx.Response(200, text=robots_txt) if robots_txt is not None else httpx.Response(404)
+        return handler(request)
+
+    transport = httpx.MockTransport(route)
+    original = httpx.AsyncClient
+
+    class MockClient(original):
+        def __init__(self, *args, **kwargs):
+            kwargs.pop("verify", None)
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(scraper_service.httpx, "AsyncClient", MockClient)
+
+
+# ── Scheduler ───────────────────────────────────────────────────────────────
+
+
+def test_scheduler_limits_concurrency_per_host():
+    """One host is fetched serially while other hosts proceed in parallel."""
+    scheduler = _scheduler(per_host_limit=1)
+    active: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    async def fetch(url, host):
+        async with scheduler.slot(url):
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+
+    async def run():
+        await asyncio.gather(
+            *(fetch(f"https://a.example/{i}", "a") for i in range(3)),
+            *(fetch(f"https://b{i}.example/", "b") for i in range(3)),
+        )
+
+    asyncio.run(run())
+    assert peak["a"] == 1
+    assert peak["b"] == 3
+    assert scheduler.active == 0
+
+
+def test_scheduler_spaces_requests_to_a_host():
+    scheduler = _scheduler(per_host_limit=4, per_host_delay=0.05)
+    starts = []
+
+    async def fetch(i):
+        async with scheduler.slot(f"https://slow.example/{i}"):
+            starts.append(time.monotonic())
+
+    async def run():
+        await asyncio.gather(*(fetch(i) for i in range(3)))
+
+    asyncio.run(run())
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+
+
+def test_scheduler_adapts_limit_aimd():
+    """Healthy fetches grow the limit additively; throttling halves it."""
+    scheduler = _scheduler(initial_concurrency=4)
+    for _ in range(8):
+        scheduler.record("https://a.example/", 0.1, status_code=200)
+    assert 5 <= scheduler.limit < 6
+
+    scheduler.record("https://a.example/", 0.1, status_code=429, retry_after=5)
+    assert 2.5 <= scheduler.limit < 3
+    assert scheduler._host("a.example").delay == 5
+
+    # A second failure from the same burst does not halve again
+    scheduler.record("https://a.example/", 10.0, timed_out=True)
+    assert 2.5 <= scheduler.limit < 3
+
+    # Slow successes don't grow the limit
+    limit = scheduler.limit
+    scheduler.record("https://a.example/", 5.0, status_code=200)
+    assert scheduler.limit == limit
+
+
+def test_scrape_reports_throttling_to_scheduler(monkeypatch):
+    scheduler = _scheduler(initial_concurrency=4)
+    monkeypatch.setattr(scraper_service, "scheduler", scheduler)
+    _patch_client(monkeypatch, lambda request: httpx.Response(503, headers={"Retry-After": "2"}))
+
+    result = asyncio.run(scraper_service.scrape("https://busy.example/"))
+    assert result["error"] == "HTTP 503"
+    assert scheduler.limit == 2
+    assert scheduler._host("busy.example").delay == 2
+
+
+# ── Header-first fetch ──────────────────────────────────────────────────────
+
+
+class _ChunkStream(httpx.AsyncByteStream):
+    """Body that records how many chunks the client actually pulled."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.served = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.served += 1
+            yield chunk
+
+
+def test_scrape_rejects_non_html_from_headers(monkeypatch):
+    """A PDF should be rejected without its body being read."""
+    stream = _ChunkStream([b"%PDF" + b"0" * 65536] * 50)
+    monkeypatch.setattr(scraper_service, "scheduler", _scheduler())
+    _patch_client(monkeypatch, lambda request: httpx.Response(
+        200,
+        headers={"content-type": "application/pdf", "content-length": str(50 * 65540)},
+        stream=stream,
+    ))
+    saved_before = metrics.SCRAPER_BYTES_SAVED.value(reason="non_html")
+
+    result = asyncio.run(scraper_service.scrape("https://docs.example/whitepaper.pdf"))
+    assert result["error"] == "Non-HTML content type: application/pdf"
+    assert stream.served == 0
+    assert metrics.SCRAPER_BYTES_SAVED.value(reason="non_html") == saved_before + 50 * 65540
+
+
+def test_scrape_caps_oversized_pages(monkeypatch):
+    """Huge pages are cut off at the byte cap but their head is still parsed."""
+    head = b"<html><head><title>Huge Co</title></head><body><p> hello@hugeco.io </p>"
+    stream = _ChunkStream([head] + [b"<p> " + b"lorem " * 10000 + b"</p>"] * 200)
+    monkeypatch.setattr(settings, "SCRAPER_MAX_BYTES", 100_000)
+    monkeypatch.setattr(scraper_service, "scheduler", _scheduler())
+    seen_headers = {}
+
+    def handler(request):
+        seen_headers.update(request.headers)
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, stream=stream)
+
+    _patch_client(monkeypatch, handler)
+
+    result = asyncio.run(scraper_service.scrape("https://hugeco.io/"))
+    assert result["error"] is None
+    assert result["title"] == "Huge Co"
+    assert "hello@hugeco.io" in result["emails"]
+    assert stream.served <= 3
+    assert "gzip" in seen_headers["accept-encoding"]
+
+
+# ── Site crawl ──────────────────────────────────────────────────────────────
+
+
+_SITE = {
+    "/blog/launch": (
+        "<html><head><title>Acme launches</title></head><body><p>Launch post</p>"
+        '<a href="/team">Our Team</a> <a href="/company/about-us">About</a>'
+        '<a href="/contact">Contact</a> <a href="/pricing">Pricing</a>'
+        '<a href="/privacy">Privacy</a> <a href="https://other.example/team">Partner</a>'
+        "</body></html>"
+    ),
+    "/": "<html><head><title>Acme</title></head><body><p>Home</p></body></html>",
+    "/team": "<html><body><p>Jane Doe, CEO. jane@acme.io</p></body></html>",
+    "/company/about-us": "<html><body><p>Founded in 2012 in Austin.</p></body></html>",
+    "/contact": "<html><body><p>Write to hello@acme.io</p></body></html>",
+}
+
+
+def test_plan_frontier_prioritizes_company_pages():
+    links = scraper_service.parse_html(_SITE["/blog/launch"], base_url="https://acme.io/blog/launch")["links"]
+    frontier = crawler_service.plan_frontier("https://acme.io/blog/launch", links, max_pages=4)
+    assert frontier == [
+        ("https://acme.io/team", "team"),
+        ("https://acme.io/company/about-us", "about"),
+        ("https://acme.io/contact", "contact"),
+    ]
+    # The homepage makes the cut once the more specific pages are covered
+    frontier = crawler_service.plan_frontier("https://acme.io/blog/launch", links, max_pages=10)
+    assert frontier[-1] == ("https://acme.io/", "home")
+
+
+def test_crawl_site_merges_pages_within_budget(monkeypatch):
+    monkeypatch.setattr(scraper_service, "scheduler", _scheduler(per_host_limit=4))
+    fetched = []
+
+    def handler(request):
+        fetched.append(request.url.path)
+        return httpx.Response(200, headers={"content-type": "text/html"}, text=_SITE[request.url.path])
+
+    _patch_client(monkeypatch, handler)
+
+    result = asyncio.run(crawler_service.crawl_site("https://acme.io/blog/launch", max_pages=3))
+    assert sorted(fetched) == ["/blog/launch", "/company/about-us", "/team"]
+    assert result["error"] is None
+    assert result["title"] == "Acme launches"
+    assert [p["kind"] for p in result["pages"]][0] == "landing"
+    assert {p["kind"] for p in result["pages"]} == {"landing", "team", "about"}
+    assert "jane@acme.io" in result["emails"]
+
+    context = crawler_service.build_context(result)
+    assert context.startswith("Acme launches | Launch post")
+    assert "Team: Jane Doe, CEO." in context
+
+
+def test_crawl_site_stops_at_time_budget(monkeypatch):
+    """Slow follow-up pages are abandoned; the landing page is still used."""
+    monkeypatch.setattr(scraper_service, "scheduler", _scheduler(per_host_limit=4))
+    original_scrape = scraper_service.scrape
+
+    async def scrape(url):
+        if not url.endswith("/blog/launch"):
+            await asyncio.sleep(5)
+        return await original_scrape(url)
+
+    monkeypatch.setattr(scraper_service, "scrape", scrape)
+    _patch_client(monkeypatch, lambda request: httpx.Response(
+        200, headers={"content-type": "text/html"}, text=_SITE[request.url.path],
+    ))
+
+    started = time.perf_counter()
+    result = asyncio.run(crawler_service.crawl_site("https://acme.io/blog/launch", time_budget=0.2))
+    assert time.perf_counter() - started < 1.0
+    assert [p["kind"] for p in result["pages"]] == ["landing"]
+    assert scraper_service.scheduler.active == 0
+
+
+def test_build_context_keeps_single_page_format():
+    scraped = {"title": "Acme", "meta_description": "Widgets", "text_content": "x" * 800}
+    assert crawler_service.build_context(scraped) == "Acme | Widgets | " + "x" * 500
+
+
+# ── robots.txt and DNS caches ───────────────────────────────────────────────
+
+
+def test_scrape_honours_robots_txt(monkeypatch):
+    scheduler = _scheduler()
+    monkeypatch.setattr(scraper_service, "scheduler", scheduler)
+    seen = []
+
+    def handler(request):
+        seen.append(request.url.path)
+        return httpx.Response(200, headers={"content-type": "text/html"}, text="<title>Shop</title>")
+
+    _patch_client(monkeypatch, handler, robots_txt="User-agent: *\nDisallow: /private/\nCrawl-delay: 2\n")
+
+    async def run():
+        blocked = await scraper_service.scrape("https://shop.example/private/team")
+        allowed = await scraper_service.scrape("https://shop.example/about")
+        return blocked, allowed
+
+    blocked, allowed = asyncio.run(run())
+    assert blocked["error"] == "Disallowed by robots.txt"
+    assert allowed["title"] == "Shop"
+    assert seen == ["/about"]
+    assert scheduler._host("shop.example").delay == 2
+    # Fetched once, then served from memory
+    assert metrics.CACHE_REQUESTS.value(cache="robots", result="hit") >= 1
+
+
+def test_dns_cache_ttl_negative_caching_and_single_flight():
+    lookups = []
+
+    async def lookup(host, port):
+        lookups.append(host)
+        await asyncio.sleep(0.01)
+        if host == "gone.example":
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return ["192.0.2.10"], 120
+
+    cache = dns_cache.DnsCache(default_ttl=300, negative_ttl=60, lookup=lookup)
+
+    async def run():
+        results = await asyncio.gather(*(cache.resolve("Acme.example") for _ in range(5)))
+        assert results == [["192.0.2.10"]] * 5
+        for _ in range(2):
+            with pytest.raises(socket.gaierror):
+                await cache.resolve("gone.example")
+
+    asyncio.run(run())
+    assert lookups == ["acme.example", "gone.example"]
+
+    # Expired entries are looked up again
+    cache._entries["acme.example"].expires = time.monotonic() - 1
+    asyncio.run(cache.resolve("acme.example"))
+    assert lookups[-1] == "acme.example" and len(lookups) == 3
+
+
+def test_caching_transport_connects_to_cached_address():
+    """Requests to a hostname connect to the cached address with no system lookup."""
+    lookups = []
+
+    async def lookup(host, port):
+        lookups.append(host)
+        return ["127.0.0.1"], 300
+
+    cache = dns_cache.DnsCache(default_ttl=300, negative_ttl=60, lookup=lookup)
+
+    async def serve(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            for _ in range(3):
+                async with httpx.AsyncClient(transport=dns_cache.CachingTransport(cache)) as client:
+                    response = await client.get(f"http://company.invalid:{port}/")
+                    assert response.text == "ok"
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+    assert lookups == ["company.invalid"]
+
+
+def test_caching_transport_raises_httpx_errors():
+    """Failed lookups surface as the httpx errors the scraper handles."""
+    async def lookup(host, port):
+        raise socket.gaierror(socket.EAI_NONAME, host)
+
+    cache = dns_cache.DnsCache(default_ttl=300, negative_ttl=60, lookup=lookup)
+
+    async def run():
+        async with httpx.AsyncClient(transport=dns_cache.CachingTransport(cache)) as client:
+            with pytest.raises(httpx.ConnectError):
+                await client.get("http://dead.invalid/")
+
+    asyncio.run(run())
@@ -0,0 +1,181 @@
+"""
+Tests for Serper search: batch mode, cross-session coalescing and paging.
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from app.core.config import settings
+from app.services import serper_service
+
+
+def _fake_serper(monkeypatch, fail: bool = False) -> list:
+    """Answer single and array payloads; returns the list of request payloads."""
+    calls: list = []
+
+    def organic(query: dict) -> dict:
+        # Every query shares one URL so cross-query dedup is exercised
+        slug = query["q"].replace(" ", "-")
+        return {"organic": [
+            {"title": slug, "link": f"https://www.{slug}.com/"},
+            {"title": "shared", "link": "https://shared.com/"},
+        ]}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        calls.append(payload)
+        if fail:
+            return httpx.Response(500, json={"error": "boom"})
+        if isinstance(payload, list):
+            return httpx.Response(200, json=[organic(q) for q in payload])
+        return httpx.Response(200, json=organic(payload))
+
+    transport = httpx.MockTransport(handler)
+    original = httpx.AsyncClient
+
+    class MockClient(original):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(serper_service.httpx, "AsyncClient", MockClient)
+    return calls
+
+
+def test_batch_mode_sends_all_queries_in_one_request(monkeypatch):
+    calls = _fake_serper(monkeypatch)
+
+    results = asyncio.run(serper_service.search(["a b", "c d", "e f"], api_key_override="key"))
+
+    assert calls == [[{"q": "a b", "num": 10}, {"q": "c d", "num": 10}, {"q": "e f", "num": 10}]]
+    # Split back per query, in order, with the shared URL kept once
+    assert [r["url"] for r in results] == [
+        "https://www.a-b.com/", "https://shared.com/", "https://www.c-d.com/", "https://www.e-f.com/",
+    ]
+    assert results[0]["domain"] == "a-b.com"
+    assert results[2]["position"] == 1
+
+
+def test_concurrent_searches_are_coalesced(monkeypatch):
+    """Pipelines searching at the same moment share one request; a repeated query is sent once."""
+    calls = _fake_serper(monkeypatch)
+
+    async def run():
+        return await asyncio.gather(
+            serper_service.search(["a b", "c d"], api_key_override="key"),
+            serper_service.search(["c d", "e f"], api_key_override="key"),
+        )
+
+    first, second = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert [q["q"] for q in calls[0]] == ["a b", "c d", "e f"]
+    assert [r["url"] for r in first] == ["https://www.a-b.com/", "https://shared.com/", "https://www.c-d.com/"]
+    assert [r["url"] for r in second] == ["https://www.c-d.com/", "https://shared.com/", "https://www.e-f.com/"]
+
+
+def test_full_batch_is_sent_without_waiting(monkeypatch):
+    calls = _fake_serper(monkeypatch)
+    monkeypatch.setattr(serper_service.batcher, "max_queries", 2)
+    monkeypatch.setattr(serper_service.batcher, "window", 60.0)
+
+    results = asyncio.run(asyncio.wait_for(
+        serper_service.search(["a", "b", "c", "d"], api_key_override="key"), timeout=5,
+    ))
+
+    assert [[q["q"] for q in call] for call in calls] == [["a", "b"], ["c", "d"]]
+    assert len(results) == 5
+
+
+def test_failed_batch_returns_no_results(monkeypatch):
+    _fake_serper(monkeypatch, fail=True)
+
+    assert asyncio.run(serper_service.search(["a", "b"], api_key_override="key")) == []
+
+
+def test_single_mode_sends_one_request_per_query(monkeypatch):
+    calls = _fake_serper(monkeypatch)
+    monkeypatch.setattr(settings, "SERPER_BATCH_MODE", False)
+
+    results = asyncio.run(serper_service.search(["a", "b"], api_key_override="key"))
+
+    assert sorted(c["q"] for c in calls) == ["a", "b"]
+    assert len(results) == 3
+
+
+def _fake_paged_serper(monkeypatch, domains_per_query: dict[str, int], total: int = 30) -> list:
+    """Each query has ``total`` results cycling through ``domains_per_query[q]`` domains."""
+    calls: list = []
+
+    def page_of(query: dict) -> dict:
+        num, page = query["num"], query.get("page", 1)
+        start = (page - 1) * num
+        count = domains_per_query[query["q"]]
+        return {"organic": [
+            {"title": str(i), "link": f"https://{query['q']}{i % count}.com/page/{i}"}
+            for i in range(start, min(start + num, total))
+        ]}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        calls.append(payload)
+        return httpx.Response(200, json=[page_of(q) for q in payload])
+
+    transport = httpx.MockTransport(handler)
+    original = httpx.AsyncClient
+
+    class MockClient(original):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = transport
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(serper_service.httpx, "AsyncClient", MockClient)
+    return calls
+
+
+def _pages(calls: list) -> list[list[tuple[str, int]]]:
+    return [[(q["q"], q.get("page", 1)) for q in call] for call in calls]
+
+
+def test_search_domains_stops_after_first_page_when_enough(monkeypatch):
+    calls = _fake_paged_serper(monkeypatch, {"a": 10, "b": 10})
+
+    results = asyncio.run(serper_service.search_domains(["a", "b"], min_domains=15, api_key_override="key"))
+
+    assert _pages(calls) == [[("a", 1), ("b", 1)]]
+    assert len({r["domain"] for r in results}) == 20
+
+
+def test_search_domains_pages_until_enough_domains(monkeypatch):
+    """Queries full of repeat domains are paged further."""
+    calls = _fake_paged_serper(monkeypatch, {"a": 25, "b": 3}, total=30)
+
+    results = asyncio.run(serper_service.search_domains(["a", "b"], min_domains=25, api_key_override="key"))
+
+    assert _pages(calls) == [[("a", 1), ("b", 1)], [("a", 2), ("b", 2)], [("a", 3), ("b", 3)]]
+    assert len({r["domain"] for r in results}) == 28
+    assert [r["position"] for r in results if r["domain"] == "a24.com"] == [25]
+
+
+def test_search_domains_respects_max_pages_and_accept(monkeypatch):
+    calls = _fake_paged_serper(monkeypatch, {"a": 30}, total=30)
+
+    results = asyncio.run(serper_service.search_domains(
+        ["a"], min_domains=100, max_pages=2, api_key_override="key",
+        accept=lambda r: not r["domain"].startswith("a1"),
+    ))
+
+    assert _pages(calls) == [[("a", 1)], [("a", 2)]]
+    assert len(results) == 20
+
+
+def test_search_domains_stops_paging_exhausted_queries(monkeypatch):
+    calls = _fake_paged_serper(monkeypatch, {"a": 3}, total=15)
+
+    results = asyncio.run(serper_service.search_domains(["a"], min_domains=10, api_key_override="key"))
+
+    # Page 2 came back short, so there's no page 3
+    assert _pages(calls) == [[("a", 1)], [("a", 2)]]
+    assert len(results) == 15
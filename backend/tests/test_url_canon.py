@@ -0,0 +1,59 @@
+"""
+Tests for URL canonicalization and registrable-domain extraction.
+"""
+
+import pytest
+
+from app.services import url_canon
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("https://www.acme.com:443/about", "acme.com"),
+    ("https://blog.acme.com/post/", "acme.com"),
+    ("ACME.com.", "acme.com"),
+    ("acme.com/path?q=1", "acme.com"),
+    ("https://shop.globex.co.uk/", "globex.co.uk"),
+    ("globex.co.uk", "globex.co.uk"),
+    ("https://piedpiper.github.io/x", "piedpiper.github.io"),
+    ("https://a.b.hooli.com.sa", "hooli.com.sa"),
+    ("https://new.startup.unlistedtld", "startup.unlistedtld"),
+    ("co.uk", "co.uk"),
+    ("http://127.0.0.1:8000/", "127.0.0.1"),
+    ("localhost", "localhost"),
+    ("", ""),
+])
+def test_registrable_domain(value, expected):
+    assert url_canon.registrable_domain(value) == expected
+
+
+def test_wildcard_and_exception_rules():
+    trie = url_canon.compile_rules(["// comment", "ck", "*.ck", "!www.ck", "jp", "co.jp"])
+
+    assert url_canon.public_suffix_length(["acme", "co", "ck"], trie) == 2
+    assert url_canon.public_suffix_length(["www", "ck"], trie) == 1
+    assert url_canon.public_suffix_length(["shop", "acme", "co", "jp"], trie) == 2
+    assert url_canon.public_suffix_length(["acme", "example"], trie) == 1
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTPS://WWW.Acme.com:443/About/", "https://www.acme.com/About"),
+    ("http://acme.com:80", "http://acme.com/"),
+    ("https://acme.com:8443/x", "https://acme.com:8443/x"),
+    ("https://acme.com/?utm_source=g&b=2&a=1&gclid=x#team", "https://acme.com/?a=1&b=2"),
+    ("acme.com/pricing/", "https://acme.com/pricing"),
+])
+def test_canonical_url(url, expected):
+    assert url_canon.canonical_url(url) == expected
+
+
+def test_url_key_ignores_scheme_www_and_noise():
+    keys = {
+        url_canon.url_key(u) for u in (
+            "https://www.acme.com/about/",
+            "http://acme.com/about",
+            "https://acme.com/about?utm_campaign=x#top",
+            "https://acme.com:443/about",
+        )
+    }
+    assert keys == {"acme.com/about"}
+    assert url_canon.url_key("https://acme.com/about?page=2") != url_canon.url_key("https://acme.com/about")
@@ -0,0 +1,103 @@
+"""Tests for the usage metering endpoints (/api/usage)."""
+
+import uuid
+
+import pytest
+
+from app.services import metering
+
+
+def _record_session_usage(db_session, session, user, lead_id):
+    with metering.scope(session_id=session.id, user_id=user.id, stage="query"):
+        metering.record(
+            "openai", "chat.completions", 1200.0,
+            model="gpt-4o-mini", prompt_tokens=1000, completion_tokens=500,
+        )
+        metering.set_stage("search")
+        metering.record("serper", "search", 300.0)
+        metering.record("serper", "search", 500.0, success=False)
+        with metering.scope(stage="generate", lead_id=lead_id):
+            metering.record(
+                "openai", "chat.completions", 2000.0,
+                model="gpt-4o-mini", prompt_tokens=2000, completion_tokens=1000,
+            )
+    assert metering.flush(db_session, session.id) == 4
+
+
+# ── Metering service ────────────────────────────────────────────────────────
+
+
+def test_calls_outside_a_scope_are_not_recorded():
+    """Calls without a session scope (e.g. key tests) should be ignored."""
+    session_id = str(uuid.uuid4())
+    metering.record("serper", "search", 10.0)
+    assert metering.pending_count(session_id) == 0
+
+
+def test_estimate_cost_uses_model_pricing():
+    """Costs should follow the per-model price table, with a batch discount."""
+    assert metering.estimate_cost("gpt-4o-mini", 1_000_000, 0) == pytest.approx(0.15)
+    assert metering.estimate_cost("gpt-4o-mini-2024-07-18", 0, 1_000_000) == pytest.approx(0.60)
+    assert metering.estimate_cost("gpt-4o-mini", 1_000_000, 0, batch=True) == pytest.approx(0.075)
+    assert metering.estimate_cost("unknown-model", 1000, 1000) == 0.0
+
+
+# ── GET /api/usage/sessions/{session_id} ────────────────────────────────────
+
+
+def test_session_usage_report(client, auth_headers, db_session, test_user, test_session_with_leads):
+    """The session report should aggregate by stage, vendor and lead."""
+    session = test_session_with_leads["session"]
+    lead = test_session_with_leads["leads"][0]
+    _record_session_usage(db_session, session, test_user, lead.id)
+
+    response = client.get(f"/api/usage/sessions/{session.id}", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["totals"]["calls"] == 4
+    assert data["totals"]["errors"] == 1
+    assert data["totals"]["total_tokens"] == 4500
+    assert data["totals"]["cost_usd"] == pytest.approx(
+        (3000 * 0.15 + 1500 * 0.60) / 1_000_000
+    )
+
+    stages = {row["key"]: row for row in data["by_stage"]}
+    assert stages["search"]["calls"] == 2
+    assert stages["search"]["avg_latency_ms"] == 400.0
+    assert stages["generate"]["total_tokens"] == 3000
+
+    vendors = {row["key"] for row in data["by_vendor"]}
+    assert vendors == {"openai:chat.completions", "serper:search"}
+    assert [row["key"] for row in data["by_lead"]] == [lead.id]
+
+
+def test_session_usage_nonexistent_session(client, auth_headers):
+    """GET /api/usage/sessions/{nonexistent} should return 404."""
+    response = client.get(f"/api/usage/sessions/{uuid.uuid4()}", headers=auth_headers)
+    assert response.status_code == 404
+
+
+# ── GET /api/usage/report ───────────────────────────────────────────────────
+
+
+def test_usage_report_groups_by_day(client, auth_headers, db_session, test_user, test_session_with_leads):
+    """The user report should group usage per day, vendor and model."""
+    session = test_session_with_leads["session"]
+    _record_session_usage(db_session, session, test_user, test_session_with_leads["leads"][0].id)
+
+    response = client.get("/api/usage/report?days=7", headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["days"] == 7
+    assert data["totals"]["calls"] == 4
+    rows = {(row["vendor"], row["model"]): row for row in data["daily"]}
+    assert rows[("openai", "gpt-4o-mini")]["calls"] == 2
+    assert rows[("serper", None)]["calls"] == 2
+
+
+def test_usage_report_unauthenticated(client):
+    """GET /api/usage/report without auth should return 401."""
+    response = client.get("/api/usage/report")
+    assert response.status_code == 401
@@ -7,11 +7,14 @@ import LeadDetailOverlay from './LeadDetailOverlay';
 interface LeadListProps {
   leads: Lead[];
   onToggle: (leadId: string, selected: boolean) => void;
+  onOpen?: (leadIds: string[]) => void;
 }
 
-export default function LeadList({ leads, onToggle }: LeadListProps) {
+export default function LeadList({ leads, onToggle, onOpen }: LeadListProps) {
   const [searchQuery, setSearchQuery] = useState('');
-  const [selectedLead, setSelectedLead] = useState<Lead | null>(null);
+  const [selectedLeadId, setSelectedLeadId] = useState<string | null>(null);
+  // Looked up by ID so the overlay shows the lead once it has been opened
+  const selectedLead = leads.find((l) => l.id === selectedLeadId) || null;
 
   const filteredLeads = useMemo(() => {
     if (!searchQuery.trim()) return leads;
@@ -96,7 +99,10 @@ export default function LeadList({ leads, onToggle }: LeadListProps) {
               key={lead.id}
               lead={lead}
               onToggle={onToggle}
-              onSelect={setSelectedLead}
+              onSelect={() => {
+                setSelectedLeadId(lead.id);
+                onOpen?.([lead.id]);
+              }}
             />
           ))}
         </div>
@@ -106,7 +112,7 @@ export default function LeadList({ leads, onToggle }: LeadListProps) {
       {selectedLead && (
         <LeadDetailOverlay
           lead={selectedLead}
-          onClose={() => setSelectedLead(null)}
+          onClose={() => setSelectedLeadId(null)}
         />
       )}
     </div>
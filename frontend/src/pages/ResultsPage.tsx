@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { useParams } from 'react-router-dom';
 import {
   Users,
@@ -15,6 +15,7 @@ import {
   updateLeadEmail,
   generateEmails,
   getSessions,
+  openLeads,
 } from '../services/api';
 import type { Lead, SearchSession } from '../types';
 import PipelineStepper from '../components/PipelineStepper';
@@ -26,6 +27,9 @@ import PromptEditor from '../components/PromptEditor';
 
 type Tab = 'leads' | 'outreach' | 'export';
 
+// Emails are written as their leads are shown, one page at a time
+const OUTREACH_PAGE_SIZE = 10;
+
 export default function ResultsPage() {
   const { id: sessionId } = useParams<{ id: string }>();
   const {
@@ -45,6 +49,8 @@ export default function ResultsPage() {
   const [savingEmail, setSavingEmail] = useState(false);
   const [generatingEmails, setGeneratingEmails] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [outreachShown, setOutreachShown] = useState(OUTREACH_PAGE_SIZE);
+  const openedIds = useRef(new Set<string>());
 
   // Sync pipeline leads to local state
   useEffect(() => {
@@ -86,6 +92,21 @@ export default function ResultsPage() {
     []
   );
 
+  // Leads stored lazily get their contact details (and emails) when opened
+  const handleOpenLeads = useCallback(
+    async (leadIds: string[]) => {
+      if (!sessionId || leadIds.length === 0) return;
+      try {
+        const opened = await openLeads(sessionId, leadIds);
+        const byId = new Map(opened.map((l) => [l.id, l]));
+        setLeads((prev) => prev.map((l) => byId.get(l.id) || l));
+      } catch {
+        setError('Failed to load lead details.');
+      }
+    },
+    [sessionId]
+  );
+
   const handleSaveEmail = async (
     leadId: string,
     subject: string,
@@ -111,7 +132,7 @@ export default function ResultsPage() {
     setGeneratingEmails(true);
     setError(null);
     try {
-      await generateEmails(sessionId, '');
+      await generateEmails(sessionId, '', undefined, true);
       await refetchLeads();
     } catch {
       setError('Failed to regenerate email.');
@@ -142,6 +163,24 @@ export default function ResultsPage() {
   };
 
   const selectedLeads = leads.filter((l) => l.is_selected);
+  const shownLeads = selectedLeads.slice(0, outreachShown);
+
+  // Open the outreach leads on screen that still lack details or an LLM email
+  useEffect(() => {
+    if (activeTab !== 'outreach') return;
+    const toOpen = shownLeads
+      .filter(
+        (l) =>
+          !openedIds.current.has(l.id) &&
+          (!l.personalized_email ||
+            l.email_tier === 'template' ||
+            l.enrichment_status === 'pending')
+      )
+      .map((l) => l.id);
+    if (toOpen.length === 0) return;
+    toOpen.forEach((id) => openedIds.current.add(id));
+    handleOpenLeads(toOpen);
+  }, [activeTab, shownLeads, handleOpenLeads]);
 
   const tabs: { key: Tab; label: string; icon: typeof Users; count?: number }[] =
     [
@@ -276,7 +315,11 @@ export default function ResultsPage() {
           {/* Tab Content */}
           <div>
             {activeTab === 'leads' && (
-              <LeadList leads={leads} onToggle={handleToggleLead} />
+              <LeadList
+                leads={leads}
+                onToggle={handleToggleLead}
+                onOpen={handleOpenLeads}
+              />
             )}
 
             {activeTab === 'outreach' && (
@@ -300,7 +343,7 @@ export default function ResultsPage() {
                     />
 
                     {/* Email previews */}
-                    {selectedLeads.map((lead) => (
+                    {shownLeads.map((lead) => (
                       <EmailPreview
                         key={lead.id}
                         lead={lead}
@@ -308,6 +351,17 @@ export default function ResultsPage() {
                         onRegenerate={handleRegenerateEmail}
                       />
                     ))}
+                    {shownLeads.length < selectedLeads.length && (
+                      <button
+                        onClick={() =>
+                          setOutreachShown((n) => n + OUTREACH_PAGE_SIZE)
+                        }
+                        className="w-full py-2.5 text-sm font-medium text-[#94a3b8] hover:text-[#e2e8f0] bg-[#12121a] border border-[#1e1e2e] rounded-lg hover:border-blue-500/40"
+                      >
+                        Show more ({selectedLeads.length - shownLeads.length}{' '}
+                        remaining)
+                      </button>
+                    )}
                   </>
                 )}
               </div>
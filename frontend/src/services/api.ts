@@ -85,6 +85,15 @@ export async function getLeads(sessionId: string): Promise<Lead[]> {
   return res.data;
 }
 
+// Fetch contact details and write emails for leads about to be read
+export async function openLeads(
+  sessionId: string,
+  leadIds: string[]
+): Promise<Lead[]> {
+  const res = await api.post(`/leads/${sessionId}/open`, { lead_ids: leadIds });
+  return res.data;
+}
+
 export async function toggleLead(
   leadId: string,
   isSelected: boolean
@@ -106,11 +115,14 @@ export async function updateLeadEmail(
 export async function generateEmails(
   sessionId: string,
   senderContext: string,
-  systemPrompt?: string
+  systemPrompt?: string,
+  force: boolean = false
 ): Promise<void> {
   await api.post(`/generate/${sessionId}`, {
     sender_context: senderContext,
     system_prompt: systemPrompt || null,
+    // Regenerate even when the inputs match the stored email's
+    force,
   });
 }
 
@@ -34,6 +34,8 @@ export interface Lead {
   personalized_email: string;
   email_subject: string;
   suggested_approach: string;
+  email_tier: string;
+  enrichment_status: string;
   is_selected: boolean;
 }
 